@@ -2,20 +2,44 @@
 # Servidor FastAPI rodando na porta 8080
 # BluMa | NomadEngenuity - Estrutura profissional
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Response, Header, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Response, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List, AsyncIterable, AsyncIterator, Callable, Iterator, Union
 import uvicorn
+import asyncio
+import json
+import numpy as np
 import os
 import shutil
-import tempfile
+import time
 from datetime import datetime
 import re
 from starlette.middleware.base import BaseHTTPMiddleware
 # from tts.model_tts import generate_wav_from_text  # OBSOLETO - Usando fast_tts_generate()
-from llm.llm import LLM, client, tools_config, tools_functions, get_unified_system_prompt
+from llm.llm import LLM, ToolCallsStarted, client, page_reader, search_service, tools_config, tools_functions, get_unified_system_prompt
+from llm.async_llm import AsyncLLM, create_async_client
 from llm.conversation import ConversationManager
+from llm.context import ContextBuilder
+from tts.cache import TTSCache, make_cache_key
+from tts.fillers import FillerBank
+from tts.engines import create_tts_engine
+from tts.encoding import (
+    TTS_SAMPLE_RATE, AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT,
+    audio_to_pcm16, wav_stream_header, encode_audio, negotiate_audio_format
+)
+from transcription.audio_io import WHISPER_SAMPLE_RATE, pcm16_to_float32, resample_audio, decode_audio_bytes
+from transcription.vad import EnergyEndpointer, SilenceTrimmer
+from transcription.options import LANGUAGE_MODES, SessionLanguageCache, get_decoding_profile, language_from_locale
+from transcription.engines import create_asr_engine
+from transcription.batching import ASRBatchScheduler, MAX_BATCH_AUDIO_SAMPLES
+from inference.executors import ExecutorSaturatedError, executor_from_env
+from inference.readiness import ModelLoader, ModelNotReadyError
+from inference.artifacts import get_artifact_store
+from inference.client import InferenceClient, RemoteASREngine, RemoteTTSEngine
 
 app = FastAPI(
     title="Assistent Voice API",
@@ -89,6 +113,105 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# =============================================================================
+# EXECUTORES DE INFERÊNCIA
+# =============================================================================
+# 
+# Todo trabalho bloqueante roda fora do event loop, em pools dedicados:
+# - whisper_executor: CPU, transcrição (WHISPER_WORKERS / WHISPER_QUEUE_SIZE)
+# - tts_executor: CPU, síntese Kokoro (TTS_WORKERS / TTS_QUEUE_SIZE)
+# - llm_executor: I/O, chamadas à Azure OpenAI (LLM_WORKERS / LLM_QUEUE_SIZE)
+# 
+# Quando a fila de um pool enche, a requisição recebe 503 com Retry-After.
+# =============================================================================
+
+# Micro-batching do Whisper: requisições que chegam dentro da janela são
+# transcritas num único batch (WHISPER_BATCHING=0 desativa)
+WHISPER_BATCHING = os.getenv("WHISPER_BATCHING", "1") == "1"
+WHISPER_BATCH_WINDOW_MS = int(os.getenv("WHISPER_BATCH_WINDOW_MS", 30))
+WHISPER_BATCH_MAX_SIZE = int(os.getenv("WHISPER_BATCH_MAX_SIZE", 4))
+
+# Remoção de silêncio antes do ASR: só os trechos de fala vão para o modelo e
+# uploads sem fala são recusados sem rodar o modelo (VAD_TRIM=0 desativa)
+silence_trimmer = SilenceTrimmer(
+    sample_rate=WHISPER_SAMPLE_RATE,
+    min_speech_db=float(os.getenv("VAD_MIN_SPEECH_DB", -50)),
+    padding_ms=int(os.getenv("VAD_PADDING_MS", 200))
+) if os.getenv("VAD_TRIM", "1") == "1" else None
+
+# Idioma da transcrição: fixado pelo locale/sessão (pinned), detectado uma vez
+# por sessão (auto) ou detectado a cada fala (detect); perfil de decodificação
+# fast | balanced | accurate (ver transcription/options.py)
+ASR_LANGUAGE_MODE = os.getenv("ASR_LANGUAGE_MODE", "pinned").lower()
+if ASR_LANGUAGE_MODE not in LANGUAGE_MODES:
+    raise ValueError(f"ASR_LANGUAGE_MODE inválido: {ASR_LANGUAGE_MODE} (opções: {', '.join(LANGUAGE_MODES)})")
+ASR_DEFAULT_LANGUAGE = os.getenv("ASR_DEFAULT_LANGUAGE", "pt")
+ASR_DECODING_PROFILE = os.getenv("ASR_DECODING_PROFILE", "balanced")
+get_decoding_profile(ASR_DECODING_PROFILE)
+session_languages = SessionLanguageCache()
+
+# Com batching, os workers do Whisper só preparam o áudio e esperam o batch,
+# então precisa haver pelo menos um worker por vaga do batch
+whisper_executor = executor_from_env("whisper", "WHISPER", default_workers=WHISPER_BATCH_MAX_SIZE if WHISPER_BATCHING else 1, default_queue=4)
+# Agendador do Kokoro (TTS_BATCHING=1): segmentos de várias respostas simultâneas são
+# intercalados numa única thread dona do modelo. Desligado por padrão: o forward do Kokoro
+# não faz batch de verdade, e só deve ser ligado se benchmarks/tts_scheduler_benchmark.py
+# mostrar ganho sobre o executor por requisição no hardware em uso
+TTS_BATCHING = os.getenv("TTS_BATCHING", "0") == "1"
+TTS_BATCH_MAX_SIZE = int(os.getenv("TTS_BATCH_MAX_SIZE", 8))
+TTS_BATCH_WINDOW_MS = int(os.getenv("TTS_BATCH_WINDOW_MS", 10))
+# Velocidade da fala do Kokoro (1.0 = normal)
+TTS_SPEED = float(os.getenv("TTS_SPEED", 1.0))
+
+# Cache de áudio por frase: LRU em memória + disco persistente (TTS_CACHE=0 desativa)
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE", "1") == "1"
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", 64))
+TTS_CACHE_DISK_MB = int(os.getenv("TTS_CACHE_DISK_MB", 512))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+
+tts_executor = executor_from_env("tts", "TTS", default_workers=TTS_BATCH_MAX_SIZE if TTS_BATCHING else 1, default_queue=8)
+llm_executor = executor_from_env("llm", "LLM", default_workers=8, default_queue=32)
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    """Responde 503 com Retry-After quando a fila de uma etapa de inferência está cheia."""
+    print(f"[SERVIDOR] ⚠️ {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "stage": exc.stage},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# =============================================================================
+# PRONTIDÃO DOS MODELOS
+# =============================================================================
+# 
+# Os modelos carregam em segundo plano depois que o servidor abre a porta.
+# Requisições que chegam antes esperam até MODEL_READY_WAIT_SECONDS pelo
+# modelo de que precisam; depois disso recebem 503 com Retry-After.
+# =============================================================================
+
+MODEL_READY_WAIT_SECONDS = float(os.getenv("MODEL_READY_WAIT_SECONDS", 10))
+# Quando o cliente do /ws/voice desconecta, o turno em andamento tem até este prazo
+# para terminar a resposta da LLM e salvá-la no histórico antes de ser cancelado
+WS_TURN_DRAIN_SECONDS = float(os.getenv("WS_TURN_DRAIN_SECONDS", 30))
+model_loader = ModelLoader(retry_after=int(os.getenv("MODEL_RETRY_AFTER_SECONDS", 5)))
+
+@app.exception_handler(ModelNotReadyError)
+async def model_not_ready_handler(request: Request, exc: ModelNotReadyError):
+    """Responde 503 com Retry-After enquanto o modelo necessário ainda está carregando."""
+    print(f"[SERVIDOR] ⏳ {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "model": exc.model, "state": exc.state},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# Modelos no próprio processo (local) ou num servidor de inferência único
+# compartilhado pelos workers do uvicorn (remote, ver inference/server.py)
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "local").lower()
+inference_client = InferenceClient() if INFERENCE_MODE == "remote" else None
+
 # Configuração fixa para português
 FIXED_LANGUAGE = 'p'  # Português brasileiro
 
@@ -96,41 +219,130 @@ FIXED_LANGUAGE = 'p'  # Português brasileiro
 # MODELOS OTIMIZADOS - CARREGADOS UMA VEZ NA INICIALIZAÇÃO
 # =============================================================================
 # 
-# Os modelos são carregados uma única vez quando o servidor inicia,
-# proporcionando performance muito superior às versões anteriores.
+# Os modelos são carregados uma única vez, numa thread em segundo plano
+# disparada no startup do servidor (ver model_loader), seguidos de uma
+# inferência de aquecimento.
 # 
-# - whisper_model: Modelo Whisper para transcrição
-# - tts_pipeline: Pipeline Kokoro para síntese de voz
+# - asr_engine: Motor de transcrição (ASR_ENGINE: whisper, faster-whisper ou stub)
+# - tts_engine: Motor Kokoro para síntese de voz (TTS_ENGINE: torch ou onnx)
 # =============================================================================
 
 # Variáveis globais para os modelos
-whisper_model = None
-tts_pipeline = None
+asr_engine = None
+whisper_batcher = None
+tts_engine = None
+tts_scheduler = None
+filler_bank = None
+tts_cache = TTSCache(
+    max_memory_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+    disk_dir=TTS_CACHE_DIR or None,
+    max_disk_bytes=TTS_CACHE_DISK_MB * 1024 * 1024
+) if TTS_CACHE_ENABLED else None
 
 # Inicializar a LLM e o gerenciador de conversas
-llm_instance = LLM(client, tools_config, tools_functions)
-conversation_manager = ConversationManager(max_history=None, storage_dir="conversations")  # Histórico ilimitado com persistência JSON
+# Ferramentas de uma rodada rodam em paralelo, cada uma com prazo próprio, dentro de
+# um orçamento total por resposta e de um número máximo de rodadas
+llm_instance = LLM(
+    client, tools_config, tools_functions,
+    tool_timeout=float(os.getenv("LLM_TOOL_TIMEOUT_SECONDS", 10)),
+    tool_budget=float(os.getenv("LLM_TOOL_BUDGET_SECONDS", 20)),
+    max_tool_rounds=int(os.getenv("LLM_MAX_TOOL_ROUNDS", 3)),
+    max_tool_workers=int(os.getenv("LLM_TOOL_WORKERS", 8))
+)
+# Streaming da LLM no event loop (AsyncAzureOpenAI sobre um pool httpx compartilhado), com
+# prazo por requisição, novas tentativas com jitter e hedge opcional do primeiro token.
+# LLM_ASYNC=0 volta ao cliente síncrono rodando no llm_executor
+async_llm = AsyncLLM(
+    llm_instance,
+    create_async_client(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 32)),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 16)),
+        connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 3)),
+        read_timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+    ),
+    request_deadline=float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", 30)),
+    first_token_timeout=float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT_SECONDS", 10)),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", 2)),
+    hedge=os.getenv("LLM_HEDGE", "0") == "1",
+    hedge_initial_delay=float(os.getenv("LLM_HEDGE_INITIAL_DELAY_MS", 1500)) / 1000
+) if os.getenv("LLM_ASYNC", "1") == "1" else None
+# Histórico ilimitado com persistência em disco: log append-only por sessão com
+# compactação em segundo plano (CONVERSATION_STORAGE_MODE=json reescreve o arquivo a cada turno;
+# CONVERSATION_STORAGE_MODE=sqlite usa conversations/conversations.db em modo WAL)
+conversation_manager = ConversationManager(
+    max_history=None,
+    storage_dir="conversations",
+    storage_mode=os.getenv("CONVERSATION_STORAGE_MODE", "jsonl"),
+    compact_interval=float(os.getenv("CONVERSATION_COMPACT_INTERVAL_SECONDS", 60)),
+    compact_min_records=int(os.getenv("CONVERSATION_COMPACT_MIN_RECORDS", 20)),
+    fsync=os.getenv("CONVERSATION_FSYNC", "0") == "1",
+    # Sessões são lidas do disco no primeiro acesso; só as ativas ficam em memória
+    cache_max_sessions=int(os.getenv("CONVERSATION_CACHE_MAX_SESSIONS", 1000)),
+    cache_ttl_seconds=float(os.getenv("CONVERSATION_CACHE_TTL_SECONDS", 1800))
+)
 system_prompt = get_unified_system_prompt()
 
-def load_whisper_model():
-    """Carrega o modelo Whisper uma única vez na inicialização do servidor."""
-    global whisper_model
-    if whisper_model is None:
-        print("[SERVIDOR] 🎤 Carregando modelo Whisper...")
-        import whisper
-        whisper_model = whisper.load_model("small")
-        print("[SERVIDOR] ✅ Modelo Whisper carregado com sucesso!")
-    return whisper_model
-
-def load_tts_pipeline():
-    """Carrega o pipeline TTS uma única vez na inicialização do servidor."""
-    global tts_pipeline
-    if tts_pipeline is None:
-        print("[SERVIDOR] 🔊 Carregando pipeline TTS...")
-        from kokoro import KPipeline
-        tts_pipeline = KPipeline(lang_code="p")
-        print("[SERVIDOR] ✅ Pipeline TTS carregado com sucesso!")
-    return tts_pipeline
+# Contexto por turno com orçamento de tokens: turnos recentes literais e os antigos
+# num resumo gerado em segundo plano (LLM_CONTEXT_SUMMARIES=0 só descarta os antigos)
+LLM_SUMMARY_MAX_TOKENS = int(os.getenv("LLM_SUMMARY_MAX_TOKENS", 300))
+context_builder = ContextBuilder(
+    conversation_manager,
+    summarize=(
+        (lambda previous, messages: llm_instance.summarize(previous, messages, max_tokens=LLM_SUMMARY_MAX_TOKENS))
+        if os.getenv("LLM_CONTEXT_SUMMARIES", "1") == "1" else None
+    ),
+    history_budget=int(os.getenv("LLM_CONTEXT_BUDGET_TOKENS", 3000)),
+    min_recent_messages=int(os.getenv("LLM_CONTEXT_MIN_RECENT_MESSAGES", 2)),
+    summarize_min_tokens=int(os.getenv("LLM_SUMMARY_MIN_TOKENS", 500))
+)
+
+def load_asr_engine():
+    """Carrega o motor de ASR (Whisper por padrão) uma única vez na inicialização do servidor."""
+    global asr_engine, whisper_batcher
+    if asr_engine is None:
+        if inference_client is not None:
+            print(f"[SERVIDOR] 🎤 Aguardando servidor de inferência em {inference_client.socket_path}...")
+            inference_client.wait_until_ready()
+            asr_engine = RemoteASREngine(inference_client)
+            print("[SERVIDOR] ✅ Transcrição delegada ao servidor de inferência")
+            return asr_engine
+        
+        print("[SERVIDOR] 🎤 Carregando motor de ASR...")
+        asr_engine = create_asr_engine()
+        print(f"[SERVIDOR] ✅ Motor de ASR '{asr_engine.name}' carregado com sucesso!")
+        
+        if WHISPER_BATCHING and asr_engine.supports_batching:
+            whisper_batcher = ASRBatchScheduler(
+                asr_engine,
+                window_ms=WHISPER_BATCH_WINDOW_MS,
+                max_batch_size=WHISPER_BATCH_MAX_SIZE
+            )
+            print(f"[SERVIDOR] ✅ Micro-batching do ASR ativo (janela {WHISPER_BATCH_WINDOW_MS}ms, até {WHISPER_BATCH_MAX_SIZE} por batch)")
+    return asr_engine
+
+def load_tts_engine():
+    """Carrega o motor TTS uma única vez na inicialização do servidor."""
+    global tts_engine, tts_scheduler
+    if tts_engine is None:
+        if inference_client is not None:
+            inference_client.wait_until_ready()
+            tts_engine = RemoteTTSEngine(inference_client, lang_code=FIXED_LANGUAGE)
+            print("[SERVIDOR] ✅ Síntese delegada ao servidor de inferência")
+            return tts_engine
+        
+        print("[SERVIDOR] 🔊 Carregando motor TTS...")
+        tts_engine = create_tts_engine(lang_code=FIXED_LANGUAGE)
+        print(f"[SERVIDOR] ✅ Motor TTS '{tts_engine.name}' carregado com sucesso!")
+        
+        if TTS_BATCHING:
+            from tts.scheduler import KokoroSynthesisScheduler
+            tts_scheduler = KokoroSynthesisScheduler(
+                tts_engine,
+                max_batch_size=TTS_BATCH_MAX_SIZE,
+                window_ms=TTS_BATCH_WINDOW_MS
+            )
+            print(f"[SERVIDOR] ✅ Agendador do Kokoro ativo (até {TTS_BATCH_MAX_SIZE} segmentos por rodada)")
+    return tts_engine
 
 def setup_ffmpeg():
     """Configura o ffmpeg para o Whisper funcionar corretamente."""
@@ -168,12 +380,7 @@ def setup_ffmpeg():
     else:
         print("[SERVIDOR] ⚠️ ffmpeg ainda não encontrado após tentativas")
 
-# Carregar os modelos na inicialização
-print("[SERVIDOR] 🚀 Inicializando modelos...")
 setup_ffmpeg()
-load_whisper_model()
-load_tts_pipeline()
-print("[SERVIDOR] ✅ Todos os modelos inicializados!")
 
 class ConversationContext(BaseModel):
     session_id: str
@@ -209,61 +416,185 @@ def process_text_for_tts(text: str) -> str:
     
     return text.strip()
 
-def fast_transcript(audio_file_path: str) -> str:
+# Fronteira de frase segundo as mesmas regras de process_text_for_tts:
+# reticências ou pontuação final (exceto vírgula) seguidas de espaço/quebra de linha
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(\.\.\.|[.!?:])\s')
+
+async def iter_tts_sentences(text_chunks: AsyncIterable[Union[str, ToolCallsStarted]]) -> AsyncIterator[Union[str, ToolCallsStarted]]:
+    """
+    Agrupa fragmentos de texto vindos da LLM em frases completas para o TTS.
+    
+    Cada frase é liberada assim que sua pontuação final chega, permitindo
+    sintetizar o início da resposta enquanto a LLM ainda está gerando o resto.
+    Eventos que não são texto (ToolCallsStarted) são repassados na ordem,
+    depois de liberar o texto que veio antes deles.
+    """
+    buffer = ""
+    async for chunk in text_chunks:
+        if not isinstance(chunk, str):
+            for sentence in process_text_for_tts(buffer).split('\n'):
+                if sentence.strip():
+                    yield sentence.strip()
+            buffer = ""
+            yield chunk
+            continue
+        
+        buffer += chunk
+        
+        # Procura a última fronteira de frase completa no buffer
+        last_boundary = None
+        for match in SENTENCE_BOUNDARY_PATTERN.finditer(buffer):
+            last_boundary = match
+        if last_boundary is None:
+            continue
+        
+        complete_text, buffer = buffer[:last_boundary.end()], buffer[last_boundary.end():]
+        for sentence in process_text_for_tts(complete_text).split('\n'):
+            if sentence.strip():
+                yield sentence.strip()
+    
+    # Libera o texto restante ao final do stream
+    for sentence in process_text_for_tts(buffer).split('\n'):
+        if sentence.strip():
+            yield sentence.strip()
+
+def transcription_language(session_id: Optional[str] = None, locale: Optional[str] = None) -> Optional[str]:
+    """
+    Idioma passado ao ASR (None = o motor detecta): locale da requisição ou da
+    sessão salva no modo pinned, idioma já detectado da sessão no modo auto.
+    """
+    if ASR_LANGUAGE_MODE == "detect":
+        return None
+    if ASR_LANGUAGE_MODE == "auto":
+        return session_languages.get(session_id)
+    
+    session_info = conversation_manager.get_session_info(session_id) if session_id else None
+    return (
+        language_from_locale(locale)
+        or language_from_locale((session_info or {}).get("locale"))
+        or ASR_DEFAULT_LANGUAGE
+    )
+
+def fast_transcript(audio_file_path: Union[str, np.ndarray], trim_silence: bool = True,
+                    session_id: Optional[str] = None, locale: Optional[str] = None) -> str:
     """
     =============================================================================
     FUNÇÃO OTIMIZADA DE TRANSCRIÇÃO
     =============================================================================
     
-    Versão otimizada que usa o modelo Whisper já carregado na inicialização.
+    Versão otimizada que usa o motor de ASR já carregado na inicialização
+    (openai-whisper, faster-whisper int8 ou stub, conforme ASR_ENGINE).
     Performance muito superior à versão original que carregava o modelo a cada chamada.
     
     Args:
-        audio_file_path (str): Caminho para o arquivo de áudio WAV
+        audio_file_path (str | np.ndarray): Caminho para o arquivo de áudio WAV,
+            ou amostras float32 mono a 16 kHz já decodificadas
+        trim_silence (bool): Remove o silêncio (VAD) antes de transcrever
+        session_id (str): Sessão da fala, usada para escolher/guardar o idioma
+        locale (str): Locale da requisição (ex.: "pt-BR"), usado para fixar o idioma
         
     Returns:
-        str: Texto transcrito do áudio
+        str: Texto transcrito do áudio (vazio se o áudio não tiver fala)
         
     Raises:
         Exception: Se o modelo não foi carregado ou erro na transcrição
     """
-    global whisper_model
+    global asr_engine
     
-    if whisper_model is None:
-        print("[ERRO] Modelo Whisper não foi carregado!")
-        raise Exception("Modelo Whisper não inicializado")
+    if asr_engine is None:
+        print("[ERRO] Motor de ASR não foi carregado!")
+        raise Exception("Motor de ASR não inicializado")
     
     try:
-        # Verificar se o ffmpeg está disponível no PATH
-        ffmpeg_path = shutil.which('ffmpeg')
-        print(f"[DEBUG] ffmpeg encontrado em: {ffmpeg_path}")
-        
-        if not ffmpeg_path:
-            # Tentar adicionar possíveis locais do ffmpeg no Windows
-            possible_paths = [
-                r"C:\ffmpeg\bin",
-                r"C:\Program Files\ffmpeg\bin",
-                r"C:\Program Files (x86)\ffmpeg\bin",
-                # Adicionar mais paths se necessário
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(os.path.join(path, "ffmpeg.exe")):
-                    os.environ["PATH"] = path + ";" + os.environ.get("PATH", "")
-                    print(f"[DEBUG] Adicionado ao PATH: {path}")
-                    break
-            else:
-                print("[DEBUG] ffmpeg não encontrado nos locais padrão")
+        # Arquivos em disco são decodificados em memória como os uploads
+        if isinstance(audio_file_path, str):
+            with open(audio_file_path, "rb") as f:
+                audio = decode_audio_bytes(f.read())
+        else:
+            audio = audio_file_path
+        
+        if trim_silence and silence_trimmer is not None:
+            started_at = time.perf_counter()
+            original_seconds = len(audio) / WHISPER_SAMPLE_RATE
+            audio = silence_trimmer.trim(audio)
+            if audio is None:
+                print(f"[VAD] 🔇 Nenhuma fala em {original_seconds:.2f}s de áudio, transcrição ignorada")
+                return ""
+            trimmed_seconds = len(audio) / WHISPER_SAMPLE_RATE
+            print(f"[VAD] {original_seconds:.2f}s -> {trimmed_seconds:.2f}s de fala "
+                  f"({1 - trimmed_seconds / original_seconds:.0%} removido) em {time.perf_counter() - started_at:.3f}s")
+        
+        language = transcription_language(session_id, locale)
+        print(f"[DEBUG] Iniciando transcrição otimizada ({asr_engine.name}, idioma: {language or 'auto'}, perfil: {ASR_DECODING_PROFILE})...")
         
-        print("[DEBUG] Iniciando transcrição otimizada...")
-        result = whisper_model.transcribe(audio_file_path)
-        print("[DEBUG] Transcrição otimizada concluída!")
+        # Áudios de até 30s entram no micro-batch; os maiores vão direto ao motor
+        if whisper_batcher is not None and len(audio) <= MAX_BATCH_AUDIO_SAMPLES:
+            result = whisper_batcher.transcribe(audio, language, ASR_DECODING_PROFILE)
+            print("[DEBUG] Transcrição otimizada concluída (batch)!")
+        else:
+            result = asr_engine.transcribe(audio, language, ASR_DECODING_PROFILE)
+            print("[DEBUG] Transcrição otimizada concluída!")
+        
+        if language is None and ASR_LANGUAGE_MODE == "auto":
+            session_languages.put(session_id, result.get("language"))
         return result["text"]
     except Exception as e:
         print(f"[DEBUG] Erro na transcrição otimizada: {str(e)}")
         raise e
 
-def fast_tts_generate(text: str, voice: str = "pm_santa") -> str:
+def iter_tts_audio(text: str, voice: str = "pm_santa", speed: float = TTS_SPEED) -> Iterator[np.ndarray]:
+    """
+    Produz o áudio de cada frase do texto, em ordem. Frases já sintetizadas
+    antes vêm do cache (memória ou disco); as demais são sintetizadas e
+    guardadas no cache ao terminar.
+    """
+    if tts_cache is None:
+        yield from synthesize_tts_audio(text, voice, speed)
+        return
+    
+    for sentence in process_text_for_tts(text).split('\n'):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        
+        key = make_cache_key(
+            sentence, voice, TTS_SAMPLE_RATE, "pcm16",
+            engine=tts_engine.name, model_version=tts_engine.model_version, speed=speed
+        )
+        cached = tts_cache.get(key)
+        if cached is not None:
+            yield pcm16_to_float32(cached)
+            continue
+        
+        pcm_chunks = []
+        for audio in synthesize_tts_audio(sentence, voice, speed):
+            pcm_chunks.append(audio_to_pcm16(audio))
+            yield audio
+        if pcm_chunks:
+            tts_cache.put(key, b"".join(pcm_chunks))
+
+def synthesize_tts_audio(text: str, voice: str = "pm_santa", speed: float = TTS_SPEED) -> Iterator[np.ndarray]:
+    """
+    Sintetiza o texto com o Kokoro, sem cache. Usa o agendador compartilhado
+    quando ativo, senão chama o motor diretamente.
+    """
+    if tts_scheduler is not None:
+        yield from tts_scheduler.synthesize(text, voice, speed)
+        return
+    
+    yield from tts_engine.synthesize(text, voice, speed)
+
+def transcribe_audio_bytes(content: bytes, session_id: Optional[str] = None, locale: Optional[str] = None) -> str:
+    """
+    Decodifica o upload em memória (sem arquivo temporário nem ffmpeg no caminho
+    normal) e transcreve o array resultante com fast_transcript().
+    """
+    started_at = time.perf_counter()
+    audio = decode_audio_bytes(content)
+    print(f"[DEBUG] Áudio decodificado em memória: {len(audio) / WHISPER_SAMPLE_RATE:.2f}s em {time.perf_counter() - started_at:.3f}s")
+    return fast_transcript(audio, session_id=session_id, locale=locale)
+
+def fast_tts_generate(text: str, voice: str = "pm_santa", audio_format: str = DEFAULT_AUDIO_FORMAT, is_mobile: bool = False) -> bytes:
     """
     =============================================================================
     FUNÇÃO OTIMIZADA DE TTS
@@ -275,16 +606,18 @@ def fast_tts_generate(text: str, voice: str = "pm_santa") -> str:
     Args:
         text (str): Texto para converter em áudio
         voice (str): Voz a usar (padrão: "pm_santa")
+        audio_format (str): Formato de saída: "opus", "mp3", "wav" ou "pcm"
+        is_mobile (bool): Usa bitrate menor nos formatos comprimidos
         
     Returns:
-        str: Caminho do arquivo de áudio gerado
+        bytes: Áudio codificado em memória no formato pedido
         
     Raises:
         Exception: Se o pipeline não foi carregado ou erro na geração
     """
-    global tts_pipeline
+    global tts_engine
     
-    if tts_pipeline is None:
+    if tts_engine is None:
         print("[ERRO] Pipeline TTS não foi carregado!")
         raise Exception("Pipeline TTS não inicializado")
     
@@ -292,39 +625,181 @@ def fast_tts_generate(text: str, voice: str = "pm_santa") -> str:
         print("[DEBUG] Iniciando geração de áudio otimizada...")
         
         # Gerar áudio
-        generator = tts_pipeline(text, voice)
-        
-        audio_chunks = []
-        for i, (gs, ps, audio) in enumerate(generator):
-            audio_chunks.append(audio)
+        audio_chunks = list(iter_tts_audio(text, voice))
         
         if not audio_chunks:
             raise RuntimeError("Falha na geração do áudio - nenhum chunk gerado.")
         
         # Concatenar chunks de áudio
-        import numpy as np
         audio_completo = np.concatenate(audio_chunks)
         
-        # Criar arquivo temporário
-        import tempfile
-        import soundfile as sf
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-            wav_path = temp_file.name
-        
-        # Salvar áudio no arquivo temporário
-        sf.write(wav_path, audio_completo, 24000)
+        # Codificar em memória (sem arquivo temporário)
+        audio_bytes = encode_audio(audio_completo, audio_format, TTS_SAMPLE_RATE, is_mobile=is_mobile)
         
-        print("[DEBUG] Geração de áudio otimizada concluída!")
-        return wav_path
+        print(f"[DEBUG] Geração de áudio otimizada concluída! ({audio_format}, {len(audio_bytes)} bytes)")
+        return audio_bytes
         
     except Exception as e:
         print(f"[DEBUG] Erro na geração de áudio otimizada: {str(e)}")
         raise e
 
+def fast_tts_stream(text: str, voice: str = "pm_santa") -> Iterator[bytes]:
+    """
+    Versão em streaming de fast_tts_generate(): sintetiza o texto com o pipeline
+    Kokoro já carregado e produz cada segmento como PCM 16-bit (24 kHz) assim
+    que fica pronto, sem arquivo temporário.
+    """
+    global tts_engine
+    
+    if tts_engine is None:
+        print("[ERRO] Pipeline TTS não foi carregado!")
+        raise Exception("Pipeline TTS não inicializado")
+    
+    for audio in iter_tts_audio(text, voice):
+        yield audio_to_pcm16(audio)
+
+def build_llm_messages(session_id: str, transcribed_text: str) -> List[Dict]:
+    """
+    Monta as mensagens para a LLM: prompt do sistema, resumo dos turnos antigos,
+    turnos recentes dentro do orçamento de tokens e a fala atual.
+    """
+    return context_builder.build(session_id, system_prompt, transcribed_text)
+
+def llm_token_stream(messages: List[Dict]) -> AsyncIterator[Union[str, ToolCallsStarted]]:
+    """Fragmentos da resposta da LLM: pelo caminho assíncrono ou, com LLM_ASYNC=0, passo a passo no llm_executor."""
+    if async_llm is not None:
+        return async_llm.run_stream(messages)
+    return iterate_in_threadpool(llm_executor.iterate(llm_instance.run_stream(messages)))
+
+async def reply_audio_chunks(messages: List[Dict], context: "ConversationContext", transcribed_text: str,
+                             audio_wanted: Callable[[], bool] = lambda: True) -> AsyncIterator[bytes]:
+    """
+    Gera a resposta em áudio frase a frase: a LLM produz tokens em streaming,
+    cada frase completa vai direto para o Kokoro e o PCM 16-bit resultante é
+    produzido imediatamente. Ao final, a conversa é salva no histórico.
+    
+    Quando audio_wanted() passa a retornar False (cliente desconectado), a
+    síntese é pulada, mas a resposta da LLM termina e é salva mesmo assim.
+    """
+    started_at = time.perf_counter()
+    first_audio_logged = False
+    filler_played = False
+    response_parts = []
+    
+    async def collect_tokens(chunks: AsyncIterable[Union[str, ToolCallsStarted]]) -> AsyncIterator[Union[str, ToolCallsStarted]]:
+        async for chunk in chunks:
+            if isinstance(chunk, str):
+                response_parts.append(chunk)
+            yield chunk
+    
+    # Os tokens da LLM chegam pelo event loop e cada síntese roda no pool do TTS
+    async for sentence in iter_tts_sentences(collect_tokens(llm_token_stream(messages))):
+        if not audio_wanted():
+            continue
+        if isinstance(sentence, ToolCallsStarted):
+            # Mascara a espera das ferramentas com um áudio pré-sintetizado (uma vez por turno)
+            filler_clip = filler_bank.pick() if filler_bank is not None and not filler_played else None
+            if filler_clip is not None:
+                print(f"[DEBUG] 🔧 Ferramentas em execução ({', '.join(sentence.tool_names)}), enviando áudio de espera")
+                filler_played = True
+                first_audio_logged = True
+                yield filler_clip
+            continue
+        
+        print(f"[DEBUG] Frase pronta para TTS: '{sentence}'")
+        async for pcm_chunk in iterate_in_threadpool(tts_executor.iterate(fast_tts_stream(sentence))):
+            if not first_audio_logged:
+                print(f"[DEBUG] ⏱️ Primeiro áudio em {time.perf_counter() - started_at:.2f}s")
+                first_audio_logged = True
+            yield pcm_chunk
+    
+    llm_response = "".join(response_parts)
+    if not llm_response.strip():
+        print("[DEBUG] ⚠️ LLM não gerou uma resposta válida no streaming")
+        return
+    
+    await run_in_threadpool(
+        conversation_manager.add_message,
+        context=context.dict(),
+        user_message=transcribed_text,
+        assistant_message=llm_response
+    )
+    print(f"[DEBUG] ✅ Resposta em streaming concluída em {time.perf_counter() - started_at:.2f}s")
+
+async def stream_reply_audio(messages: List[Dict], context: "ConversationContext", transcribed_text: str) -> AsyncIterator[bytes]:
+    """Envolve reply_audio_chunks() com um cabeçalho WAV de streaming para respostas HTTP."""
+    yield wav_stream_header(TTS_SAMPLE_RATE)
+    async for pcm_chunk in reply_audio_chunks(messages, context, transcribed_text):
+        yield pcm_chunk
+
+def warm_asr_engine():
+    """Transcreve 1s de silêncio pelo mesmo caminho das requisições (batch ou direto), sem o VAD."""
+    fast_transcript(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32), trim_silence=False)
+
+def warm_tts_engine():
+    """
+    Sintetiza uma frase curta sem passar pelo cache e, em seguida, pré-sintetiza
+    os áudios de espera usados enquanto as ferramentas da LLM rodam (TTS_FILLERS=0 desativa).
+    """
+    global filler_bank
+    for _ in synthesize_tts_audio("Olá, tudo bem?"):
+        pass
+    if os.getenv("TTS_FILLERS", "1") == "1":
+        filler_bank = FillerBank(iter_tts_audio)
+        filler_bank.warm_in_background()
+
+# O ASR vem primeiro: é a primeira etapa de todas as requisições
+model_loader.register("asr", load_asr_engine, warm_asr_engine)
+model_loader.register("tts", load_tts_engine, warm_tts_engine)
+
+@app.on_event("startup")
+def start_model_loading():
+    """Dispara o carregamento dos modelos sem segurar a abertura da porta."""
+    print("[SERVIDOR] 🚀 Inicializando modelos em segundo plano...")
+    model_loader.start()
+
+@app.on_event("shutdown")
+async def flush_conversations():
+    """Compacta os logs de conversa pendentes e fecha o pool de conexões da LLM antes de o processo sair."""
+    conversation_manager.close()
+    if async_llm is not None:
+        await async_llm.aclose()
+
 @app.get("/", tags=["Root"])
 def root():
     return {"message": "Servidor FastAPI rodando na porta 8765! 🇧🇷 Português Brasileiro"}
 
+def inference_server_status() -> Optional[Dict]:
+    """Estado do servidor de inferência compartilhado (só com INFERENCE_MODE=remote)."""
+    if inference_client is None:
+        return None
+    try:
+        return inference_client.status()
+    except Exception as e:
+        return {"ready": False, "error": str(e)}
+
+@app.get("/health/live", tags=["Health"])
+def liveness_check():
+    """Liveness: o processo está no ar e respondendo, mesmo com os modelos ainda carregando."""
+    return {"status": "alive", "timestamp": datetime.utcnow().isoformat()}
+
+@app.get("/health/ready", tags=["Health"])
+def readiness_check():
+    """Readiness: 200 quando todos os modelos estão prontos, 503 (com o estado de cada um) antes disso."""
+    ready = model_loader.is_ready()
+    content = {
+        "status": "ready" if ready else "loading",
+        "models": model_loader.snapshot(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if ready:
+        return content
+    return JSONResponse(
+        status_code=503,
+        content=content,
+        headers={"Retry-After": str(model_loader.retry_after)}
+    )
+
 @app.get("/health", tags=["Health"])
 def health_check():
     """Endpoint de health check para verificar se o servidor está funcionando."""
@@ -333,10 +808,39 @@ def health_check():
     return {
         "status": "healthy",
         "message": "Servidor funcionando corretamente",
-        "whisper_model_loaded": whisper_model is not None,
-        "tts_pipeline_loaded": tts_pipeline is not None,
+        "whisper_model_loaded": asr_engine is not None,
+        "asr_engine": asr_engine.name if asr_engine is not None else None,
+        "tts_pipeline_loaded": tts_engine is not None,
+        "tts_engine": tts_engine.name if tts_engine is not None else None,
         "ffmpeg_available": ffmpeg_available,
-        "models_ready": whisper_model is not None and tts_pipeline is not None,
+        "models_ready": model_loader.is_ready(),
+        "models": model_loader.snapshot(),
+        "inference_mode": INFERENCE_MODE,
+        "inference_server": inference_server_status(),
+        "artifacts": get_artifact_store().stats() if get_artifact_store() is not None else None,
+        "asr_language": {
+            "mode": ASR_LANGUAGE_MODE,
+            "decoding_profile": ASR_DECODING_PROFILE,
+            "sessions": session_languages.stats()
+        },
+        "conversation_storage": conversation_manager.storage_stats(),
+        "conversation_cache": conversation_manager.cache_stats(),
+        "llm_context": context_builder.stats(),
+        "llm_prompt_cache": llm_instance.prompt_cache.stats(),
+        "llm_tools": llm_instance.tool_stats(),
+        "llm_async": async_llm.stats() if async_llm is not None else None,
+        "search": search_service.stats(),
+        "page_reader": page_reader.stats(),
+        "vad": silence_trimmer.stats() if silence_trimmer is not None else None,
+        "whisper_batching": whisper_batcher.stats() if whisper_batcher is not None else None,
+        "tts_scheduler": tts_scheduler.stats() if tts_scheduler is not None else None,
+        "tts_cache": tts_cache.stats() if tts_cache is not None else None,
+        "fillers": filler_bank.stats() if filler_bank is not None else None,
+        "executors": {
+            "whisper": whisper_executor.stats(),
+            "tts": tts_executor.stats(),
+            "llm": llm_executor.stats()
+        },
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -345,14 +849,17 @@ async def tts_options():
     """Endpoint OPTIONS para requisições preflight CORS."""
     return {"message": "OK"}
 
-@app.post("/tts", tags=["TTS"], summary="Processa áudio, transcreve, processa na LLM e gera áudio de resposta", response_description="Áudio mp3 gerado com a resposta da LLM")
+@app.post("/tts", tags=["TTS"], summary="Processa áudio, transcreve, processa na LLM e gera áudio de resposta", response_description="Áudio gerado com a resposta da LLM (Opus/OGG, MP3, WAV ou PCM)")
 async def tts_endpoint(
     audio_file: UploadFile = File(..., description="Arquivo de áudio WAV para transcrição"),
     session_id: str = Form("", description="ID da sessão enviado via FormData"),
     conversation_id: str = Form("", description="ID da conversa enviado via FormData"),
     message_id: str = Form("", description="ID da mensagem enviado via FormData"),
     timezone: str = Form("America/Sao_Paulo", description="Timezone enviado via FormData"),
-    locale: str = Form("pt-BR", description="Locale enviado via FormData")
+    locale: str = Form("pt-BR", description="Locale enviado via FormData"),
+    audio_format: str = Form("", description="Formato da resposta: opus, mp3, wav ou pcm (se vazio, usa o header Accept)"),
+    is_mobile: bool = Form(False, description="Sessão mobile: usa bitrate menor no áudio comprimido"),
+    accept: Optional[str] = Header(None, description="Formatos de áudio aceitos pelo cliente")
 ):
     """
     Novo fluxo completo de processamento de áudio:
@@ -360,7 +867,7 @@ async def tts_endpoint(
     2. Transcreve o áudio usando whisper
     3. Processa a transcrição na LLM mantendo o contexto da conversa
     4. Converte a resposta da LLM em áudio usando TTS
-    5. Retorna o arquivo de áudio mp3 da resposta
+    5. Retorna o áudio da resposta no formato negociado (campo audio_format ou header Accept)
     """
     
     # ==================== LOGS DE ENTRADA ====================
@@ -382,6 +889,7 @@ async def tts_endpoint(
     print(f"[DEBUG] message_id: '{message_id}' (tipo: {type(message_id)}, vazio: {not message_id})")
     print(f"[DEBUG] timezone: '{timezone}' (tipo: {type(timezone)})")
     print(f"[DEBUG] locale: '{locale}' (tipo: {type(locale)})")
+    print(f"[DEBUG] audio_format: '{audio_format}', is_mobile: {is_mobile}, Accept: '{accept}'")
     print("[DEBUG] ✅ Dados recebidos via FormData corretamente!")
     
     # Validar o arquivo de áudio
@@ -389,13 +897,24 @@ async def tts_endpoint(
         print(f"[DEBUG] ERRO: Arquivo não é WAV: {audio_file.filename}")
         raise HTTPException(status_code=400, detail="Apenas arquivos WAV são suportados.")
     
+    # Negociar o formato do áudio de resposta antes de qualquer processamento
+    try:
+        response_format = negotiate_audio_format(accept, audio_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[DEBUG] Formato de resposta negociado: {response_format}")
+    
+    # Requisições que chegam durante o cold start esperam um pouco pelos modelos
+    await model_loader.wait_ready("asr", "tts", timeout=MODEL_READY_WAIT_SECONDS)
+    
     # Criar contexto da conversa
     context = ConversationContext(
         session_id=session_id or f"session_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
         conversation_id=conversation_id or f"conv_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
         message_id=message_id or f"msg_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
         timezone=timezone,
-        locale=locale
+        locale=locale,
+        is_mobile=is_mobile
     )
     
     # DEBUG: Logs do contexto FINAL
@@ -414,20 +933,14 @@ async def tts_endpoint(
     
     print("="*80 + "\n")
     
-    temp_audio_path = None
     try:
-        # Salvar o arquivo temporariamente
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            content = await audio_file.read()
-            temp_file.write(content)
-            temp_audio_path = temp_file.name
-        
-        print(f"[DEBUG] Arquivo de áudio salvo em: {temp_audio_path}")
-        print(f"[DEBUG] Tamanho do arquivo salvo: {os.path.getsize(temp_audio_path)} bytes")
+        # Ler o arquivo em memória (sem arquivo temporário)
+        content = await audio_file.read()
+        print(f"[DEBUG] Tamanho do áudio recebido: {len(content)} bytes")
         
         # Transcrever o áudio (versão otimizada)
         print("[DEBUG] Iniciando transcrição otimizada do áudio...")
-        transcribed_text = fast_transcript(temp_audio_path)
+        transcribed_text = await whisper_executor.run(transcribe_audio_bytes, content, context.session_id, context.locale)
         print(f"[DEBUG] Texto transcrito: '{transcribed_text}'")
         
         if not transcribed_text or not transcribed_text.strip():
@@ -436,11 +949,12 @@ async def tts_endpoint(
         # Obter histórico da conversa
         print(f"[DEBUG] === VERIFICANDO HISTÓRICO ===")
         print(f"[DEBUG] Procurando histórico para session_id: '{context.session_id}'")
-        conversation_history = conversation_manager.get_conversation_messages(context.session_id)
+        # Histórico e contexto podem ler o disco/SQLite (sessão fora do cache): fora do event loop
+        conversation_history = await run_in_threadpool(conversation_manager.get_conversation_messages, context.session_id)
         
         # DEBUG: Logs do histórico
         print(f"[DEBUG] Histórico encontrado: {len(conversation_history)} mensagens")
-        print(f"[DEBUG] Todas as sessões ativas: {list(conversation_manager.conversations.keys())}")
+        print(f"[DEBUG] Todas as sessões ativas: {conversation_manager.active_sessions()}")
         if conversation_history:
             print("[DEBUG] Histórico completo:")
             for i, msg in enumerate(conversation_history):
@@ -448,23 +962,8 @@ async def tts_endpoint(
         else:
             print("[DEBUG] Nenhum histórico encontrado para esta sessão")
         
-        # Montar mensagens com histórico
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt
-            }
-        ]
-        
-        # Adicionar histórico completo (já limitado pelo ConversationManager)
-        if conversation_history:
-            messages.extend(conversation_history)
-        
-        # Adicionar mensagem atual (texto transcrito)
-        messages.append({
-            "role": "user",
-            "content": transcribed_text
-        })
+        # Montar mensagens com histórico e a mensagem atual (texto transcrito)
+        messages = await run_in_threadpool(build_llm_messages, context.session_id, transcribed_text)
         
         # DEBUG: Logs das mensagens para LLM
         print(f"[DEBUG] === ENVIANDO PARA LLM ===")
@@ -477,7 +976,7 @@ async def tts_endpoint(
         
         # Obter resposta da LLM
         print("[DEBUG] Processando na LLM...")
-        llm_response = llm_instance.run(messages)
+        llm_response = await llm_executor.run(llm_instance.run, messages)
         print("==================RESPOSTA DA LLM=====================\n\n")
         print(f"{llm_response}\n\n")
         print("==================FIM RESPOSTA DA LLM=====================")
@@ -494,35 +993,32 @@ async def tts_endpoint(
         print(f"[DEBUG] Mensagem do usuário: '{transcribed_text}'")
         print(f"[DEBUG] Resposta do assistente: '{llm_response[:100]}...'")
         
-        conversation_manager.add_message(
+        await run_in_threadpool(
+            conversation_manager.add_message,
             context=context.dict(),
             user_message=transcribed_text,
             assistant_message=llm_response
         )
         
         # DEBUG: Verificar se foi salvo
-        updated_history = conversation_manager.get_conversation_messages(context.session_id)
+        updated_history = await run_in_threadpool(conversation_manager.get_conversation_messages, context.session_id)
         print(f"[DEBUG] Histórico após salvar: {len(updated_history)} mensagens")
         print(f"[DEBUG] Últimas 2 mensagens salvas:")
         for msg in updated_history[-2:]:
             print(f"  - {msg['role']}: {msg['content'][:50]}...")
         
         print(f"[DEBUG] === SESSÕES ATIVAS APÓS SALVAR ===")
-        print(f"[DEBUG] Todas as sessões: {list(conversation_manager.conversations.keys())}")
+        print(f"[DEBUG] Todas as sessões: {conversation_manager.active_sessions()}")
         
         # Converter resposta processada para áudio (versão otimizada)
         print("[DEBUG] Gerando áudio da resposta (versão otimizada)...")
-        wav_path = fast_tts_generate(llm_response)
-        
-        # Ler e retornar o arquivo de áudio
-        with open(wav_path, "rb") as f:
-            audio_bytes = f.read()
-        
-        # Limpar arquivo de áudio gerado
-        os.remove(wav_path)
+        audio_bytes = await tts_executor.run(
+            fast_tts_generate, llm_response, audio_format=response_format, is_mobile=context.is_mobile
+        )
         
         # Criar resposta com headers de CORS explícitos
-        response = Response(content=audio_bytes, media_type="audio/mpeg")
+        response = Response(content=audio_bytes, media_type=AUDIO_FORMATS[response_format]["media_type"])
+        response.headers["Vary"] = "Accept"
         response.headers["Access-Control-Allow-Origin"] = "*"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
         response.headers["Access-Control-Allow-Headers"] = "*"
@@ -533,18 +1029,238 @@ async def tts_endpoint(
         
         return response
         
+    except (HTTPException, ExecutorSaturatedError):
+        raise
     except Exception as e:
         print(f"[DEBUG] === ERRO NO FLUXO ===")
         print(f"[DEBUG] Erro no fluxo completo: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erro no fluxo de processamento: {str(e)}")
+
+@app.options("/tts/stream", tags=["TTS"])
+async def tts_stream_options():
+    """Endpoint OPTIONS para requisições preflight CORS."""
+    return {"message": "OK"}
+
+@app.post("/tts/stream", tags=["TTS"], summary="Versão em streaming do /tts: responde com áudio frase a frase", response_description="Áudio WAV (PCM 16-bit, 24 kHz) enviado em chunks")
+async def tts_stream_endpoint(
+    audio_file: UploadFile = File(..., description="Arquivo de áudio WAV para transcrição"),
+    session_id: str = Form("", description="ID da sessão enviado via FormData"),
+    conversation_id: str = Form("", description="ID da conversa enviado via FormData"),
+    message_id: str = Form("", description="ID da mensagem enviado via FormData"),
+    timezone: str = Form("America/Sao_Paulo", description="Timezone enviado via FormData"),
+    locale: str = Form("pt-BR", description="Locale enviado via FormData")
+):
+    """
+    Mesmo fluxo do /tts, mas com a resposta em streaming:
+    1. Recebe e transcreve o arquivo de áudio WAV
+    2. A LLM gera a resposta com stream=True
+    3. Cada frase completa é sintetizada pelo Kokoro assim que chega
+    4. O áudio é enviado em chunks (StreamingResponse), sem esperar a resposta inteira
+    """
+    print("\n" + "="*80)
+    print("[DEBUG] ===== NOVA REQUISIÇÃO /tts/stream =====")
+    print(f"[DEBUG] Data/Hora: {datetime.utcnow().isoformat()}")
+    print(f"[DEBUG] session_id: '{session_id}', conversation_id: '{conversation_id}', message_id: '{message_id}'")
+    print("="*80)
+    
+    # Validar o arquivo de áudio
+    if not audio_file.filename.lower().endswith('.wav'):
+        raise HTTPException(status_code=400, detail="Apenas arquivos WAV são suportados.")
+    
+    await model_loader.wait_ready("asr", "tts", timeout=MODEL_READY_WAIT_SECONDS)
+    
+    # Criar contexto da conversa
+    context = ConversationContext(
+        session_id=session_id or f"session_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+        conversation_id=conversation_id or f"conv_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+        message_id=message_id or f"msg_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+        timezone=timezone,
+        locale=locale
+    )
+    
+    try:
+        content = await audio_file.read()
+        transcribed_text = await whisper_executor.run(transcribe_audio_bytes, content, context.session_id, context.locale)
+        print(f"[DEBUG] Texto transcrito: '{transcribed_text}'")
+    
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        print(f"[DEBUG] Erro na transcrição: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Erro no fluxo de processamento: {str(e)}")
+    
+    if not transcribed_text or not transcribed_text.strip():
+        raise HTTPException(status_code=400, detail="Não foi possível transcrever o áudio ou o áudio está vazio.")
+    
+    # Recusa antes de começar o streaming se LLM ou TTS já estiverem lotados
+    if async_llm is None:
+        llm_executor.ensure_capacity()
+    tts_executor.ensure_capacity()
+    
+    messages = await run_in_threadpool(build_llm_messages, context.session_id, transcribed_text)
+    
+    # O gerador é assíncrono: os tokens da LLM chegam pelo event loop e cada
+    # etapa bloqueante (síntese, gravação do histórico) vai para o pool correspondente
+    response = StreamingResponse(
+        stream_reply_audio(messages, context, transcribed_text),
+        media_type="audio/wav"
+    )
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "*"
+    response.headers["X-Session-Id"] = context.session_id
+    return response
+
+@app.websocket("/ws/voice")
+async def voice_websocket(
+    websocket: WebSocket,
+    session_id: str = "",
+    conversation_id: str = "",
+    timezone: str = "America/Sao_Paulo",
+    locale: str = "pt-BR",
+    sample_rate: int = WHISPER_SAMPLE_RATE
+):
+    """
+    Canal full-duplex de voz.
+    
+    Protocolo:
+    - Cliente -> servidor: frames binários com PCM 16-bit mono (sample_rate da query string)
+      enquanto o usuário fala. Mensagens de texto JSON opcionais:
+      {"type": "end"} força o fim da fala, {"type": "reset"} descarta o áudio acumulado.
+    - Servidor -> cliente: eventos JSON (ready, speech_start, speech_end, transcript,
+      response_start, response_end, error) e frames binários com o áudio da resposta
+      em PCM 16-bit mono a 24 kHz.
+    
+    O fim da fala é detectado no servidor (VAD por energia), então a transcrição,
+    a LLM e o TTS começam assim que o usuário para de falar.
+    """
+    await websocket.accept()
+    
+    # Durante o cold start, espera os modelos; se não ficarem prontos, avisa e fecha (1013 = tente mais tarde)
+    try:
+        await model_loader.wait_ready("asr", "tts", timeout=MODEL_READY_WAIT_SECONDS)
+    except ModelNotReadyError as e:
+        await websocket.send_json({"type": "error", "status": 503, "detail": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=1013)
+        return
+    
+    session_id = session_id or f"session_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    conversation_id = conversation_id or f"conv_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    endpointer = EnergyEndpointer(sample_rate=sample_rate)
+    utterances: asyncio.Queue = asyncio.Queue()
+    # Marcado ao desconectar: o turno em andamento para de enviar e sintetizar, mas termina e salva
+    disconnected = asyncio.Event()
+    
+    print(f"[WS] 🔌 Conexão aberta - session_id: '{session_id}', sample_rate: {sample_rate}")
+    
+    async def send(payload: Union[Dict, bytes]) -> None:
+        """Envia ao cliente enquanto a conexão estiver aberta; depois da desconexão, descarta."""
+        if disconnected.is_set():
+            return
+        try:
+            if isinstance(payload, bytes):
+                await websocket.send_bytes(payload)
+            else:
+                await websocket.send_json(payload)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            disconnected.set()
+    
+    async def process_turns():
+        """Consome as falas detectadas, uma de cada vez, e envia a resposta em áudio."""
+        while True:
+            utterance = await utterances.get()
+            # Falas ainda na fila quando o cliente saiu não são processadas
+            if utterance is None or disconnected.is_set():
+                return
+            
+            context = ConversationContext(
+                session_id=session_id,
+                conversation_id=conversation_id,
+                message_id=f"msg_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}",
+                timezone=timezone,
+                locale=locale
+            )
+            
+            try:
+                audio = resample_audio(utterance, sample_rate, WHISPER_SAMPLE_RATE)
+                transcribed_text = await whisper_executor.run(fast_transcript, audio, session_id=session_id, locale=locale)
+                print(f"[WS] Texto transcrito: '{transcribed_text}'")
+                
+                if not transcribed_text or not transcribed_text.strip():
+                    await send({"type": "error", "detail": "Não foi possível transcrever o áudio ou o áudio está vazio."})
+                    continue
+                
+                await send({"type": "transcript", "text": transcribed_text, "message_id": context.message_id})
+                
+                messages = await run_in_threadpool(build_llm_messages, context.session_id, transcribed_text)
+                await send({"type": "response_start", "sample_rate": TTS_SAMPLE_RATE, "format": "pcm16"})
+                
+                async for pcm_chunk in reply_audio_chunks(
+                    messages, context, transcribed_text, audio_wanted=lambda: not disconnected.is_set()
+                ):
+                    await send(pcm_chunk)
+                
+                await send({"type": "response_end", "message_id": context.message_id})
+            
+            except ExecutorSaturatedError as e:
+                await send({"type": "error", "status": 503, "detail": str(e), "retry_after": e.retry_after})
+            except Exception as e:
+                print(f"[WS] Erro no processamento do turno: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                await send({"type": "error", "detail": f"Erro no fluxo de processamento: {str(e)}"})
+    
+    turn_task = asyncio.create_task(process_turns())
+    await websocket.send_json({
+        "type": "ready",
+        "session_id": session_id,
+        "input_sample_rate": sample_rate,
+        "output_sample_rate": TTS_SAMPLE_RATE
+    })
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                was_in_speech = endpointer.in_speech
+                utterance = endpointer.feed(pcm16_to_float32(message["bytes"]))
+                if endpointer.in_speech and not was_in_speech:
+                    await websocket.send_json({"type": "speech_start"})
+            else:
+                try:
+                    control = json.loads(message.get("text") or "{}")
+                except json.JSONDecodeError:
+                    control = {}
+                if control.get("type") == "reset":
+                    endpointer.reset()
+                    continue
+                utterance = endpointer.flush() if control.get("type") == "end" else None
+            
+            if utterance is not None:
+                print(f"[WS] 🎙️ Fim da fala detectado ({len(utterance) / sample_rate:.2f}s)")
+                await websocket.send_json({"type": "speech_end", "duration_seconds": round(len(utterance) / sample_rate, 2)})
+                await utterances.put(utterance)
     
+    except WebSocketDisconnect:
+        pass
     finally:
-        # Limpar arquivo de áudio temporário
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
-            print(f"[DEBUG] Arquivo temporário removido: {temp_audio_path}")
+        disconnected.set()
+        await utterances.put(None)
+        # Deixa o turno em andamento terminar a resposta e salvá-la; só cancela se passar do prazo
+        try:
+            await asyncio.wait_for(turn_task, timeout=WS_TURN_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"[WS] ⚠️ Turno em andamento cancelado após {WS_TURN_DRAIN_SECONDS:.0f}s - session_id: '{session_id}'")
+        except Exception as e:
+            print(f"[WS] ⚠️ Erro ao encerrar o turno em andamento: {str(e)}")
+        print(f"[WS] 🔌 Conexão encerrada - session_id: '{session_id}'")
 
 @app.get("/conversation/{session_id}", tags=["Conversation"])
 def get_conversation(session_id: str):
@@ -571,15 +1287,15 @@ def debug_history(session_id: str):
         "session_id": session_id,
         "message_count": len(conversation_history),
         "session_info": session_info,
-        "all_active_sessions": list(conversation_manager.conversations.keys()),
+        "all_active_sessions": conversation_manager.active_sessions(),
         "conversation_history": conversation_history
     }
 
 @app.get("/debug/all-sessions", tags=["Debug"])
 def debug_all_sessions():
-    """Endpoint de debug para ver todas as sessões ativas."""
+    """Endpoint de debug para ver todas as sessões ativas (em memória)."""
     all_sessions = {}
-    for session_id in conversation_manager.conversations.keys():
+    for session_id in conversation_manager.active_sessions():
         messages = conversation_manager.get_conversation_messages(session_id)
         all_sessions[session_id] = {
             "message_count": len(messages),
@@ -588,12 +1304,13 @@ def debug_all_sessions():
     
     return {
         "total_sessions": len(all_sessions),
-        "sessions": all_sessions
+        "sessions": all_sessions,
+        "cache": conversation_manager.cache_stats()
     }
 
 @app.get("/debug/storage-info", tags=["Debug"])
 def debug_storage_info():
-    """Endpoint de debug para ver informações sobre o armazenamento JSON."""
+    """Endpoint de debug para ver informações sobre o armazenamento das conversas."""
     import os
     
     storage_dir = "conversations"
@@ -609,7 +1326,7 @@ def debug_storage_info():
     total_size = 0
     
     for filename in os.listdir(storage_dir):
-        if filename.endswith('.json'):
+        if filename.endswith(('.json', '.jsonl', '.db', '.db-wal')):
             file_path = os.path.join(storage_dir, filename)
             file_size = os.path.getsize(file_path)
             files.append({
@@ -625,7 +1342,8 @@ def debug_storage_info():
         "files": files,
         "total_files": len(files),
         "total_size_bytes": total_size,
-        "total_size_mb": round(total_size / 1024 / 1024, 2)
+        "total_size_mb": round(total_size / 1024 / 1024, 2),
+        "storage": conversation_manager.storage_stats()
     }
 
 @app.options("/transcript", tags=["Transcription"])
@@ -647,18 +1365,15 @@ async def transcript_endpoint(
     if not audio_file.filename.lower().endswith('.wav'):
         raise HTTPException(status_code=400, detail="Apenas arquivos WAV são suportados.")
     
-    temp_audio_path = None
+    await model_loader.wait_ready("asr", timeout=MODEL_READY_WAIT_SECONDS)
+    
     try:
-        # Salvar o arquivo temporariamente
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            content = await audio_file.read()
-            temp_file.write(content)
-            temp_audio_path = temp_file.name
-        
-        print(f"[DEBUG] Arquivo de áudio salvo em: {temp_audio_path}")
+        # Ler o arquivo em memória (sem arquivo temporário)
+        content = await audio_file.read()
+        print(f"[DEBUG] Tamanho do áudio recebido: {len(content)} bytes")
         
-        # Transcrever o áudio (versão otimizada)
-        transcribed_text = fast_transcript(temp_audio_path)
+        # Transcrever o áudio (versão otimizada) no pool do Whisper
+        transcribed_text = await whisper_executor.run(transcribe_audio_bytes, content)
         
         return {
             "status": "success",
@@ -666,17 +1381,13 @@ async def transcript_endpoint(
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         print(f"[DEBUG] Erro na transcrição: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erro na transcrição: {str(e)}")
-    
-    finally:
-        # Limpar arquivo de áudio temporário
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            os.remove(temp_audio_path)
-            print(f"[DEBUG] Arquivo temporário removido: {temp_audio_path}")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
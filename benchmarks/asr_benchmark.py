@@ -0,0 +1,158 @@
+# =============================================================================
+# BENCHMARK DOS MOTORES DE ASR
+# =============================================================================
+#
+# Mede fator de tempo real (RTF) e taxa de erro de palavras (WER) de cada
+# motor de transcrição e perfil de decodificação sobre um conjunto de
+# amostras em português.
+#
+# Estrutura esperada do diretório de amostras:
+#   amostras/
+#   ├── frase_001.wav
+#   ├── frase_001.txt   (transcrição de referência)
+#   └── ...
+#
+# Uso:
+#   python -m benchmarks.asr_benchmark --samples amostras --engines whisper,faster-whisper
+#   python -m benchmarks.asr_benchmark --samples amostras --profiles fast,balanced,accurate
+#   python -m benchmarks.asr_benchmark --samples amostras --language auto   (com detecção de idioma)
+# =============================================================================
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcription.audio_io import WHISPER_SAMPLE_RATE, decode_audio_bytes
+from transcription.engines import create_asr_engine
+from transcription.options import DEFAULT_DECODING_PROFILE, get_decoding_profile
+
+
+def normalize_words(text: str) -> List[str]:
+    """Normaliza para comparação: minúsculas, sem pontuação, espaços simples (acentos mantidos)."""
+    text = unicodedata.normalize("NFC", text.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return text.split()
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Distância de edição (substituições + inserções + remoções) entre listas de palavras."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1]
+
+
+def load_samples(samples_dir: str) -> List[Tuple[str, object, str]]:
+    """Carrega os pares (nome, áudio 16 kHz, referência) do diretório."""
+    samples = []
+    for filename in sorted(os.listdir(samples_dir)):
+        if not filename.lower().endswith(".wav"):
+            continue
+        reference_path = os.path.join(samples_dir, os.path.splitext(filename)[0] + ".txt")
+        if not os.path.exists(reference_path):
+            print(f"[BENCH] ⚠️ Sem referência para {filename}, ignorando")
+            continue
+        with open(os.path.join(samples_dir, filename), "rb") as f:
+            audio = decode_audio_bytes(f.read())
+        with open(reference_path, "r", encoding="utf-8") as f:
+            reference = f.read().strip()
+        samples.append((filename, audio, reference))
+    return samples
+
+
+def benchmark_engine(name: str, model_name: str, samples, language: Optional[str], profiles: List[str]) -> List[Dict]:
+    started_at = time.perf_counter()
+    engine = create_asr_engine(name, model_name)
+    load_seconds = time.perf_counter() - started_at
+
+    # Aquecimento: a primeira chamada inclui alocações e compilação de kernels
+    engine.transcribe(samples[0][1], language)
+
+    return [benchmark_profile(engine, name, model_name, load_seconds, samples, language, profile) for profile in profiles]
+
+
+def benchmark_profile(engine, name: str, model_name: str, load_seconds: float, samples, language: Optional[str], profile: str) -> Dict:
+    audio_seconds = 0.0
+    processing_seconds = 0.0
+    errors = 0
+    reference_words = 0
+    for filename, audio, reference in samples:
+        started_at = time.perf_counter()
+        result = engine.transcribe(audio, language, profile)
+        elapsed = time.perf_counter() - started_at
+
+        reference_tokens = normalize_words(reference)
+        sample_errors = word_errors(reference_tokens, normalize_words(result["text"]))
+        audio_seconds += len(audio) / WHISPER_SAMPLE_RATE
+        processing_seconds += elapsed
+        errors += sample_errors
+        reference_words += len(reference_tokens)
+        print(f"[BENCH] {name}/{profile} | {filename}: {elapsed:.2f}s, {sample_errors} erro(s) -> '{result['text'].strip()}'")
+
+    return {
+        "engine": name,
+        "model": model_name,
+        "profile": profile,
+        "language": language or "auto",
+        "load_seconds": round(load_seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "processing_seconds": round(processing_seconds, 2),
+        "rtf": round(processing_seconds / audio_seconds, 3) if audio_seconds else None,
+        "wer": round(errors / reference_words, 4) if reference_words else None,
+        "samples": len(samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de RTF e WER dos motores de ASR")
+    parser.add_argument("--samples", required=True, help="Diretório com pares .wav/.txt")
+    parser.add_argument("--engines", default="whisper,faster-whisper", help="Motores separados por vírgula")
+    parser.add_argument("--model", default=os.getenv("ASR_MODEL", "small"), help="Tamanho/nome do modelo")
+    parser.add_argument("--language", default="pt", help="Idioma fixo da transcrição (auto = detectar a cada amostra)")
+    parser.add_argument("--profiles", default=DEFAULT_DECODING_PROFILE, help="Perfis de decodificação separados por vírgula (fast, balanced, accurate)")
+    parser.add_argument("--json", help="Arquivo para salvar os resultados em JSON")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        raise SystemExit(f"Nenhuma amostra encontrada em {args.samples}")
+
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    for profile in profiles:
+        get_decoding_profile(profile)
+    language = None if args.language == "auto" else args.language
+
+    results = [
+        result
+        for name in args.engines.split(",") if name.strip()
+        for result in benchmark_engine(name.strip(), args.model, samples, language, profiles)
+    ]
+
+    print("\n" + "=" * 82)
+    print(f"{'motor':<16}{'modelo':<10}{'perfil':<10}{'carga (s)':>10}{'RTF':>10}{'WER':>10}")
+    print("-" * 82)
+    for result in results:
+        print(f"{result['engine']:<16}{result['model']:<10}{result['profile']:<10}{result['load_seconds']:>10}{result['rtf']:>10}{result['wer']:>10}")
+    print("=" * 82)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
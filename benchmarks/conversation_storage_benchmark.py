@@ -0,0 +1,170 @@
+# =============================================================================
+# BENCHMARK DOS BACKENDS DE ARMAZENAMENTO DE CONVERSAS
+# =============================================================================
+#
+# Cria N sessões sintéticas em cada backend (json, jsonl, sqlite) num diretório
+# temporário e mede:
+# - carga: tempo para ler todas as sessões (o que o ConversationManager faz na inicialização);
+# - append: latência de gravar um turno (usuário + assistente) numa sessão aleatória;
+# - leitura: latência de ler uma sessão aleatória;
+# - busca: latência de listar as sessões de uma conversa (conversation_id).
+#
+# Uso:
+#   python -m benchmarks.conversation_storage_benchmark
+#   python -m benchmarks.conversation_storage_benchmark --sessions 20000 --messages 20 --backends jsonl,sqlite
+# =============================================================================
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.storage import STORAGE_BACKENDS, create_storage
+
+
+def synthetic_turn(session_id: str, turn: int, timestamp: str) -> List[Dict]:
+    message_id = f"{session_id}-{turn}"
+    return [
+        {'role': 'user', 'content': f"Pergunta {turn} da sessão {session_id} sobre o tempo amanhã?",
+         'message_id': message_id, 'timestamp': timestamp},
+        {'role': 'assistant', 'content': f"Resposta {turn}: amanhã deve fazer sol com máxima de 28 graus.",
+         'message_id': f"response-{message_id}", 'timestamp': timestamp},
+    ]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(values, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+def benchmark_backend(backend: str, sessions: int, messages: int, conversations: int, operations: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    storage_dir = tempfile.mkdtemp(prefix=f"conversations-{backend}-")
+    # Compactador desligado durante a medição (intervalo longo); os logs ficam pendentes
+    options = {"compact_interval": 3600} if backend == "jsonl" else {}
+    session_ids = [f"session-{index:06d}" for index in range(sessions)]
+    started = datetime(2025, 1, 1)
+
+    try:
+        # Os backends imprimem um log por gravação; silenciado durante o benchmark
+        with contextlib.redirect_stdout(io.StringIO()):
+            storage = create_storage(backend, storage_dir, **options)
+
+            seed_started_at = time.perf_counter()
+            for index, session_id in enumerate(session_ids):
+                timestamp = (started + timedelta(seconds=index)).isoformat()
+                history = []
+                for turn in range(messages // 2):
+                    history.extend(synthetic_turn(session_id, turn, timestamp))
+                metadata = {
+                    'conversation_id': f"conversation-{index % conversations}",
+                    'locale': 'pt-BR',
+                    'created_at': timestamp,
+                    'last_interaction': timestamp
+                }
+                storage.save_turn(session_id, history, history, metadata)
+            seed_seconds = time.perf_counter() - seed_started_at
+            storage.close()
+
+            # Carga completa a frio, como na inicialização do app
+            load_started_at = time.perf_counter()
+            storage = create_storage(backend, storage_dir, **options)
+            loaded = sum(1 for _ in storage.load_all())
+            load_seconds = time.perf_counter() - load_started_at
+
+            append_latencies = []
+            for operation in range(operations):
+                session_id = rng.choice(session_ids)
+                current = storage.load_session(session_id)
+                history, metadata = current
+                timestamp = (started + timedelta(days=1, seconds=operation)).isoformat()
+                new_messages = synthetic_turn(session_id, 10_000 + operation, timestamp)
+                metadata['last_interaction'] = timestamp
+                history.extend(new_messages)
+                operation_started_at = time.perf_counter()
+                storage.save_turn(session_id, new_messages, history, metadata)
+                append_latencies.append(time.perf_counter() - operation_started_at)
+
+            read_latencies = []
+            for _ in range(operations):
+                session_id = rng.choice(session_ids)
+                operation_started_at = time.perf_counter()
+                storage.load_session(session_id)
+                read_latencies.append(time.perf_counter() - operation_started_at)
+
+            # Busca por conversa: sem índice nos backends de arquivo, então poucas repetições
+            query_latencies = []
+            for _ in range(max(1, min(operations, 5 if backend != "sqlite" else operations))):
+                conversation_id = f"conversation-{rng.randrange(conversations)}"
+                operation_started_at = time.perf_counter()
+                storage.find_sessions(conversation_id=conversation_id)
+                query_latencies.append(time.perf_counter() - operation_started_at)
+
+            storage.close()
+
+        disk_bytes = sum(
+            os.path.getsize(os.path.join(storage_dir, filename)) for filename in os.listdir(storage_dir)
+        )
+        return {
+            "backend": backend,
+            "sessions": loaded,
+            "seed_seconds": round(seed_seconds, 2),
+            "load_seconds": round(load_seconds, 3),
+            "append": latency_summary(append_latencies),
+            "read": latency_summary(read_latencies),
+            "find_by_conversation": latency_summary(query_latencies),
+            "disk_mb": round(disk_bytes / 1024 / 1024, 2),
+        }
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os backends de armazenamento de conversas")
+    parser.add_argument("--backends", default=",".join(STORAGE_BACKENDS), help="Backends separados por vírgula")
+    parser.add_argument("--sessions", type=int, default=10_000, help="Número de sessões sintéticas")
+    parser.add_argument("--messages", type=int, default=10, help="Mensagens por sessão")
+    parser.add_argument("--conversations", type=int, default=1_000, help="Número de conversation_id distintos")
+    parser.add_argument("--operations", type=int, default=500, help="Appends e leituras medidos por backend")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    results = []
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        print(f"[BENCHMARK] {backend}: {args.sessions} sessões x {args.messages} mensagens...")
+        results.append(benchmark_backend(backend, args.sessions, args.messages, args.conversations, args.operations, args.seed))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print()
+    print(f"{'backend':<8} {'carga (s)':>10} {'append p50/p95 (ms)':>22} {'leitura p50/p95 (ms)':>22} {'busca p50 (ms)':>15} {'disco (MB)':>11}")
+    for result in results:
+        append = f"{result['append']['p50_ms']:.3f}/{result['append']['p95_ms']:.3f}"
+        read = f"{result['read']['p50_ms']:.3f}/{result['read']['p95_ms']:.3f}"
+        print(f"{result['backend']:<8} {result['load_seconds']:>10.3f} {append:>22} {read:>22} "
+              f"{result['find_by_conversation']['p50_ms']:>15.3f} {result['disk_mb']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
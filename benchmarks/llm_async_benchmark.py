@@ -0,0 +1,219 @@
+# =============================================================================
+# BENCHMARK DO CAMINHO ASSÍNCRONO DA LLM
+# =============================================================================
+#
+# Sobe um servidor local compatível com a API de chat completions da Azure
+# OpenAI (streaming SSE) e exercita o AsyncLLM de llm/async_llm.py sem
+# depender da rede nem de credenciais:
+# - tempo até o primeiro token (p50/p95/p99) com uma cauda lenta injetada,
+#   sem e com hedge do primeiro token;
+# - erros 500/429 injetados: novas tentativas com backoff e jitter;
+# - resposta que trava no meio do stream: o prazo por requisição corta;
+# - e confere que o texto recebido é o texto enviado pelo servidor.
+#
+# Uso:
+#   python -m benchmarks.llm_async_benchmark
+#   python -m benchmarks.llm_async_benchmark --requests 400 --concurrency 16 --slow-rate 0.08
+# =============================================================================
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPLY_WORDS = "Claro! Amanhã a previsão é de sol com algumas nuvens à tarde.".split(" ")
+
+
+class Behavior:
+    """O que o servidor local faz com as próximas requisições (alterado entre os cenários)."""
+
+    def __init__(self):
+        self.base_delay = 0.05
+        self.slow_rate = 0.0
+        self.slow_delay = 1.5
+        self.error_rate = 0.0
+        self.stall_rate = 0.0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def sse(payload) -> bytes:
+    return f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode()
+
+
+def start_stand_in_server(behavior: Behavior):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with behavior.lock:
+                behavior.requests += 1
+            roll = random.random()
+
+            if roll < behavior.error_rate:
+                body = json.dumps({"error": {"code": "InternalServerError", "message": "falha injetada"}}).encode()
+                self.send_response(random.choice([429, 500, 503]))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            delay = behavior.base_delay * random.uniform(0.7, 1.3)
+            if roll > 1 - behavior.slow_rate:
+                delay = behavior.slow_delay
+            stall = random.random() < behavior.stall_rate
+
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(delay)
+                for index, word in enumerate(REPLY_WORDS):
+                    chunk = {
+                        "id": "chatcmpl-local", "object": "chat.completion.chunk", "created": 0, "model": request.get("model"),
+                        "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word}, "finish_reason": None}]
+                    }
+                    self.write_chunk(sse(chunk))
+                    if stall and index == 2:
+                        time.sleep(60)
+                    time.sleep(0.002)
+                self.write_chunk(sse({
+                    "id": "chatcmpl-local", "object": "chat.completion.chunk", "created": 0, "model": request.get("model"),
+                    "choices": [],
+                    "usage": {"prompt_tokens": 1200, "completion_tokens": len(REPLY_WORDS), "total_tokens": 1200 + len(REPLY_WORDS),
+                              "prompt_tokens_details": {"cached_tokens": 1024}}
+                }))
+                self.write_chunk(sse("[DONE]"))
+                self.write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                # Cliente desistiu (hedge perdedor ou prazo estourado)
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def describe(latencies: List[float]) -> str:
+    if not latencies:
+        return "sem amostras"
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+    return f"p50 {pick(0.5):7.1f} ms   p95 {pick(0.95):7.1f} ms   p99 {pick(0.99):7.1f} ms"
+
+
+async def run_scenario(async_llm, requests: int, concurrency: int):
+    """Dispara as requisições com concorrência limitada; retorna (ttfts, falhas, respostas erradas)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    ttfts, failures, mismatches = [], [], 0
+    expected = " ".join(REPLY_WORDS)
+
+    async def one():
+        nonlocal mismatches
+        async with semaphore:
+            started_at = time.monotonic()
+            parts = []
+            try:
+                async for fragment in async_llm.run_stream([{"role": "user", "content": "Como vai estar o tempo amanhã?"}]):
+                    if not parts:
+                        ttfts.append(time.monotonic() - started_at)
+                    parts.append(fragment)
+            except Exception as e:
+                failures.append(type(e).__name__)
+                return
+            if "".join(parts) != expected:
+                mismatches += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return ttfts, failures, mismatches
+
+
+async def main_async(args):
+    behavior = Behavior()
+    server = start_stand_in_server(behavior)
+
+    # O módulo da LLM lê a configuração da Azure na importação: aponta para o servidor local
+    os.environ["AZURE_OPENAI_ENDPOINT"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "local")
+    os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-06-01")
+    os.environ["AZURE_OPENAI_DEPLOYMENT_ID"] = "local"
+    from llm.llm import LLM, client, tools_config, tools_functions
+    from llm.async_llm import AsyncLLM, create_async_client
+
+    llm = LLM(client, tools_config, tools_functions)
+    print(f"[BENCHMARK] Servidor local em {os.environ['AZURE_OPENAI_ENDPOINT']} "
+          f"({args.requests} requisições, concorrência {args.concurrency})")
+
+    def new_async_llm(**options):
+        return AsyncLLM(llm, create_async_client(max_connections=args.concurrency * 2), **options)
+
+    # 1. Cauda lenta no primeiro token: sem e com hedge
+    behavior.slow_rate, behavior.slow_delay = args.slow_rate, args.slow_delay_ms / 1000
+    for hedge in (False, True):
+        async_llm = new_async_llm(hedge=hedge, hedge_initial_delay=0.25, hedge_min_samples=20)
+        # Aquecimento: conexões abertas e amostras para o p95 do hedge
+        await run_scenario(async_llm, args.concurrency * 3, args.concurrency)
+        served_before = behavior.requests
+        ttfts, failures, mismatches = await run_scenario(async_llm, args.requests, args.concurrency)
+        stats = async_llm.stats()
+        print(f"primeiro token, hedge {'ligado ' if hedge else 'desligado'}: {describe(ttfts)}   "
+              f"idas ao servidor {behavior.requests - served_before}, hedges {stats['hedges']} "
+              f"(venceram {stats['hedge_wins']}), falhas {len(failures)}, respostas erradas {mismatches}")
+        await async_llm.aclose()
+
+    # 2. Erros injetados: novas tentativas com backoff e jitter
+    behavior.slow_rate, behavior.error_rate = 0.0, args.error_rate
+    async_llm = new_async_llm(max_retries=3, backoff_base=0.05, backoff_max=0.5)
+    ttfts, failures, mismatches = await run_scenario(async_llm, args.requests, args.concurrency)
+    stats = async_llm.stats()
+    print(f"{args.error_rate:.0%} de erros 429/5xx:           {describe(ttfts)}   "
+          f"novas tentativas {stats['retries']}, falhas {len(failures)}, respostas erradas {mismatches}")
+    await async_llm.aclose()
+
+    # 3. Stream que trava no meio: o prazo da requisição corta
+    behavior.error_rate, behavior.stall_rate = 0.0, 1.0
+    async_llm = new_async_llm(request_deadline=1.0)
+    started_at = time.monotonic()
+    _, failures, _ = await run_scenario(async_llm, args.concurrency, args.concurrency)
+    print(f"stream travado (prazo 1s):  {len(failures)}/{args.concurrency} cortados em "
+          f"{time.monotonic() - started_at:.2f}s ({', '.join(sorted(set(failures))) or '-'})")
+    await async_llm.aclose()
+
+    print(f"\n{async_llm.stats()}")
+    print(f"{llm.prompt_cache.stats()}")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o caminho assíncrono da LLM contra um servidor local")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--slow-rate", type=float, default=0.06, help="Fração de respostas com primeiro token lento")
+    parser.add_argument("--slow-delay-ms", type=float, default=1500, help="Atraso do primeiro token nas respostas lentas")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Fração de respostas 429/5xx no cenário de erros")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# =============================================================================
+# BENCHMARK DO SERVIÇO DE BUSCA
+# =============================================================================
+#
+# Sobe um servidor HTTP local que imita a página HTML do DuckDuckGo (com
+# atraso configurável) e mede o SearchService de llm/search.py sem depender
+# da rede:
+# - buscas distintas (frio): conexão persistente + parser;
+# - a mesma busca repetida: cache com TTL;
+# - N threads pedindo a mesma busca ao mesmo tempo: agrupamento (1 ida à rede);
+# - tempo de parsing de uma página grande com cada parser instalado;
+# - e confere que todos os parsers extraem os mesmos resultados.
+#
+# Uso:
+#   python -m benchmarks.search_benchmark
+#   python -m benchmarks.search_benchmark --delay-ms 150 --queries 20 --concurrency 16
+# =============================================================================
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.search import SEARCH_PARSERS, SearchService, available_parser, parse_results
+
+
+def results_page(query: str, results: int = 10, filler_blocks: int = 0) -> str:
+    """HTML no formato da versão html.duckduckgo.com, com blocos extras para simular páginas pesadas."""
+    blocks = []
+    for index in range(results):
+        blocks.append(
+            f'<div class="result results_links results_links_deep web-result">'
+            f'<div class="links_main links_deep result__body"><h2 class="result__title">'
+            f'<a rel="nofollow" class="result__a" href="https://exemplo.com.br/{index}?q={query}">'
+            f'Resultado {index} para {query}</a></h2>'
+            f'<a class="result__snippet" href="https://exemplo.com.br/{index}">Trecho do resultado {index} '
+            f'sobre {query} com algumas palavras a mais.</a></div></div>'
+        )
+    filler = "".join(
+        f'<div class="nav-link"><form><input type="hidden" name="s" value="{index}"></form><p>texto {index}</p></div>'
+        for index in range(filler_blocks)
+    )
+    return f"<html><head><title>{query}</title></head><body><div id=\"links\">{''.join(blocks)}</div>{filler}</body></html>"
+
+
+def start_stand_in_server(delay_seconds: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        requests_served = 0
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            query = parse_qs(self.rfile.read(length).decode()).get("q", [""])[0]
+            time.sleep(delay_seconds)
+            body = results_page(query).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            Handler.requests_served += 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Handler
+
+
+def timed(fn, repeat: int) -> List[float]:
+    latencies = []
+    for index in range(repeat):
+        started_at = time.perf_counter()
+        fn(index)
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+def describe(latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    return f"p50 {p50:7.2f} ms   p95 {p95:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o serviço de busca contra um servidor local")
+    parser.add_argument("--delay-ms", type=float, default=100, help="Atraso artificial do servidor local")
+    parser.add_argument("--queries", type=int, default=20, help="Buscas distintas (frias)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads pedindo a mesma busca ao mesmo tempo")
+    parser.add_argument("--parser", default=None, help=f"Parser do serviço ({', '.join(SEARCH_PARSERS)}); padrão: o mais rápido instalado")
+    args = parser.parse_args()
+
+    server, handler = start_stand_in_server(args.delay_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/html/"
+    service = SearchService(base_url=base_url, parser=args.parser)
+    print(f"[BENCHMARK] Servidor local em {base_url} (atraso {args.delay_ms:.0f} ms), parser: {service.parser}")
+
+    cold = timed(lambda index: service.search(f"consulta {index}"), args.queries)
+    print(f"buscas distintas:          {describe(cold)}")
+
+    cached = timed(lambda index: service.search(f"  Consulta {index % args.queries} "), args.queries * 5)
+    print(f"mesma busca (cache):       {describe(cached)}")
+
+    served_before = handler.requests_served
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started_at = time.perf_counter()
+        list(pool.map(lambda _: service.search("notícia do dia"), range(args.concurrency)))
+        elapsed = time.perf_counter() - started_at
+    print(f"{args.concurrency} buscas iguais simultâneas: {elapsed * 1000:7.2f} ms, "
+          f"{handler.requests_served - served_before} ida(s) ao servidor")
+
+    page = results_page("página pesada", filler_blocks=5000)
+    reference = None
+    print(f"\nparsing de uma página de {len(page) / 1024:.0f} KB:")
+    for name in SEARCH_PARSERS:
+        try:
+            available_parser(name)
+        except ValueError:
+            print(f"  {name:<12} (não instalado)")
+            continue
+        latencies = timed(lambda _: parse_results(page, 10, name), 10)
+        results = parse_results(page, 10, name)
+        reference = reference or results
+        print(f"  {name:<12} {describe(latencies)}   {'ok' if results == reference else 'RESULTADOS DIFERENTES'}")
+
+    print(f"\n{service.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# =============================================================================
+# BENCHMARK DOS MOTORES DE TTS
+# =============================================================================
+#
+# Mede fator de tempo real (RTF) e pico de memória (RSS) de cada motor de
+# síntese e compara o áudio de cada um com o do motor torch (paridade).
+#
+# Cada motor roda num subprocesso próprio para que o pico de RSS de um não
+# contamine a medição do outro.
+#
+# Uso:
+#   python -m benchmarks.tts_benchmark --engines torch,onnx
+#   TTS_ONNX_MODEL=models/kokoro.int8.onnx python -m benchmarks.tts_benchmark --engines torch,onnx
+# =============================================================================
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_SENTENCES = [
+    "Olá! Tudo bem com você?",
+    "Hoje o dia está ensolarado, com máxima de vinte e oito graus em São Paulo.",
+    "Posso te ajudar a organizar a sua agenda da semana, é só me dizer o que precisa.",
+    "A reunião foi remarcada para quinta-feira às três da tarde.",
+]
+
+
+def run_engine(name: str, sentences: List[str], voice: str, output_dir: str) -> Dict:
+    """Executado no subprocesso: carrega o motor, sintetiza as frases e salva o áudio para a paridade."""
+    from tts.engines import create_tts_engine
+
+    started_at = time.perf_counter()
+    engine = create_tts_engine(name)
+    load_seconds = time.perf_counter() - started_at
+
+    # Aquecimento: a primeira chamada inclui alocações e otimização do grafo
+    list(engine.synthesize(sentences[0], voice))
+
+    audio_seconds = 0.0
+    processing_seconds = 0.0
+    for index, sentence in enumerate(sentences):
+        started_at = time.perf_counter()
+        chunks = list(engine.synthesize(sentence, voice))
+        elapsed = time.perf_counter() - started_at
+
+        audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        np.save(os.path.join(output_dir, f"{name}_{index:03d}.npy"), audio)
+        audio_seconds += len(audio) / engine.sample_rate
+        processing_seconds += elapsed
+        print(f"[BENCH] {name} | frase {index + 1}: {elapsed:.2f}s para {len(audio) / engine.sample_rate:.2f}s de áudio")
+
+    # ru_maxrss é em KB no Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "engine": name,
+        "load_seconds": round(load_seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "processing_seconds": round(processing_seconds, 2),
+        "rtf": round(processing_seconds / audio_seconds, 3) if audio_seconds else None,
+        "peak_rss_mb": round(peak_rss_mb, 1)
+    }
+
+
+def compare_audio(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Diferença entre dois áudios: razão de duração, erro máximo absoluto e correlação."""
+    length = min(len(reference), len(candidate))
+    if not length:
+        return {"length_ratio": 0.0, "max_abs_diff": 1.0, "correlation": 0.0}
+    ref, cand = reference[:length], candidate[:length]
+    correlation = float(np.corrcoef(ref, cand)[0, 1]) if np.std(ref) and np.std(cand) else 0.0
+    return {
+        "length_ratio": round(len(candidate) / len(reference), 4),
+        "max_abs_diff": round(float(np.max(np.abs(ref - cand))), 4),
+        "correlation": round(correlation, 4)
+    }
+
+
+def check_parity(engines: List[str], sentence_count: int, output_dir: str, min_correlation: float, max_length_drift: float) -> List[Dict]:
+    """Compara cada motor com o torch, frase a frase."""
+    results = []
+    for name in engines:
+        if name == "torch":
+            continue
+        for index in range(sentence_count):
+            reference = np.load(os.path.join(output_dir, f"torch_{index:03d}.npy"))
+            candidate = np.load(os.path.join(output_dir, f"{name}_{index:03d}.npy"))
+            metrics = compare_audio(reference, candidate)
+            metrics["passed"] = (
+                metrics["correlation"] >= min_correlation
+                and abs(metrics["length_ratio"] - 1) <= max_length_drift
+            )
+            metrics.update({"engine": name, "sentence": index + 1})
+            results.append(metrics)
+            status = "✅" if metrics["passed"] else "❌"
+            print(f"[PARITY] {status} {name} frase {index + 1}: correlação {metrics['correlation']}, "
+                  f"duração {metrics['length_ratio']}x, erro máx. {metrics['max_abs_diff']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de RTF, memória e paridade dos motores de TTS")
+    parser.add_argument("--engines", default="torch,onnx", help="Motores separados por vírgula")
+    parser.add_argument("--voice", default="pm_santa", help="Voz usada na síntese")
+    parser.add_argument("--sentences", help="Arquivo com uma frase por linha (padrão: frases embutidas)")
+    parser.add_argument("--min-correlation", type=float, default=0.9, help="Correlação mínima com o áudio do torch")
+    parser.add_argument("--max-length-drift", type=float, default=0.05, help="Diferença máxima de duração (fração)")
+    parser.add_argument("--json", help="Arquivo para salvar os resultados em JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sentences = DEFAULT_SENTENCES
+    if args.sentences:
+        with open(args.sentences, "r", encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+
+    # Modo subprocesso: mede um único motor e imprime o resultado em JSON na última linha
+    if args.worker:
+        print(json.dumps(run_engine(args.worker, sentences, args.voice, args.output_dir)))
+        return
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="tts_bench_") as output_dir:
+        for name in engines:
+            command = [sys.executable, "-m", "benchmarks.tts_benchmark", "--worker", name,
+                       "--voice", args.voice, "--output-dir", output_dir]
+            if args.sentences:
+                command += ["--sentences", args.sentences]
+            completed = subprocess.run(command, capture_output=True, text=True,
+                                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            if completed.returncode != 0:
+                print(completed.stdout + completed.stderr)
+                raise SystemExit(f"Falha ao executar o motor {name}")
+            lines = completed.stdout.strip().splitlines()
+            print("\n".join(lines[:-1]))
+            results.append(json.loads(lines[-1]))
+
+        parity = check_parity(engines, len(sentences), output_dir, args.min_correlation, args.max_length_drift) \
+            if "torch" in engines else []
+
+    print("\n" + "=" * 72)
+    print(f"{'motor':<12}{'carga (s)':>12}{'RTF':>10}{'pico RSS (MB)':>16}")
+    print("-" * 72)
+    for result in results:
+        print(f"{result['engine']:<12}{result['load_seconds']:>12}{result['rtf']:>10}{result['peak_rss_mb']:>16}")
+    print("=" * 72)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"engines": results, "parity": parity}, f, ensure_ascii=False, indent=2)
+
+    if parity and not all(item["passed"] for item in parity):
+        raise SystemExit("Paridade fora da tolerância")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# =============================================================================
+# BENCHMARK DO AGENDADOR DO KOKORO x EXECUTOR POR REQUISIÇÃO
+# =============================================================================
+#
+# Compara os dois caminhos de síntese com várias respostas simultâneas:
+# - executor: cada passo do gerador do motor roda no tts_executor
+#   (BoundedExecutor), como em fast_tts_stream() com TTS_BATCHING=0;
+# - scheduler: KokoroSynthesisScheduler (TTS_BATCHING=1), uma thread dona do
+#   modelo intercalando os segmentos das requisições ativas.
+#
+# Mede, por requisição, o tempo até o primeiro áudio e até o fim, e o tempo
+# total da rodada. O TTS_BATCHING só deve virar padrão se o scheduler ganhar
+# aqui no hardware de produção.
+#
+# Uso:
+#   python -m benchmarks.tts_scheduler_benchmark --engine torch --concurrency 4 --requests 16
+#   python -m benchmarks.tts_scheduler_benchmark --engine onnx --executor-workers 2
+# =============================================================================
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference.executors import BoundedExecutor
+
+DEFAULT_TEXTS = [
+    "Olá! Tudo bem com você? Posso te ajudar com alguma coisa hoje?",
+    "Hoje o dia está ensolarado, com máxima de vinte e oito graus em São Paulo. À noite, a temperatura cai para dezoito graus.",
+    "A reunião foi remarcada para quinta-feira às três da tarde. Quer que eu avise os outros participantes?",
+    "Encontrei três restaurantes perto de você. O primeiro fica a duzentos metros e abre às onze horas.",
+]
+
+
+def describe(latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+    return f"p50 {p50:8.1f} ms   p95 {p95:8.1f} ms"
+
+
+def run_round(stream: Callable[[str], Iterator[np.ndarray]], texts: List[str], concurrency: int) -> Dict:
+    """Dispara as requisições com `concurrency` consumidores simultâneos e mede cada uma."""
+    first_audio, completion = [], []
+    audio_samples = 0
+    lock = threading.Lock()
+
+    def one(text: str) -> None:
+        nonlocal audio_samples
+        started_at = time.perf_counter()
+        first = None
+        samples = 0
+        for audio in stream(text):
+            if first is None:
+                first = time.perf_counter() - started_at
+            samples += len(audio)
+        with lock:
+            first_audio.append(first if first is not None else time.perf_counter() - started_at)
+            completion.append(time.perf_counter() - started_at)
+            audio_samples += samples
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, texts))
+    return {
+        "wall_seconds": time.perf_counter() - started_at,
+        "first_audio": first_audio,
+        "completion": completion,
+        "audio_samples": audio_samples
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agendador do Kokoro x executor por requisição")
+    parser.add_argument("--engine", default=None, help="Motor de TTS (torch | onnx); padrão: TTS_ENGINE")
+    parser.add_argument("--voice", default="pm_santa", help="Voz usada na síntese")
+    parser.add_argument("--concurrency", type=int, default=4, help="Respostas sintetizadas ao mesmo tempo")
+    parser.add_argument("--requests", type=int, default=16, help="Respostas por modo")
+    parser.add_argument("--executor-workers", type=int, default=1, help="Workers do tts_executor no modo executor (padrão do app: 1)")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="Requisições por rodada do scheduler")
+    args = parser.parse_args()
+
+    from tts.engines import create_tts_engine
+    from tts.scheduler import KokoroSynthesisScheduler
+
+    engine = create_tts_engine(args.engine)
+    texts = [DEFAULT_TEXTS[index % len(DEFAULT_TEXTS)] for index in range(args.requests)]
+    print(f"[BENCHMARK] Motor {engine.name}, {args.requests} respostas, {args.concurrency} simultâneas")
+
+    # Aquecimento fora da medição
+    list(engine.synthesize(DEFAULT_TEXTS[0], args.voice))
+
+    executor = BoundedExecutor("tts", max_workers=args.executor_workers, max_queue=args.concurrency * 2)
+    scheduler = KokoroSynthesisScheduler(engine, max_batch_size=args.max_batch_size)
+    modes = {
+        f"executor ({args.executor_workers} worker(s))": lambda text: executor.iterate(engine.synthesize(text, args.voice)),
+        "scheduler": lambda text: scheduler.synthesize(text, args.voice)
+    }
+
+    results = {}
+    for name, stream in modes.items():
+        result = run_round(stream, texts, args.concurrency)
+        results[name] = result
+        audio_seconds = result["audio_samples"] / engine.sample_rate
+        print(f"{name:<24} primeiro áudio {describe(result['first_audio'])}")
+        print(f"{'':<24} fim da resposta {describe(result['completion'])}")
+        print(f"{'':<24} rodada {result['wall_seconds']:.2f}s, RTF agregado {result['wall_seconds'] / audio_seconds:.3f}")
+
+    executor_result, scheduler_result = results.values()
+    p95 = lambda values: sorted(values)[min(len(values) - 1, int(len(values) * 0.95))]
+    wins = (
+        scheduler_result["wall_seconds"] < executor_result["wall_seconds"]
+        and p95(scheduler_result["first_audio"]) < p95(executor_result["first_audio"])
+    )
+    print(f"\nscheduler {'mais rápido' if wins else 'NÃO é mais rápido'} que o executor "
+          f"(tempo da rodada e p95 do primeiro áudio); {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# =============================================================================
+# REPOSITÓRIO LOCAL DE ARTEFATOS DOS MODELOS
+# =============================================================================
+#
+# Sem este módulo, o Whisper e o Kokoro baixam os checkpoints na primeira
+# carga e desserializam pickles do PyTorch a cada cold start. Aqui:
+# - tools/prefetch_models.py baixa tudo uma vez para um diretório versionado
+#   (ARTIFACTS_DIR/ARTIFACTS_VERSION, padrão models/v1), que pode ser embutido
+#   na imagem Docker;
+# - os pesos são convertidos para safetensors e carregados via mmap: as
+#   páginas são lidas sob demanda e compartilhadas entre processos;
+# - um lock file guarda o sha256 e o tamanho de cada arquivo, conferidos na
+#   carga (tamanho por padrão, sha256 completo com ARTIFACTS_VERIFY=sha256);
+# - o tempo de carga de cada artefato fica registrado para o /health.
+#
+# Sem o lock file, os motores voltam ao download em tempo de execução.
+# =============================================================================
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", "models")
+ARTIFACTS_VERSION = os.getenv("ARTIFACTS_VERSION", "v1")
+LOCK_FILENAME = "artifacts.lock.json"
+
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+KOKORO_CHECKPOINT = "kokoro-v1_0.pth"
+
+
+class ArtifactError(Exception):
+    """Artefato ausente, corrompido ou diferente do registrado no lock file."""
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Diretório versionado com os pesos dos modelos em safetensors.
+
+    Nomes dos artefatos: "whisper-<modelo>", "kokoro" e "voice-<voz>".
+    """
+
+    def __init__(self, root: str = ARTIFACTS_DIR, version: str = ARTIFACTS_VERSION, verify: Optional[str] = None):
+        self.root = root
+        self.version = version
+        self.directory = os.path.join(root, version)
+        self.verify_mode = (verify or os.getenv("ARTIFACTS_VERIFY", "size")).lower()
+        self._lock = threading.Lock()
+        self._timings: Dict[str, Dict] = {}
+        self._manifest = self._read_lock_file()
+
+    # ------------------------------------------------------------------
+    # Lock file
+    # ------------------------------------------------------------------
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, LOCK_FILENAME)
+
+    def _read_lock_file(self) -> Dict:
+        if not os.path.exists(self.lock_path):
+            return {"version": self.version, "artifacts": {}}
+        with open(self.lock_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_lock_file(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._manifest["version"] = self.version
+        self._manifest["updated_at"] = datetime.utcnow().isoformat()
+        temp_path = self.lock_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.lock_path)
+
+    def has(self, name: str) -> bool:
+        return name in self._manifest["artifacts"]
+
+    def path(self, relative_path: str) -> str:
+        return os.path.join(self.directory, relative_path)
+
+    def _record(self, name: str, files: List[str], source: Dict) -> None:
+        self._manifest["artifacts"][name] = {
+            "source": source,
+            "files": {
+                relative_path: {
+                    "sha256": sha256_file(self.path(relative_path)),
+                    "bytes": os.path.getsize(self.path(relative_path))
+                }
+                for relative_path in files
+            }
+        }
+        self._write_lock_file()
+
+    def verify(self, name: str, full: Optional[bool] = None) -> None:
+        """Confere os arquivos do artefato com o lock file (tamanho, ou sha256 se full)."""
+        entry = self._manifest["artifacts"].get(name)
+        if entry is None:
+            raise ArtifactError(f"Artefato {name} não está em {self.lock_path}")
+        full = self.verify_mode == "sha256" if full is None else full
+
+        for relative_path, expected in entry["files"].items():
+            file_path = self.path(relative_path)
+            if not os.path.exists(file_path):
+                raise ArtifactError(f"Arquivo ausente: {file_path}")
+            if os.path.getsize(file_path) != expected["bytes"]:
+                raise ArtifactError(f"Tamanho diferente do lock file: {file_path}")
+            if full and sha256_file(file_path) != expected["sha256"]:
+                raise ArtifactError(f"sha256 diferente do lock file: {file_path}")
+
+    def verify_all(self) -> List[str]:
+        """Verificação completa (sha256) de todos os artefatos registrados."""
+        names = sorted(self._manifest["artifacts"])
+        for name in names:
+            self.verify(name, full=True)
+        return names
+
+    # ------------------------------------------------------------------
+    # Carga (mmap via safetensors)
+    # ------------------------------------------------------------------
+
+    def _load_tensors(self, name: str, relative_path: str):
+        from safetensors.torch import load_file
+
+        started_at = time.perf_counter()
+        self.verify(name)
+        tensors = load_file(self.path(relative_path), device="cpu")
+        self._record_timing(name, time.perf_counter() - started_at, self.path(relative_path))
+        return tensors
+
+    def _record_timing(self, name: str, seconds: float, file_path: str) -> None:
+        with self._lock:
+            self._timings[name] = {
+                "seconds": round(seconds, 3),
+                "megabytes": round(os.path.getsize(file_path) / 1024 / 1024, 1)
+            }
+        print(f"[ARTEFATOS] {name} carregado em {seconds:.3f}s")
+
+    def load_whisper(self, model_name: str, device=None):
+        """Monta o modelo openai-whisper a partir do safetensors local."""
+        import torch
+        import whisper
+        from whisper.model import ModelDimensions, Whisper
+
+        name = f"whisper-{model_name}"
+        state_dict = self._load_tensors(name, f"{name}.safetensors")
+        with open(self.path(f"{name}.json"), "r", encoding="utf-8") as f:
+            dims = ModelDimensions(**json.load(f))
+
+        # whisper.load_model copia os pesos para parâmetros fp32; com assign=True os tensores
+        # entram como estão, então artefatos antigos (checkpoint fp16 original) são convertidos aqui
+        state_dict = {
+            key: tensor.float() if tensor.is_floating_point() and tensor.dtype != torch.float32 else tensor
+            for key, tensor in state_dict.items()
+        }
+
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        model = Whisper(dims)
+        # assign=True usa os tensores mapeados em vez de copiar para os parâmetros recém-criados
+        model.load_state_dict(state_dict, assign=True)
+        if model_name in whisper._ALIGNMENT_HEADS:
+            model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_name])
+        dtype = next(model.parameters()).dtype
+        if dtype != torch.float32:
+            raise ArtifactError(f"{name}: parâmetros em {dtype}, esperado torch.float32 (como whisper.load_model)")
+        return model.to(device)
+
+    def load_kokoro_model(self, repo_id: str = KOKORO_REPO_ID, disable_complex: bool = False):
+        """Monta o KModel com a config local e os pesos em safetensors."""
+        import torch
+        from kokoro import KModel
+
+        state_dict = self._load_tensors("kokoro", "kokoro.safetensors")
+
+        # O KModel carrega o checkpoint no construtor: um checkpoint vazio evita o
+        # download e os pesos reais entram em seguida, já mapeados
+        empty_checkpoint = io.BytesIO()
+        torch.save({}, empty_checkpoint)
+        empty_checkpoint.seek(0)
+        model = KModel(repo_id=repo_id, config=self.kokoro_config_path(), model=empty_checkpoint, disable_complex=disable_complex)
+        model.load_state_dict(state_dict, assign=True)
+        return model.eval()
+
+    def kokoro_config_path(self) -> str:
+        self.verify("kokoro")
+        return self.path("kokoro-config.json")
+
+    def voices(self) -> List[str]:
+        return sorted(name[len("voice-"):] for name in self._manifest["artifacts"] if name.startswith("voice-"))
+
+    def preload_voices(self, pipeline) -> None:
+        """Coloca os voice packs locais no cache do KPipeline, que então não os baixa."""
+        for voice in self.voices():
+            tensors = self._load_tensors(f"voice-{voice}", f"voices/{voice}.safetensors")
+            pipeline.voices[voice] = tensors["pack"]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "version": self.version,
+                "verify": self.verify_mode,
+                "artifacts": sorted(self._manifest["artifacts"]),
+                "load_timings": dict(self._timings)
+            }
+
+    # ------------------------------------------------------------------
+    # Download e conversão (tools/prefetch_models.py)
+    # ------------------------------------------------------------------
+
+    def fetch_whisper(self, model_name: str) -> None:
+        """Baixa o checkpoint do openai-whisper (sha256 conferido pela URL) e converte para safetensors."""
+        import torch
+        import whisper
+        from safetensors.torch import save_file
+
+        url = whisper._MODELS[model_name]
+        # As URLs do whisper têm o sha256 do checkpoint como penúltimo segmento
+        expected_sha256 = url.split("/")[-2]
+        name = f"whisper-{model_name}"
+
+        with tempfile.TemporaryDirectory() as download_dir:
+            checkpoint_path = whisper._download(url, download_dir, in_memory=False)
+            if sha256_file(checkpoint_path) != expected_sha256:
+                raise ArtifactError(f"sha256 do checkpoint {model_name} não confere com {url}")
+            checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+
+        os.makedirs(self.directory, exist_ok=True)
+        # O checkpoint oficial é fp16; grava em fp32 (o que whisper.load_model usa) para o
+        # load_whisper mapear os tensores sem conversão
+        state_dict = {
+            key: (tensor.float() if tensor.is_floating_point() else tensor).contiguous()
+            for key, tensor in checkpoint["model_state_dict"].items()
+        }
+        save_file(state_dict, self.path(f"{name}.safetensors"))
+        with open(self.path(f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(checkpoint["dims"], f, indent=2)
+
+        self._record(name, [f"{name}.safetensors", f"{name}.json"], {
+            "url": url,
+            "sha256": expected_sha256
+        })
+
+    def fetch_kokoro(self, repo_id: str = KOKORO_REPO_ID) -> None:
+        """Baixa a config e o checkpoint do Kokoro e converte os pesos para safetensors."""
+        import torch
+        from huggingface_hub import hf_hub_download
+        from safetensors.torch import save_file
+
+        config_path = hf_hub_download(repo_id=repo_id, filename="config.json")
+        checkpoint_path = hf_hub_download(repo_id=repo_id, filename=KOKORO_CHECKPOINT)
+        checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+
+        # O checkpoint tem um state_dict por componente (bert, predictor, decoder...);
+        # aqui vira um state_dict único com o prefixo do componente, como o do KModel
+        state_dict = {}
+        for component, component_state in checkpoint.items():
+            for key, tensor in component_state.items():
+                if key.startswith("module."):
+                    key = key[len("module."):]
+                state_dict[f"{component}.{key}"] = tensor.contiguous()
+
+        os.makedirs(self.directory, exist_ok=True)
+        save_file(state_dict, self.path("kokoro.safetensors"))
+        shutil.copyfile(config_path, self.path("kokoro-config.json"))
+
+        self._record("kokoro", ["kokoro.safetensors", "kokoro-config.json"], {
+            "repo_id": repo_id,
+            "filename": KOKORO_CHECKPOINT,
+            "sha256": sha256_file(checkpoint_path)
+        })
+
+    def fetch_voice(self, voice: str, repo_id: str = KOKORO_REPO_ID) -> None:
+        import torch
+        from huggingface_hub import hf_hub_download
+        from safetensors.torch import save_file
+
+        voice_path = hf_hub_download(repo_id=repo_id, filename=f"voices/{voice}.pt")
+        pack = torch.load(voice_path, map_location="cpu", weights_only=True)
+
+        os.makedirs(self.path("voices"), exist_ok=True)
+        save_file({"pack": pack.contiguous()}, self.path(f"voices/{voice}.safetensors"))
+
+        self._record(f"voice-{voice}", [f"voices/{voice}.safetensors"], {
+            "repo_id": repo_id,
+            "filename": f"voices/{voice}.pt",
+            "sha256": sha256_file(voice_path)
+        })
+
+    def prefetch(self, whisper_models: Iterable[str] = ("small",), voices: Iterable[str] = ("pm_santa",), kokoro: bool = True) -> Dict[str, float]:
+        """Baixa e converte os artefatos pedidos; retorna o tempo gasto em cada um."""
+        timings = {}
+        jobs = [(f"whisper-{name}", self.fetch_whisper, name) for name in whisper_models]
+        if kokoro:
+            jobs.append(("kokoro", self.fetch_kokoro, KOKORO_REPO_ID))
+        jobs += [(f"voice-{voice}", self.fetch_voice, voice) for voice in voices]
+
+        for name, fetch, argument in jobs:
+            started_at = time.perf_counter()
+            fetch(argument)
+            timings[name] = round(time.perf_counter() - started_at, 2)
+            print(f"[ARTEFATOS] ✅ {name} pronto em {timings[name]}s")
+        return timings
+
+
+_default_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """Repositório configurado por ARTIFACTS_DIR/ARTIFACTS_VERSION, ou None se ainda não foi populado."""
+    global _default_store
+    if _default_store is None and os.path.exists(os.path.join(ARTIFACTS_DIR, ARTIFACTS_VERSION, LOCK_FILENAME)):
+        _default_store = ArtifactStore()
+    return _default_store
@@ -0,0 +1,161 @@
+# =============================================================================
+# CLIENTE DO SERVIDOR DE INFERÊNCIA
+# =============================================================================
+#
+# Usado pelos workers web com INFERENCE_MODE=remote: RemoteASREngine e
+# RemoteTTSEngine seguem as mesmas interfaces dos motores locais, mas cada
+# chamada vai para o processo único de inference/server.py.
+# =============================================================================
+
+import threading
+import time
+from multiprocessing.connection import Client, Connection
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from inference.server import INFERENCE_SOCKET, inference_authkey
+from inference.shared_audio import put_audio, release_audio, take_audio
+from transcription.engines import ASREngine
+from transcription.options import DEFAULT_DECODING_PROFILE
+from tts.engines import TTSEngine
+
+
+class InferenceServerError(Exception):
+    """Erro devolvido pelo servidor de inferência."""
+
+
+class InferenceClient:
+    """
+    Conexões com o servidor de inferência, uma por thread (Connection não é
+    thread-safe e os pools de inferência do app usam várias threads).
+    """
+
+    def __init__(self, socket_path: str = INFERENCE_SOCKET):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = Client(self.socket_path, family="AF_UNIX", authkey=inference_authkey())
+            self._local.connection = connection
+        return connection
+
+    def _drop_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def _send(self, request: Dict) -> Connection:
+        # Uma nova tentativa se a conexão caiu (ex.: o servidor reiniciou)
+        try:
+            connection = self._connection()
+            connection.send(request)
+        except (OSError, EOFError):
+            self._drop_connection()
+            connection = self._connection()
+            connection.send(request)
+        return connection
+
+    def _receive(self, connection: Connection) -> Dict:
+        try:
+            response = connection.recv()
+        except (OSError, EOFError):
+            self._drop_connection()
+            raise
+        if "error" in response:
+            raise InferenceServerError(response["error"])
+        return response
+
+    def status(self) -> Dict:
+        return self._receive(self._send({"op": "status"}))
+
+    def wait_until_ready(self, timeout: float = 600, poll_seconds: float = 0.5) -> Dict:
+        """Espera o servidor subir e terminar de carregar os modelos."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status = self.status()
+                if status["ready"]:
+                    return status
+            except (OSError, EOFError):
+                self._drop_connection()
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Servidor de inferência em {self.socket_path} não ficou pronto em {timeout}s")
+            time.sleep(poll_seconds)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        reference = put_audio(audio)
+        try:
+            request = {"op": "transcribe", "audio": reference, "language": language, "profile": profile}
+            return self._receive(self._send(request))["result"]
+        finally:
+            release_audio(reference)
+
+    def synthesize(self, text: str, voice: str = "pm_santa", speed: float = 1) -> Iterator[np.ndarray]:
+        connection = self._send({"op": "synthesize", "text": text, "voice": voice, "speed": speed})
+        finished = False
+        try:
+            while True:
+                response = self._receive(connection)
+                if response.get("done"):
+                    finished = True
+                    return
+                yield take_audio(response["chunk"])
+        except InferenceServerError:
+            finished = True
+            raise
+        finally:
+            if not finished:
+                # Resposta abandonada no meio (ex.: cliente HTTP desconectou): a conexão sai
+                # desta thread e os segmentos restantes são lidos e liberados em segundo plano
+                self._local.connection = None
+                threading.Thread(target=_drain, args=(connection,), name="inference-drain", daemon=True).start()
+
+
+def _drain(connection: Connection) -> None:
+    """Consome o resto de uma síntese abandonada, liberando os blocos de memória compartilhada."""
+    try:
+        while True:
+            response = connection.recv()
+            if "chunk" in response:
+                release_audio(response["chunk"])
+            else:
+                return
+    except (OSError, EOFError):
+        pass
+    finally:
+        connection.close()
+
+
+class RemoteASREngine(ASREngine):
+    """Motor de ASR que transcreve no servidor de inferência (o batching acontece lá)."""
+
+    name = "remote"
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        return self.client.transcribe(audio, language, profile)
+
+
+class RemoteTTSEngine(TTSEngine):
+    """Motor de TTS que sintetiza no servidor de inferência (o agendador do Kokoro roda lá)."""
+
+    name = "remote"
+
+    def __init__(self, client: InferenceClient, lang_code: str = "p"):
+        super().__init__(lang_code)
+        self.client = client
+        # Motor e pesos do servidor de inferência, para a chave do cache de áudio
+        status = client.status()
+        self.model_version = f"{status.get('tts_engine')}:{status.get('tts_model_version')}"
+
+    def synthesize(self, text: str, voice: str = "pm_santa", speed: float = 1) -> Iterator[np.ndarray]:
+        yield from self.client.synthesize(text, voice, speed)
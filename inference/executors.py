@@ -0,0 +1,125 @@
+# =============================================================================
+# EXECUTORES DE INFERÊNCIA COM FILA LIMITADA
+# =============================================================================
+#
+# O trabalho bloqueante (Whisper, Kokoro, chamadas à Azure) roda fora do
+# event loop do asyncio, em pools dedicados por etapa. Cada pool tem um
+# número fixo de workers e uma fila limitada: quando a fila enche, novas
+# requisições são recusadas com 503 + Retry-After em vez de se acumularem.
+# =============================================================================
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator
+
+_END_OF_ITERATION = object()
+
+
+class ExecutorSaturatedError(Exception):
+    """Levantada quando a fila de um executor está cheia."""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"Fila de {stage} cheia, tente novamente em {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor com capacidade limitada (workers + fila).
+
+    - run(): para código async; recusa imediatamente se não houver vaga.
+    - call()/iterate(): para código síncrono já fora do event loop (ex.: geradores
+      de streaming); espera até queue_timeout por uma vaga antes de recusar.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 2, queue_timeout: float = 30.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _acquire(self, block: bool) -> None:
+        if not self._slots.acquire(blocking=block, timeout=self.queue_timeout if block else None):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturatedError(self.name, self.retry_after)
+        with self._lock:
+            self._pending += 1
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args, block: bool = False, **kwargs) -> Future:
+        """Agenda fn no pool, levantando ExecutorSaturatedError se não houver vaga."""
+        self._acquire(block)
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executa fn no pool sem bloquear o event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executa fn no pool a partir de uma thread, esperando por uma vaga se necessário."""
+        return self.submit(fn, *args, block=True, **kwargs).result()
+
+    def iterate(self, iterator: Iterator) -> Iterator:
+        """Consome um iterador bloqueante passo a passo dentro do pool."""
+        iterator = iter(iterator)
+        while True:
+            item = self.call(next, iterator, _END_OF_ITERATION)
+            if item is _END_OF_ITERATION:
+                return
+            yield item
+
+    def ensure_capacity(self) -> None:
+        """Recusa antecipadamente (antes de iniciar um streaming) se o pool já estiver lotado."""
+        with self._lock:
+            full = self._pending >= self.max_workers + self.max_queue
+            if full:
+                self._rejected += 1
+        if full:
+            raise ExecutorSaturatedError(self.name, self.retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna o estado atual do pool para o /health."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+
+def executor_from_env(name: str, prefix: str, default_workers: int, default_queue: int) -> BoundedExecutor:
+    """
+    Cria um BoundedExecutor configurado por variáveis de ambiente:
+    <PREFIX>_WORKERS, <PREFIX>_QUEUE_SIZE e EXECUTOR_RETRY_AFTER_SECONDS.
+    """
+    return BoundedExecutor(
+        name=name,
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", default_workers)),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE_SIZE", default_queue)),
+        retry_after=int(os.getenv("EXECUTOR_RETRY_AFTER_SECONDS", 2)),
+        queue_timeout=float(os.getenv("EXECUTOR_QUEUE_TIMEOUT_SECONDS", 30))
+    )
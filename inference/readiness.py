@@ -0,0 +1,150 @@
+# =============================================================================
+# CARREGAMENTO DOS MODELOS EM SEGUNDO PLANO
+# =============================================================================
+#
+# Carregar o Whisper e o Kokoro no import do app.py impedia o uvicorn de
+# abrir a porta até os dois modelos estarem prontos, e cada cold start da
+# máquina no Fly.io ficava bloqueado. Aqui os modelos são carregados numa
+# thread depois que o servidor já está no ar, cada um seguido de uma
+# inferência de aquecimento, e o estado de cada um fica disponível para os
+# endpoints de liveness/readiness e para segurar requisições que chegam cedo.
+# =============================================================================
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelNotReadyError(Exception):
+    """Levantada quando uma requisição precisa de um modelo que ainda não terminou de carregar."""
+
+    def __init__(self, model: str, state: str, retry_after: int):
+        super().__init__(f"Modelo {model} ainda não está pronto ({state}), tente novamente em {retry_after}s")
+        self.model = model
+        self.state = state
+        self.retry_after = retry_after
+
+
+class _ModelSlot:
+    """Estado de carregamento de um modelo."""
+
+    def __init__(self, name: str, load: Callable[[], object], warmup: Optional[Callable[[], object]]):
+        self.name = name
+        self.load = load
+        self.warmup = warmup
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+
+class ModelLoader:
+    """
+    Carrega os modelos registrados, em ordem, numa thread em segundo plano.
+
+    Cada modelo passa por pending -> loading -> warming -> ready (ou failed).
+    Uma falha no aquecimento não impede o modelo de ficar pronto; uma falha no
+    carregamento deixa o modelo como failed e as requisições que dependem
+    dele recebem 503.
+    """
+
+    def __init__(self, retry_after: int = 5):
+        self.retry_after = retry_after
+        self._slots: Dict[str, _ModelSlot] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[float] = None
+
+    def register(self, name: str, load: Callable[[], object], warmup: Optional[Callable[[], object]] = None) -> None:
+        """Registra um modelo. A ordem de registro é a ordem de carregamento."""
+        self._slots[name] = _ModelSlot(name, load, warmup)
+
+    def start(self) -> threading.Thread:
+        """Inicia o carregamento em segundo plano (chamadas repetidas não recarregam)."""
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def load_all(self) -> None:
+        """Carrega tudo na thread atual (ex.: scripts e testes que não sobem o servidor)."""
+        self._started_at = self._started_at or time.perf_counter()
+        self._run()
+
+    def is_ready(self, names: Optional[Iterable[str]] = None) -> bool:
+        return all(self._slots[name].state == READY for name in (names or self._slots))
+
+    def require(self, *names: str) -> None:
+        """Levanta ModelNotReadyError se algum dos modelos não estiver pronto."""
+        for name in names:
+            slot = self._slots[name]
+            if slot.state != READY:
+                raise ModelNotReadyError(name, slot.state, self.retry_after)
+
+    async def wait_ready(self, *names: str, timeout: float = 0) -> None:
+        """
+        Espera até timeout segundos os modelos ficarem prontos sem bloquear o
+        event loop; depois disso (ou se algum falhou) levanta ModelNotReadyError.
+        """
+        deadline = time.monotonic() + timeout
+        for name in names:
+            slot = self._slots[name]
+            while slot.state != READY and slot.state != FAILED and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+        self.require(*names)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Estado, tempo de carga e de aquecimento de cada modelo, para os endpoints de health."""
+        return {
+            name: {
+                "state": slot.state,
+                "load_seconds": slot.load_seconds,
+                "warmup_seconds": slot.warmup_seconds,
+                "error": slot.error
+            }
+            for name, slot in self._slots.items()
+        }
+
+    def pending_models(self) -> List[str]:
+        return [name for name, slot in self._slots.items() if slot.state != READY]
+
+    def _run(self) -> None:
+        for slot in self._slots.values():
+            if slot.state != PENDING:
+                continue
+
+            slot.state = LOADING
+            started_at = time.perf_counter()
+            try:
+                slot.load()
+            except Exception as e:
+                slot.state = FAILED
+                slot.error = str(e)
+                print(f"[MODELOS] ❌ Falha ao carregar {slot.name}: {str(e)}")
+                continue
+            slot.load_seconds = round(time.perf_counter() - started_at, 2)
+
+            if slot.warmup is not None:
+                slot.state = WARMING
+                started_at = time.perf_counter()
+                try:
+                    slot.warmup()
+                except Exception as e:
+                    print(f"[MODELOS] ⚠️ Aquecimento de {slot.name} falhou: {str(e)}")
+                slot.warmup_seconds = round(time.perf_counter() - started_at, 2)
+
+            slot.state = READY
+            warmup = f", aquecimento {slot.warmup_seconds}s" if slot.warmup_seconds is not None else ""
+            print(f"[MODELOS] ✅ {slot.name} pronto (carga {slot.load_seconds}s{warmup})")
+
+        if self._started_at is not None:
+            print(f"[MODELOS] Carregamento concluído em {time.perf_counter() - self._started_at:.2f}s")
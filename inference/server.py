@@ -0,0 +1,167 @@
+# =============================================================================
+# SERVIDOR DE INFERÊNCIA COMPARTILHADO
+# =============================================================================
+#
+# Com `uvicorn app:app --workers N`, cada worker carregaria a própria cópia do
+# Whisper e do Kokoro, o que não cabe nos 2 GB da VM. Neste modo um único
+# processo é dono dos modelos e os workers web (INFERENCE_MODE=remote) falam
+# com ele por um socket Unix local:
+# - mensagens pequenas (operação, texto, voz) via multiprocessing.connection;
+# - amostras de áudio em blocos de memória compartilhada (inference/shared_audio.py).
+#
+# O micro-batching do ASR e o agendador do Kokoro rodam aqui, então
+# requisições de todos os workers entram nos mesmos batches.
+#
+# Uso:
+#   python -m inference.server &
+#   INFERENCE_MODE=remote uvicorn app:app --workers 2
+# =============================================================================
+
+import os
+import sys
+import threading
+from multiprocessing.connection import Connection, Listener
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference.readiness import ModelLoader
+from inference.shared_audio import put_audio, read_audio, release_audio
+from transcription.batching import ASRBatchScheduler, MAX_BATCH_AUDIO_SAMPLES
+from transcription.engines import create_asr_engine
+from transcription.options import DEFAULT_DECODING_PROFILE
+from tts.engines import create_tts_engine
+from tts.scheduler import KokoroSynthesisScheduler
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "/tmp/assistant-inference.sock")
+
+
+def inference_authkey() -> Optional[bytes]:
+    """Chave compartilhada entre servidor e clientes (INFERENCE_AUTHKEY); vazia desativa a autenticação."""
+    authkey = os.getenv("INFERENCE_AUTHKEY", "")
+    return authkey.encode() if authkey else None
+
+
+class InferenceServer:
+    """Dono único dos modelos de ASR e TTS, atendendo vários workers web."""
+
+    def __init__(self, socket_path: str = INFERENCE_SOCKET, lang_code: str = "p"):
+        self.socket_path = socket_path
+        self.lang_code = lang_code
+        self.asr_engine = None
+        self.asr_batcher = None
+        self.tts_engine = None
+        self.tts_scheduler = None
+        self.loader = ModelLoader()
+        self.loader.register("asr", self._load_asr)
+        self.loader.register("tts", self._load_tts)
+        self._connections = 0
+        self._lock = threading.Lock()
+
+    def _load_asr(self) -> None:
+        self.asr_engine = create_asr_engine()
+        if os.getenv("WHISPER_BATCHING", "1") == "1" and self.asr_engine.supports_batching:
+            self.asr_batcher = ASRBatchScheduler(
+                self.asr_engine,
+                window_ms=int(os.getenv("WHISPER_BATCH_WINDOW_MS", 30)),
+                max_batch_size=int(os.getenv("WHISPER_BATCH_MAX_SIZE", 4))
+            )
+
+    def _load_tts(self) -> None:
+        self.tts_engine = create_tts_engine(lang_code=self.lang_code)
+        # Mesmo padrão do app.py: o agendador só é ligado explicitamente (TTS_BATCHING=1)
+        if os.getenv("TTS_BATCHING", "0") == "1":
+            self.tts_scheduler = KokoroSynthesisScheduler(
+                self.tts_engine,
+                max_batch_size=int(os.getenv("TTS_BATCH_MAX_SIZE", 8)),
+                window_ms=int(os.getenv("TTS_BATCH_WINDOW_MS", 10))
+            )
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        listener = Listener(self.socket_path, family="AF_UNIX", authkey=inference_authkey())
+        print(f"[INFERÊNCIA] 🚀 Servidor ouvindo em {self.socket_path}")
+        self.loader.start()
+
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception as e:
+                print(f"[INFERÊNCIA] ⚠️ Conexão recusada: {str(e)}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), name="inference-conn", daemon=True).start()
+
+    def _handle(self, connection: Connection) -> None:
+        with self._lock:
+            self._connections += 1
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    self._dispatch(connection, request)
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    try:
+                        connection.send({"error": str(e)})
+                    except (EOFError, OSError):
+                        return
+        finally:
+            connection.close()
+            with self._lock:
+                self._connections -= 1
+
+    def _dispatch(self, connection: Connection, request: Dict) -> None:
+        op = request.get("op")
+
+        if op == "status":
+            connection.send({
+                "ready": self.loader.is_ready(),
+                "models": self.loader.snapshot(),
+                "asr_engine": self.asr_engine.name if self.asr_engine is not None else None,
+                "tts_engine": self.tts_engine.name if self.tts_engine is not None else None,
+                "tts_model_version": self.tts_engine.model_version if self.tts_engine is not None else None,
+                "whisper_batching": self.asr_batcher.stats() if self.asr_batcher is not None else None,
+                "tts_scheduler": self.tts_scheduler.stats() if self.tts_scheduler is not None else None,
+                "connections": self._connections
+            })
+
+        elif op == "transcribe":
+            self.loader.require("asr")
+            # O bloco pertence ao cliente, que o libera ao receber a resposta
+            audio = read_audio(request["audio"])
+            language = request.get("language")
+            profile = request.get("profile", DEFAULT_DECODING_PROFILE)
+            if self.asr_batcher is not None and len(audio) <= MAX_BATCH_AUDIO_SAMPLES:
+                result = self.asr_batcher.transcribe(audio, language, profile)
+            else:
+                result = self.asr_engine.transcribe(audio, language, profile)
+            connection.send({"result": result})
+
+        elif op == "synthesize":
+            self.loader.require("tts")
+            synthesize = self.tts_scheduler.synthesize if self.tts_scheduler is not None else self.tts_engine.synthesize
+            # Cada segmento vai num bloco próprio assim que fica pronto; o cliente o libera após copiar
+            for audio in synthesize(request["text"], request.get("voice", "pm_santa"), request.get("speed", 1)):
+                reference = put_audio(audio)
+                try:
+                    connection.send({"chunk": reference})
+                except Exception:
+                    release_audio(reference)
+                    raise
+            connection.send({"done": True})
+
+        else:
+            connection.send({"error": f"Operação desconhecida: {op}"})
+
+
+def main():
+    InferenceServer(lang_code=os.getenv("TTS_LANG_CODE", "p")).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# =============================================================================
+# ÁUDIO EM MEMÓRIA COMPARTILHADA
+# =============================================================================
+#
+# Entre os workers web e o servidor de inferência (inference/server.py) só
+# trafegam mensagens pequenas; as amostras de áudio vão num bloco de
+# multiprocessing.shared_memory. Quem recebe o bloco copia as amostras e o
+# libera (unlink), então cada bloco vive só durante uma troca de mensagens.
+# =============================================================================
+
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def _open_block(name: Optional[str] = None, size: int = 0) -> shared_memory.SharedMemory:
+    # Por padrão todo processo que cria ou abre um bloco o registra no
+    # resource_tracker, que o apagaria (ou avisaria de vazamento) ao sair; aqui
+    # o ciclo de vida é controlado explicitamente por quem recebe o bloco
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=name is None, size=size, track=False)
+    block = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _unlink_block(block: shared_memory.SharedMemory) -> None:
+    block.close()
+    if sys.version_info < (3, 13):
+        # Antes do 3.13, unlink() sempre desregistra o bloco no resource_tracker
+        resource_tracker.register(block._name, "shared_memory")
+    block.unlink()
+
+
+def put_audio(audio: np.ndarray) -> Dict:
+    """Copia o áudio float32 para um bloco novo e retorna a referência a enviar pelo socket."""
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    block = _open_block(size=max(audio.nbytes, 1))
+    np.ndarray(audio.shape, dtype=np.float32, buffer=block.buf)[:] = audio
+    reference = {"shm": block.name, "samples": int(audio.size)}
+    block.close()
+    return reference
+
+
+def take_audio(reference: Dict) -> np.ndarray:
+    """Lê o áudio de um bloco recebido e o libera."""
+    audio = read_audio(reference)
+    release_audio(reference)
+    return audio
+
+
+def read_audio(reference: Dict) -> np.ndarray:
+    """Lê o áudio de um bloco sem liberá-lo (o dono libera depois da resposta)."""
+    block = _open_block(reference["shm"])
+    try:
+        return np.ndarray((reference["samples"],), dtype=np.float32, buffer=block.buf).copy()
+    finally:
+        block.close()
+
+
+def release_audio(reference: Dict) -> None:
+    """Libera um bloco criado por put_audio() depois de lido."""
+    try:
+        block = _open_block(reference["shm"])
+    except FileNotFoundError:
+        return
+    _unlink_block(block)
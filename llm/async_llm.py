@@ -0,0 +1,308 @@
+# =============================================================================
+# CAMINHO ASSÍNCRONO DA LLM (AsyncAzureOpenAI)
+# =============================================================================
+#
+# O cliente síncrono prende uma thread do pool durante toda a resposta; uma
+# completion travada segura essa thread pelo timeout padrão do SDK. Aqui o
+# streaming roda no event loop, com:
+# - um único httpx.AsyncClient com pool de conexões ajustado, compartilhado
+#   por todas as requisições do worker;
+# - prazo por requisição (primeiro chunk e resposta inteira);
+# - novas tentativas com backoff exponencial e jitter (só antes do primeiro
+#   chunk: depois que o texto começou a sair não dá para repetir);
+# - hedge opcional do primeiro token: se o primeiro chunk demora mais que o
+#   p95 observado, uma segunda requisição idêntica é disparada e fica a que
+#   responder primeiro (a outra é cancelada).
+#
+# Ferramentas, limites de rodadas, schema e métricas de cache vêm da instância
+# síncrona de LLM, então os dois caminhos se comportam igual.
+# =============================================================================
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncAzureOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+from .llm import LLM, ToolCallsStarted, api_key, api_version, deployment_name, endpoint
+
+# Status HTTP que valem uma nova tentativa
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def create_async_client(max_connections: int = 32, max_keepalive_connections: int = 16, keepalive_expiry: float = 30.0,
+                        connect_timeout: float = 3.0, read_timeout: float = 30.0) -> AsyncAzureOpenAI:
+    """
+    AsyncAzureOpenAI sobre um httpx.AsyncClient compartilhado. As novas tentativas
+    do SDK ficam desligadas (max_retries=0): quem decide é AsyncLLM, dentro do prazo.
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+    )
+    return AsyncAzureOpenAI(
+        azure_endpoint=endpoint,
+        api_key=api_key,
+        api_version=api_version,
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (APIConnectionError, RateLimitError, InternalServerError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+class AsyncLLM:
+    """Streaming da LLM no event loop, com prazo, novas tentativas e hedge do primeiro token."""
+
+    def __init__(self, llm: LLM, client: AsyncAzureOpenAI, request_deadline: float = 30.0,
+                 first_token_timeout: float = 10.0, max_retries: int = 2, backoff_base: float = 0.25,
+                 backoff_max: float = 2.0, hedge: bool = False, hedge_initial_delay: float = 1.5,
+                 hedge_min_delay: float = 0.3, hedge_percentile: float = 0.95, hedge_min_samples: int = 20):
+        """
+        Args:
+            llm: Instância síncrona (ferramentas, schema, métricas de cache)
+            client: AsyncAzureOpenAI (ver create_async_client)
+            request_deadline: Segundos para cada requisição à LLM terminar de responder
+            first_token_timeout: Segundos para o primeiro chunk de cada tentativa
+            max_retries: Novas tentativas antes do primeiro chunk
+            backoff_base, backoff_max: Backoff exponencial com jitter completo entre tentativas
+            hedge: Dispara uma segunda requisição se o primeiro chunk atrasar
+            hedge_initial_delay: Atraso do hedge até haver amostras suficientes
+            hedge_min_delay: Atraso mínimo do hedge
+            hedge_percentile: Percentil do tempo até o primeiro chunk usado como atraso do hedge
+            hedge_min_samples: Amostras necessárias para usar o percentil
+        """
+        self.llm = llm
+        self.client = client
+        self.request_deadline = request_deadline
+        self.first_token_timeout = first_token_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+        self._first_chunk_latencies = deque(maxlen=500)
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "timeouts": 0,
+            "errors": 0
+        }
+
+    def hedge_delay(self) -> float:
+        """p95 (hedge_percentile) do tempo até o primeiro chunk, ou o atraso inicial com poucas amostras."""
+        if len(self._first_chunk_latencies) < self.hedge_min_samples:
+            return self.hedge_initial_delay
+        ordered = sorted(self._first_chunk_latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))
+        return max(self.hedge_min_delay, ordered[index])
+
+    async def _start_attempt(self, request: Dict) -> Tuple[object, AsyncIterator, object]:
+        """Abre o stream e espera o primeiro chunk; retorna (stream, iterador, primeiro chunk)."""
+        self._stats["attempts"] += 1
+        started_at = time.monotonic()
+        stream = await self.client.chat.completions.create(**request)
+        try:
+            iterator = stream.__aiter__()
+            first_chunk = await iterator.__anext__()
+        except BaseException:
+            await stream.close()
+            raise
+        self._first_chunk_latencies.append(time.monotonic() - started_at)
+        return stream, iterator, first_chunk
+
+    async def _first_chunk(self, request: Dict, deadline: float) -> Tuple[object, AsyncIterator, object]:
+        """Uma tentativa (com hedge, se ligado) até o primeiro chunk ou o fim do prazo."""
+        attempt_deadline = min(deadline, time.monotonic() + self.first_token_timeout)
+        tasks = {asyncio.create_task(self._start_attempt(request))}
+        primary = next(iter(tasks))
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedge else None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while tasks:
+                now = time.monotonic()
+                if now >= attempt_deadline:
+                    break
+                wake_at = min(attempt_deadline, hedge_at) if hedge_at is not None else attempt_deadline
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, wake_at - now), return_when=asyncio.FIRST_COMPLETED)
+
+                winners = [task for task in done if task.exception() is None]
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                if winners:
+                    # As duas tentativas podem chegar juntas: fica a primeira, as outras são fechadas
+                    for task in winners[1:]:
+                        await task.result()[0].close()
+                    if winners[0] is not primary:
+                        self._stats["hedge_wins"] += 1
+                    return winners[0].result()
+
+                if hedge_at is not None and time.monotonic() >= hedge_at:
+                    # Primeiro chunk atrasado além do p95: dispara uma cópia da requisição
+                    hedge_at = None
+                    self._stats["hedges"] += 1
+                    tasks.add(asyncio.create_task(self._start_attempt(request)))
+                elif not tasks and last_error is not None:
+                    raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                try:
+                    stream, _, _ = await task
+                    await stream.close()
+                except BaseException:
+                    pass
+
+        if last_error is not None and not tasks:
+            raise last_error
+        self._stats["timeouts"] += 1
+        raise asyncio.TimeoutError(f"Sem resposta da LLM em {self.first_token_timeout:.1f}s")
+
+    async def _open_stream(self, request: Dict, deadline: float) -> Tuple[object, AsyncIterator, object]:
+        """Primeiro chunk com novas tentativas (backoff exponencial com jitter) dentro do prazo."""
+        retries = 0
+        while True:
+            try:
+                return await self._first_chunk(request, deadline)
+            except Exception as e:
+                remaining = deadline - time.monotonic()
+                if not _is_retryable(e) or retries >= self.max_retries or remaining <= 0:
+                    self._stats["errors"] += 1
+                    raise
+                retries += 1
+                self._stats["retries"] += 1
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retries))
+                if delay >= remaining:
+                    self._stats["errors"] += 1
+                    raise
+                print(f"[LLM] 🔁 Tentativa {retries + 1} em {delay:.2f}s ({type(e).__name__}: {str(e)[:80]})")
+                await asyncio.sleep(delay)
+
+    async def _chunks(self, request: Dict) -> AsyncIterator:
+        """Chunks de uma requisição em streaming, respeitando request_deadline."""
+        self._stats["requests"] += 1
+        deadline = time.monotonic() + self.request_deadline
+        stream, iterator, chunk = await self._open_stream(request, deadline)
+        try:
+            while True:
+                yield chunk
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise asyncio.TimeoutError(f"Resposta da LLM excedeu o prazo de {self.request_deadline:.0f}s")
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self._stats["timeouts"] += 1
+                    raise
+        finally:
+            await stream.close()
+
+    async def run_stream(self, messages: List[Dict]) -> AsyncIterator[Union[str, ToolCallsStarted]]:
+        """Mesmo contrato de LLM.run_stream(), produzindo os fragmentos no event loop."""
+        tool_deadline = time.monotonic() + self.llm.tool_budget
+        round_number = 0
+        while True:
+            tool_choice = self.llm._tool_choice(round_number, tool_deadline)
+            request = {
+                "model": deployment_name,
+                "messages": messages,
+                "tools": self.llm.tools_config,
+                "tool_choice": tool_choice,
+                "stream": True,
+                "stream_options": {"include_usage": True}
+            }
+
+            content_parts = []
+            tool_calls: Dict[int, Dict] = {}
+
+            # aclosing: se o consumidor abandona a resposta, o stream HTTP é fechado na hora
+            async with aclosing(self._chunks(request)) as chunks:
+                async for chunk in chunks:
+                    if getattr(chunk, "usage", None) is not None:
+                        self.llm._record_usage("stream", chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield delta.content
+
+                    # Os argumentos das tool_calls chegam fragmentados, indexados por posição
+                    for tool_call_delta in delta.tool_calls or []:
+                        entry = tool_calls.setdefault(tool_call_delta.index, {
+                            "id": None,
+                            "type": "function",
+                            "function": {"name": "", "arguments": ""}
+                        })
+                        if tool_call_delta.id:
+                            entry["id"] = tool_call_delta.id
+                        if tool_call_delta.function:
+                            if tool_call_delta.function.name:
+                                entry["function"]["name"] += tool_call_delta.function.name
+                            if tool_call_delta.function.arguments:
+                                entry["function"]["arguments"] += tool_call_delta.function.arguments
+
+            if not tool_calls or tool_choice == "none":
+                return
+
+            ordered_calls = [tool_calls[index] for index in sorted(tool_calls)]
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content_parts) or None,
+                "tool_calls": ordered_calls
+            })
+
+            yield ToolCallsStarted([tool_call["function"]["name"] for tool_call in ordered_calls])
+
+            # As ferramentas são bloqueantes (requests): rodam no pool de ferramentas, fora do event loop
+            tool_messages = await asyncio.get_running_loop().run_in_executor(
+                None, self.llm._execute_tool_calls, ordered_calls, tool_deadline
+            )
+            messages.extend(tool_messages)
+            round_number += 1
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._first_chunk_latencies)
+        return {
+            **self._stats,
+            "request_deadline_seconds": self.request_deadline,
+            "hedge": self.hedge,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "first_chunk_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            "first_chunk_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None
+        }
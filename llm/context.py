@@ -0,0 +1,244 @@
+# =============================================================================
+# CONTEXTO DA LLM COM ORÇAMENTO DE TOKENS E RESUMO CONTÍNUO
+# =============================================================================
+#
+# Sem limite, cada turno mandava o histórico inteiro da sessão para a Azure:
+# tokens de prompt, custo e latência cresciam a cada troca. Aqui:
+# - os turnos mais recentes entram literalmente, até history_budget tokens;
+# - os turnos mais antigos viram um resumo contínuo, gerado em segundo plano
+#   (fora do caminho da requisição) e guardado nos metadados da sessão;
+# - enquanto o resumo não fica pronto, os turnos que não cabem no orçamento
+#   ficam de fora, então o tamanho do prompt por turno não cresce.
+#
+# A contagem usa o tiktoken (em requirements.txt; o vocabulário é baixado no
+# build da imagem); sem ele, uma estimativa por caracteres.
+# =============================================================================
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from inference.executors import BoundedExecutor, ExecutorSaturatedError
+
+# Tokens fixos por mensagem no formato de chat (papel + delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Caracteres por token na estimativa sem tiktoken
+CHARS_PER_TOKEN = 3.5
+
+SUMMARY_METADATA_KEY = "summary"
+
+
+class TokenCounter:
+    """Conta tokens com o tiktoken (se instalado) ou por estimativa."""
+
+    def __init__(self, encoding_name: str = "o200k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # tiktoken ausente ou sem acesso ao arquivo de vocabulário
+            self._encoding = None
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken:{self._encoding.name}" if self._encoding is not None else "estimativa"
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, int(len(text) / CHARS_PER_TOKEN + 0.5))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Corta o texto em no máximo max_tokens tokens."""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+        max_chars = int(max_tokens * CHARS_PER_TOKEN)
+        return text if len(text) <= max_chars else text[:max_chars]
+
+    def count_message(self, message: Dict) -> int:
+        return MESSAGE_OVERHEAD_TOKENS + self.count(message.get("content"))
+
+
+def _same_message(message: Dict, marker: Dict) -> bool:
+    return message.get("message_id") == marker.get("message_id") and message.get("timestamp") == marker.get("timestamp")
+
+
+class ContextBuilder:
+    """
+    Monta as mensagens de cada turno: prompt do sistema, resumo dos turnos
+    antigos, turnos recentes dentro do orçamento e a fala atual.
+    """
+
+    def __init__(self, conversation_manager, summarize: Optional[Callable[[Optional[str], List[Dict]], str]] = None,
+                 history_budget: int = 3000, min_recent_messages: int = 2, summarize_min_tokens: int = 500,
+                 token_counter: Optional[TokenCounter] = None):
+        """
+        Args:
+            conversation_manager: ConversationManager de onde vêm histórico e metadados
+            summarize: summarize(resumo_anterior, mensagens) -> novo resumo; None desativa os resumos
+            history_budget: Tokens para resumo + turnos recentes (sem contar o prompt do sistema e a fala atual)
+            min_recent_messages: Mensagens recentes mantidas mesmo acima do orçamento
+            summarize_min_tokens: Tokens fora da janela, ainda não resumidos, a partir dos quais um novo resumo é gerado
+        """
+        self.conversation_manager = conversation_manager
+        self.summarize = summarize
+        self.history_budget = history_budget
+        self.min_recent_messages = min_recent_messages
+        self.summarize_min_tokens = summarize_min_tokens
+        self.token_counter = token_counter or TokenCounter()
+
+        # Um resumo por vez; se a fila encher, o resumo fica para o próximo turno
+        self._executor = BoundedExecutor("summary", max_workers=1, max_queue=32)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._turns = 0
+        self._prompt_tokens_total = 0
+        self._prompt_tokens_max = 0
+        # Gauge por sessão: mensagens fora da janela ainda não resumidas no último turno
+        # (LRU, limitado ao tamanho do cache de sessões do ConversationManager)
+        self._unsummarized: "OrderedDict[str, int]" = OrderedDict()
+        self._unsummarized_max_sessions = getattr(getattr(conversation_manager, "sessions", None), "max_sessions", 1000)
+        self._summaries = 0
+        self._summary_failures = 0
+        self._summary_seconds = 0.0
+
+    def build(self, session_id: str, system_prompt: str, user_text: str) -> List[Dict]:
+        """Mensagens para a LLM; agenda um novo resumo se houver turnos antigos não resumidos."""
+        history = list(self.conversation_manager.get_conversation_messages(session_id)) if session_id else []
+        metadata = (self.conversation_manager.get_session_info(session_id) or {}) if session_id else {}
+        summary = metadata.get(SUMMARY_METADATA_KEY) or {}
+
+        window_start = self._recent_window_start(history, summary.get("text"))
+        covered_end = self._covered_end(history, summary.get("covered_until"))
+
+        # O prompt do sistema vem sozinho e primeiro: é o prefixo que a Azure reaproveita do
+        # cache entre turnos e sessões; tudo o que varia (resumo, histórico) vem depois
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary.get("text"):
+            messages.append({"role": "system", "content": f"Resumo da conversa até aqui:\n{summary['text']}"})
+        # Só papel e conteúdo: message_id e timestamp não interessam ao modelo e mudariam os bytes do prompt
+        messages.extend({"role": message["role"], "content": message.get("content")} for message in history[window_start:])
+        messages.append({"role": "user", "content": user_text})
+
+        # Turnos fora da janela que ainda não estão no resumo
+        unsummarized = history[covered_end:window_start]
+        prompt_tokens = sum(self.token_counter.count_message(message) for message in messages)
+        with self._lock:
+            self._turns += 1
+            self._prompt_tokens_total += prompt_tokens
+            self._prompt_tokens_max = max(self._prompt_tokens_max, prompt_tokens)
+            self._track_unsummarized(session_id, len(unsummarized))
+
+        if unsummarized and self.summarize is not None:
+            pending_tokens = sum(self.token_counter.count_message(message) for message in unsummarized)
+            if pending_tokens >= self.summarize_min_tokens:
+                self._schedule_summary(session_id, summary.get("text"), unsummarized)
+
+        return messages
+
+    def _track_unsummarized(self, session_id: Optional[str], count: int) -> None:
+        """Atualiza o gauge da sessão (chamado com self._lock)."""
+        if not session_id:
+            return
+        if not count:
+            self._unsummarized.pop(session_id, None)
+            return
+        self._unsummarized[session_id] = count
+        self._unsummarized.move_to_end(session_id)
+        while len(self._unsummarized) > self._unsummarized_max_sessions:
+            self._unsummarized.popitem(last=False)
+
+    def _recent_window_start(self, history: List[Dict], summary_text: Optional[str]) -> int:
+        """Índice da primeira mensagem que entra literalmente, contando de trás para a frente."""
+        budget = self.history_budget
+        if summary_text:
+            budget -= MESSAGE_OVERHEAD_TOKENS + self.token_counter.count(summary_text)
+
+        start = len(history)
+        used = 0
+        while start > 0:
+            cost = self.token_counter.count_message(history[start - 1])
+            if used + cost > budget and len(history) - start >= self.min_recent_messages:
+                break
+            used += cost
+            start -= 1
+
+        # Não começa a janela com uma resposta do assistente sem a pergunta correspondente
+        while start < len(history) and history[start].get("role") != "user" and len(history) - start > self.min_recent_messages:
+            start += 1
+        return start
+
+    def _covered_end(self, history: List[Dict], covered_until: Optional[Dict]) -> int:
+        """Índice logo após a última mensagem já incorporada ao resumo."""
+        if not covered_until:
+            return 0
+        for index in range(len(history) - 1, -1, -1):
+            if _same_message(history[index], covered_until):
+                return index + 1
+        # A mensagem marcada saiu do histórico (max_history): o resumo cobre tudo antes do que restou
+        return 0
+
+    def _schedule_summary(self, session_id: str, previous_summary: Optional[str], messages: List[Dict]) -> None:
+        with self._lock:
+            if session_id in self._in_flight:
+                return
+            self._in_flight.add(session_id)
+        try:
+            self._executor.submit(self._update_summary, session_id, previous_summary, messages)
+        except ExecutorSaturatedError:
+            with self._lock:
+                self._in_flight.discard(session_id)
+
+    def _update_summary(self, session_id: str, previous_summary: Optional[str], messages: List[Dict]) -> None:
+        started_at = time.perf_counter()
+        try:
+            text = (self.summarize(previous_summary, messages) or "").strip()
+            if not text:
+                return
+            last = messages[-1]
+            self.conversation_manager.update_session_metadata(session_id, {
+                SUMMARY_METADATA_KEY: {
+                    "text": text,
+                    "covered_until": {"message_id": last.get("message_id"), "timestamp": last.get("timestamp")},
+                    "tokens": self.token_counter.count(text),
+                    "updated_at": datetime.utcnow().isoformat()
+                }
+            })
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._summaries += 1
+                self._summary_seconds += elapsed
+            print(f"[CONTEXTO] 📝 Resumo da sessão {session_id} atualizado ({len(messages)} mensagens) em {elapsed:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._summary_failures += 1
+            print(f"[CONTEXTO] ⚠️ Erro ao resumir a sessão {session_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(session_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "tokenizer": self.token_counter.name,
+                "history_budget": self.history_budget,
+                "turns": self._turns,
+                "avg_prompt_tokens": round(self._prompt_tokens_total / self._turns, 1) if self._turns else None,
+                "max_prompt_tokens": self._prompt_tokens_max,
+                "messages_outside_window_unsummarized": sum(self._unsummarized.values()),
+                "sessions_with_unsummarized_messages": len(self._unsummarized),
+                "summaries": self._summaries,
+                "summary_failures": self._summary_failures,
+                "avg_summary_seconds": round(self._summary_seconds / self._summaries, 2) if self._summaries else None,
+                "summaries_in_flight": len(self._in_flight)
+            }
@@ -1,30 +1,65 @@
 from typing import Dict, List, Optional
 from datetime import datetime
-import json
-import os
-from collections import defaultdict
+
+from llm.session_cache import SessionCache
+from llm.storage import ConversationStorage, STORAGE_BACKENDS, StoredSession, create_storage
+
+# Modos de armazenamento (ver llm/storage.py):
+# - json: reescreve o arquivo JSON inteiro da sessão a cada mensagem
+# - jsonl: cada turno é uma linha acrescentada ao log da sessão, compactado em segundo plano
+# - sqlite: banco SQLite em modo WAL (storage_dir/conversations.db), com índices por sessão,
+#   conversa e última interação
+STORAGE_MODES = STORAGE_BACKENDS
 
 class ConversationManager:
-    def __init__(self, max_history: Optional[int] = None, storage_dir: str = "conversations"):
+    def __init__(self, max_history: Optional[int] = None, storage_dir: str = "conversations",
+                 storage_mode: str = "json", compact_interval: float = 60.0, compact_min_records: int = 20,
+                 fsync: bool = False, storage: Optional[ConversationStorage] = None,
+                 cache_max_sessions: int = 1000, cache_ttl_seconds: float = 1800.0):
         """
-        Inicializa o gerenciador de conversas com persistência JSON.
+        Inicializa o gerenciador de conversas com persistência em disco.
         
         Args:
             max_history: Número máximo de pares de mensagens (usuário + assistente) a manter no histórico.
                         Se None, mantém histórico ilimitado.
                         Por exemplo, max_history=10 manterá as últimas 20 mensagens (10 do usuário + 10 do assistente)
-            storage_dir: Diretório onde salvar os arquivos JSON de conversas
+            storage_dir: Diretório onde salvar os arquivos de conversas (ou o banco SQLite)
+            storage_mode: "json" (arquivo reescrito a cada mensagem), "jsonl" (log append-only + snapshot)
+                          ou "sqlite" (banco em modo WAL)
+            compact_interval: Intervalo em segundos entre as rodadas do compactador (modo jsonl)
+            compact_min_records: Linhas no log de uma sessão a partir das quais ela é compactada
+            fsync: Força a gravação em disco de cada linha do log (modo jsonl)
+            storage: Backend já construído; se informado, storage_mode e as opções acima são ignorados
+            cache_max_sessions: Sessões mantidas em memória (LRU); as demais são lidas do armazenamento no acesso
+            cache_ttl_seconds: Tempo ocioso após o qual uma sessão sai da memória (0 desativa a expiração)
         """
-        self.conversations: Dict[str, List[Dict]] = defaultdict(list)
+        if storage is None and storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Modo de armazenamento desconhecido: {storage_mode} (opções: {', '.join(STORAGE_MODES)})")
+        
         self.max_history = max_history
-        self.session_metadata: Dict[str, Dict] = {}
         self.storage_dir = storage_dir
         
-        # Criar diretório de armazenamento se não existir
-        os.makedirs(self.storage_dir, exist_ok=True)
+        max_messages = max_history * 2 if max_history is not None else None
+        if storage is not None:
+            storage_mode = getattr(storage, "mode", storage.name)
+        elif storage_mode == "sqlite":
+            storage = create_storage("sqlite", storage_dir, max_messages=max_messages)
+        else:
+            storage = create_storage(storage_mode, storage_dir, compact_interval=compact_interval,
+                                     compact_min_records=compact_min_records, fsync=fsync,
+                                     max_messages=max_messages)
+        self.storage = storage
+        self.storage_mode = storage_mode
         
-        # Carregar conversas existentes
-        self._load_conversations()
+        # Nada é carregado na inicialização: cada sessão é lida do armazenamento
+        # no primeiro acesso e fica em memória enquanto estiver ativa
+        self.sessions = SessionCache(
+            self._load_session,
+            max_sessions=cache_max_sessions,
+            ttl_seconds=cache_ttl_seconds,
+            on_evict=self._flush_session
+        )
+        self.sessions.start()
 
     def add_message(self, context: Dict, user_message: str, assistant_message: Optional[str] = None) -> List[Dict]:
         """
@@ -37,8 +72,9 @@ class ConversationManager:
         timestamp = context.get('timestamp', datetime.utcnow().isoformat())
 
         # Atualiza ou cria metadados da sessão
-        if session_id not in self.session_metadata:
-            self.session_metadata[session_id] = {
+        session = self.sessions.get(session_id)
+        if session is None:
+            messages, metadata = [], {
                 'conversation_id': context.get('conversation_id'),
                 'timezone': context.get('timezone'),
                 'locale': context.get('locale'),
@@ -48,59 +84,104 @@ class ConversationManager:
                 'created_at': timestamp,
                 'last_interaction': timestamp
             }
-        else:
-            self.session_metadata[session_id]['last_interaction'] = timestamp
+            # Put-if-absent: se outra requisição criou a sessão entre o get() e aqui,
+            # usa a dela (mesma lista) em vez de substituí-la e perder o turno
+            session = self.sessions.setdefault(session_id, messages, metadata)
+        messages, metadata = session
+        metadata['last_interaction'] = timestamp
 
         # Adiciona mensagem do usuário
-        self.conversations[session_id].append({
+        new_messages = [{
             'role': 'user',
             'content': user_message,
             'message_id': message_id,
             'timestamp': timestamp
-        })
+        }]
 
         # Adiciona resposta do assistente se houver
         if assistant_message:
-            self.conversations[session_id].append({
+            new_messages.append({
                 'role': 'assistant',
                 'content': assistant_message,
                 'message_id': f"response-{message_id}",
                 'timestamp': datetime.utcnow().isoformat()
             })
+        messages.extend(new_messages)
 
         # Mantém apenas o número máximo de mensagens definido se max_history não for None
-        if self.max_history is not None and len(self.conversations[session_id]) > self.max_history * 2:  # * 2 para contar pares de mensagens
-            self.conversations[session_id] = self.conversations[session_id][-self.max_history * 2:]
+        self._trim_history(messages)
+        self.sessions.touch(session_id)
 
         # Salvar automaticamente após adicionar mensagem
-        self._save_conversation(session_id)
+        self.storage.save_turn(session_id, new_messages, messages, metadata)
+
+        return messages
 
-        return self.get_conversation_messages(session_id)
+    def _trim_history(self, messages: List[Dict]) -> None:
+        # No lugar: a lista é a mesma que está no cache de sessões
+        if self.max_history is not None and len(messages) > self.max_history * 2:  # * 2 para contar pares de mensagens
+            del messages[:-self.max_history * 2]
+
+    def _load_session(self, session_id: str) -> Optional[StoredSession]:
+        """Lê uma sessão do armazenamento (chamado pelo cache no primeiro acesso)."""
+        try:
+            stored = self.storage.load_session(session_id)
+        except Exception as e:
+            print(f"[DEBUG] ⚠️  Erro ao carregar conversa {session_id}: {str(e)}")
+            return None
+        if stored is not None:
+            self._trim_history(stored[0])
+            print(f"[DEBUG] ✅ Conversa carregada: {session_id} ({len(stored[0])} mensagens)")
+        return stored
+
+    def _flush_session(self, session_id: str) -> None:
+        """Ao sair da memória por inatividade, incorpora o log pendente da sessão (modo jsonl)."""
+        self.storage.compact(session_id, force=True)
 
     def get_conversation_messages(self, session_id: str) -> List[Dict]:
         """
         Retorna as mensagens da conversa em formato adequado para a LLM.
         O número de mensagens é automaticamente limitado pelo max_history.
         """
-        return self.conversations.get(session_id, [])
+        session = self.sessions.get(session_id) if session_id else None
+        return session[0] if session is not None else []
 
     def get_session_info(self, session_id: str) -> Optional[Dict]:
         """Retorna informações sobre a sessão."""
-        return self.session_metadata.get(session_id)
+        session = self.sessions.get(session_id) if session_id else None
+        return session[1] if session is not None else None
+
+    def update_session_metadata(self, session_id: str, updates: Dict) -> bool:
+        """Atualiza metadados de uma sessão existente (ex.: resumo da conversa) e grava no armazenamento."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        messages, metadata = session
+        metadata.update(updates)
+        self.storage.save_turn(session_id, [], messages, metadata)
+        return True
+
+    def active_sessions(self) -> List[str]:
+        """Sessões atualmente em memória (as demais continuam no armazenamento)."""
+        return self.sessions.keys()
+
+    def list_sessions(self) -> List[str]:
+        """Todas as sessões salvas no armazenamento."""
+        return self.storage.list_sessions()
 
     def clear_conversation(self, session_id: str) -> bool:
         """Limpa o histórico de uma conversa específica."""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-            # Remover arquivo JSON também
-            self._delete_conversation_file(session_id)
+        if self.sessions.get(session_id) is not None:
+            self.sessions.discard(session_id)
+            # Remover do armazenamento também
+            self.storage.delete_session(session_id)
             return True
         return False
 
     def get_conversation_summary(self, session_id: str) -> Dict:
         """Retorna um resumo da conversa."""
-        messages = self.conversations.get(session_id, [])
-        metadata = self.session_metadata.get(session_id, {})
+        messages = self.get_conversation_messages(session_id)
+        metadata = self.get_session_info(session_id) or {}
         
         return {
             'session_id': session_id,
@@ -110,66 +191,24 @@ class ConversationManager:
             'metadata': metadata
         }
     
-    def _get_conversation_file_path(self, session_id: str) -> str:
-        """Retorna o caminho do arquivo JSON para uma sessão."""
-        # Sanitizar o session_id para usar como nome de arquivo
-        safe_session_id = "".join(c for c in session_id if c.isalnum() or c in ('-', '_'))
-        return os.path.join(self.storage_dir, f"{safe_session_id}.json")
+    def find_sessions(self, conversation_id: Optional[str] = None, active_since: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Dict]:
+        """Sessões de uma conversa e/ou ativas desde active_since (ISO 8601), consultadas no armazenamento."""
+        return self.storage.find_sessions(conversation_id=conversation_id, active_since=active_since, limit=limit)
     
-    def _save_conversation(self, session_id: str) -> None:
-        """Salva uma conversa em arquivo JSON."""
-        try:
-            file_path = self._get_conversation_file_path(session_id)
-            conversation_data = {
-                'session_id': session_id,
-                'messages': self.conversations[session_id],
-                'metadata': self.session_metadata.get(session_id, {})
-            }
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(conversation_data, f, ensure_ascii=False, indent=2)
-                
-            print(f"[DEBUG] ✅ Conversa salva em: {file_path}")
-            
-        except Exception as e:
-            print(f"[DEBUG] ⚠️  Erro ao salvar conversa {session_id}: {str(e)}")
+    def compact(self, session_id: Optional[str] = None, force: bool = False) -> int:
+        """Compacta os logs pendentes (modo jsonl); retorna quantas sessões foram compactadas."""
+        return self.storage.compact(session_id, force)
     
-    def _load_conversations(self) -> None:
-        """Carrega todas as conversas dos arquivos JSON."""
-        try:
-            if not os.path.exists(self.storage_dir):
-                print(f"[DEBUG] Diretório de conversas não encontrado: {self.storage_dir}")
-                return
-            
-            loaded_count = 0
-            for filename in os.listdir(self.storage_dir):
-                if filename.endswith('.json'):
-                    try:
-                        file_path = os.path.join(self.storage_dir, filename)
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            conversation_data = json.load(f)
-                        
-                        session_id = conversation_data.get('session_id')
-                        if session_id:
-                            self.conversations[session_id] = conversation_data.get('messages', [])
-                            self.session_metadata[session_id] = conversation_data.get('metadata', {})
-                            loaded_count += 1
-                            print(f"[DEBUG] ✅ Conversa carregada: {session_id} ({len(self.conversations[session_id])} mensagens)")
-                    
-                    except Exception as e:
-                        print(f"[DEBUG] ⚠️  Erro ao carregar arquivo {filename}: {str(e)}")
-            
-            print(f"[DEBUG] 📁 Total de conversas carregadas: {loaded_count}")
-            
-        except Exception as e:
-            print(f"[DEBUG] ⚠️  Erro ao carregar conversas: {str(e)}")
+    def close(self) -> None:
+        """Grava o que estiver pendente e fecha o armazenamento (chamar no desligamento)."""
+        self.sessions.close()
+        self.storage.close()
     
-    def _delete_conversation_file(self, session_id: str) -> None:
-        """Remove o arquivo JSON de uma conversa."""
-        try:
-            file_path = self._get_conversation_file_path(session_id)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"[DEBUG] ✅ Arquivo de conversa removido: {file_path}")
-        except Exception as e:
-            print(f"[DEBUG] ⚠️  Erro ao remover arquivo da conversa {session_id}: {str(e)}") 
\ No newline at end of file
+    def storage_stats(self) -> Dict:
+        """Estado do armazenamento, para o /health e os endpoints de debug."""
+        return {"mode": self.storage_mode, **self.storage.stats()}
+    
+    def cache_stats(self) -> Dict:
+        """Acertos, tamanho residente e remoções do cache de sessões."""
+        return self.sessions.stats()
@@ -1,12 +1,16 @@
 import os
 import json
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Iterator, Optional, Union
 from textwrap import dedent
 from openai import AzureOpenAI
 from dotenv import load_dotenv
 from .prompt.prompt import system_prompt
+from .pages import PageReader
+from .search import SearchService, resolve_result_link
+from .prompt_cache import PromptCacheStats, canonical_tools, normalize_prompt, prefix_fingerprint
 load_dotenv()
 
 endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -14,58 +18,66 @@ api_version = "2025-04-01-preview"
 deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_ID")
 api_key = os.getenv("AZURE_OPENAI_API_KEY")
 
+# Prazo e novas tentativas explícitos: sem eles uma completion travada segura a thread pelo padrão do SDK
 client = AzureOpenAI(
     azure_endpoint=endpoint,
     api_key=api_key,
-    api_version=api_version
+    api_version=api_version,
+    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", 30)),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", 2))
+)
+
+# Sessão HTTP persistente, cache com TTL e parser mais rápido disponível (ver llm/search.py)
+search_service = SearchService(
+    timeout=float(os.getenv("SEARCH_TIMEOUT_SECONDS", 10)),
+    cache_ttl=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", 900)),
+    cache_max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 512)),
+    pool_size=int(os.getenv("SEARCH_POOL_SIZE", 8)),
+    parser=os.getenv("SEARCH_HTML_PARSER") or None
 )
 
 def search_web_duckduckgo(query: str, max_results: int = 5) -> List[Dict[str, str]]:
-    
-    url = 'https://html.duckduckgo.com/html/'
-    params = {'q': query}
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    
-    response = requests.post(url, data=params, headers=headers, timeout=10)
-    response.raise_for_status()  # Levanta erro em caso de status != 200
-    
-    soup = BeautifulSoup(response.text, 'html.parser')
-    resultados = []
-    
-    blocos = soup.find_all('div', class_='result')
-    
-    for bloco in blocos:
-        link_tag = bloco.find('a', class_='result__a')
-        if not link_tag:
-            continue
-        
-        titulo = link_tag.get_text(strip=True)
-        link = link_tag['href']
-        
-        resultados.append({'titulo': titulo, 'link': link})
-        
-        if len(resultados) >= max_results:
-            break
-    
-    return resultados
+    return search_service.search(query, max_results)
+
+# Leitura das páginas em streaming, com limite de bytes e orçamento de tokens por página (ver llm/pages.py)
+page_reader = PageReader(
+    max_bytes=int(os.getenv("PAGE_MAX_BYTES", 512 * 1024)),
+    page_token_budget=int(os.getenv("PAGE_TOKEN_BUDGET", 800)),
+    timeout=float(os.getenv("PAGE_TIMEOUT_SECONDS", 6)),
+    max_workers=int(os.getenv("PAGE_READER_WORKERS", 8))
+)
+
+MAX_PAGES_PER_CALL = 5
+
+# Prazo (time.monotonic()) da ferramenta em execução na thread atual, definido por
+# LLM._execute_tool_call a partir de tool_timeout; ferramentas lentas terminam antes dele
+_tool_context = threading.local()
+
+def current_tool_deadline() -> Optional[float]:
+    return getattr(_tool_context, "deadline", None)
+
+def read_web_pages(query: Optional[str] = None, urls: Optional[List[str]] = None, top_k: int = 3) -> List[Dict]:
+    """Lê em paralelo as páginas informadas ou, com query, as dos primeiros resultados da busca."""
+    top_k = max(1, min(int(top_k), MAX_PAGES_PER_CALL))
+    titles = {}
+    if not urls:
+        if not query:
+            return [{"erro": "Informe query ou urls"}]
+        results = search_service.search(query, top_k)
+        urls = [result['link'] for result in results]
+        titles = {resolve_result_link(result['link']): result['titulo'] for result in results}
+    targets = [resolve_result_link(url) for url in urls[:top_k]]
+    pages = page_reader.read_many(targets, deadline=current_tool_deadline())
+    for page in pages:
+        if not page.get('titulo') and page['link'] in titles:
+            page['titulo'] = titles[page['link']]
+    return pages
 
 def extrair_conteudo_pagina(url: str) -> str:
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        for tag in soup(['script', 'style', 'noscript', 'header', 'footer', 'form', 'nav']):
-            tag.decompose()
-        
-        texto = soup.get_text(separator='\n')
-        texto_limpo = '\n'.join([linha.strip() for linha in texto.splitlines() if linha.strip()])
-        return texto_limpo
-    
-    except Exception as e:
-        return f"[ERRO AO ACEDER]: {e}"
+    page = page_reader.read(resolve_result_link(url))
+    if 'erro' in page:
+        return f"[ERRO AO ACEDER]: {page['erro']}"
+    return page['conteudo']
 
 tools_config = [
     {
@@ -82,72 +94,301 @@ tools_config = [
                 "required": ["query"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_web_pages",
+            "description": "Lê o texto das páginas dos primeiros resultados de uma pesquisa (ou de URLs já conhecidas) para responder com base no conteúdo delas. Use quando os títulos dos resultados não bastam.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Termo ou pergunta para pesquisar; as páginas dos primeiros resultados são lidas."},
+                    "urls": {"type": "array", "items": {"type": "string"}, "description": "URLs a ler diretamente, em vez de pesquisar."},
+                    "top_k": {"type": "integer", "description": "Número de páginas a ler (padrão: 3, máximo: 5)"}
+                }
+            }
+        }
     }
 ]
 
 tools_functions = {
-    "search_web_duckduckgo": search_web_duckduckgo
+    "search_web_duckduckgo": search_web_duckduckgo,
+    "read_web_pages": read_web_pages
 }
 
+class ToolCallsStarted:
+    """
+    Evento produzido por LLM.run_stream() logo antes de executar tool_calls,
+    para que o consumidor possa mascarar a espera (ex.: tocar um áudio de espera).
+    """
+    def __init__(self, tool_names: List[str]):
+        self.tool_names = tool_names
+
+SUMMARY_PROMPT = dedent("""
+    Você resume conversas entre um usuário e um assistente de voz.
+    Atualize o resumo anterior (se houver) com os novos turnos, em português,
+    em no máximo um parágrafo curto. Mantenha nomes, preferências, datas,
+    pedidos em aberto e fatos que o assistente precise lembrar; descarte
+    cumprimentos e detalhes irrelevantes. Responda apenas com o resumo.
+""").strip()
+
 class LLM:
-    def __init__(self, client, tools_config, tools_functions):
+    def __init__(self, client, tools_config, tools_functions, tool_timeout: float = 10.0, tool_budget: float = 20.0,
+                 max_tool_rounds: int = 3, max_tool_workers: int = 8):
+        """
+        Args:
+            tool_timeout: Segundos que cada ferramenta tem para responder
+            tool_budget: Segundos para todas as rodadas de ferramentas de uma resposta
+            max_tool_rounds: Rodadas de tool_calls por resposta; depois o modelo precisa responder em texto
+            max_tool_workers: Ferramentas executadas ao mesmo tempo (compartilhado entre requisições)
+        """
         self.client = client
-        self.tools_config = tools_config
+        # Ordem fixa do schema: o prefixo (ferramentas + prompt do sistema) fica idêntico entre turnos e sessões
+        self.tools_config = canonical_tools(tools_config)
         self.tools_functions = tools_functions
+        self.prompt_cache = PromptCacheStats()
+        self.prompt_cache.fingerprint = prefix_fingerprint(get_unified_system_prompt(), self.tools_config)
+        self.tool_timeout = tool_timeout
+        self.tool_budget = tool_budget
+        self.max_tool_rounds = max_tool_rounds
+        self._tool_pool = ThreadPoolExecutor(max_workers=max_tool_workers, thread_name_prefix="llm-tool")
+        self._tool_stats_lock = threading.Lock()
+        self._tool_stats = {"calls": 0, "rounds": 0, "timeouts": 0, "errors": 0, "forced_final_answers": 0}
 
-    def run(self, messages):
+    def _record_usage(self, kind: str, usage) -> None:
+        cached_tokens = self.prompt_cache.record(kind, usage)
+        if cached_tokens is not None:
+            print(f"[LLM] 🧮 {kind}: {usage.prompt_tokens} tokens de prompt, {cached_tokens} do cache")
+
+    def summarize(self, previous_summary: Optional[str], messages: List[Dict], max_tokens: int = 300) -> str:
+        """Incorpora os turnos em messages ao resumo anterior da conversa (sem ferramentas)."""
+        transcript = "\n".join(
+            f"{'Usuário' if message['role'] == 'user' else 'Assistente'}: {message.get('content') or ''}"
+            for message in messages
+            if message.get('role') in ('user', 'assistant')
+        )
         response = self.client.chat.completions.create(
             model=deployment_name,
-            messages=messages,
-            tools=self.tools_config,
-            tool_choice="auto"
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Resumo anterior:\n{previous_summary or '(nenhum)'}\n\nNovos turnos:\n{transcript}"}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.2
         )
+        self._record_usage("summary", response.usage)
+        return response.choices[0].message.content or ""
+
+    def _execute_tool_call(self, tool_call_id: str, func_name: str, arguments: str, deadline: Optional[float] = None) -> Dict:
+        """Executa uma tool_call e retorna a mensagem 'tool' com o resultado."""
+        if func_name in self.tools_functions:
+            try:
+                args = json.loads(arguments or "{}")
+                _tool_context.deadline = deadline
+                try:
+                    result = self.tools_functions[func_name](**args)
+                finally:
+                    _tool_context.deadline = None
+                
+                # Adiciona o resultado da ferramenta
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": json.dumps(result, ensure_ascii=False)
+                }
+            except Exception as e:
+                with self._tool_stats_lock:
+                    self._tool_stats["errors"] += 1
+                return {
+                    "role": "tool",
+                    "tool_call_id": tool_call_id,
+                    "content": json.dumps({"erro": f"Erro ao executar {func_name}: {str(e)}"}, ensure_ascii=False)
+                }
+        with self._tool_stats_lock:
+            self._tool_stats["errors"] += 1
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "content": json.dumps({"erro": f"Ferramenta desconhecida: {func_name}"}, ensure_ascii=False)
+        }
+
+    def _execute_tool_calls(self, tool_calls: List[Dict], deadline: float) -> List[Dict]:
+        """
+        Executa as tool_calls de uma rodada em paralelo. Cada uma tem até
+        tool_timeout segundos (limitado pelo que resta do orçamento da resposta);
+        as que não terminam a tempo viram uma mensagem de erro para o modelo.
+        Retorna as mensagens 'tool' na mesma ordem das tool_calls.
+        """
+        timeout = max(0.0, min(self.tool_timeout, deadline - time.monotonic()))
+        started_at = time.perf_counter()
+        call_deadline = time.monotonic() + timeout
+        futures = [
+            self._tool_pool.submit(
+                self._execute_tool_call,
+                tool_call["id"],
+                tool_call["function"]["name"],
+                tool_call["function"]["arguments"],
+                call_deadline
+            )
+            for tool_call in tool_calls
+        ]
+        done, _ = wait(futures, timeout=timeout)
+
+        results = []
+        timed_out = 0
+        for tool_call, future in zip(tool_calls, futures):
+            if future in done:
+                results.append(future.result())
+                continue
+            # A thread não pode ser interrompida: o resultado tardio é descartado
+            future.cancel()
+            timed_out += 1
+            results.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "content": json.dumps(
+                    {"erro": f"Tempo esgotado ao executar {tool_call['function']['name']} ({timeout:.1f}s)"},
+                    ensure_ascii=False
+                )
+            })
+
+        with self._tool_stats_lock:
+            self._tool_stats["calls"] += len(tool_calls)
+            self._tool_stats["timeouts"] += timed_out
+            self._tool_stats["rounds"] += 1
+        names = ", ".join(tool_call["function"]["name"] for tool_call in tool_calls)
+        print(f"[LLM] 🔧 {len(tool_calls)} ferramenta(s) em {time.perf_counter() - started_at:.2f}s ({names})"
+              + (f", {timed_out} sem resposta a tempo" if timed_out else ""))
+        return results
 
-        message = response.choices[0].message
+    def _tool_choice(self, round_number: int, deadline: float) -> str:
+        """"auto" enquanto houver rodadas e orçamento; depois "none" força a resposta final em texto."""
+        if round_number < self.max_tool_rounds and time.monotonic() < deadline:
+            return "auto"
+        with self._tool_stats_lock:
+            self._tool_stats["forced_final_answers"] += 1
+        return "none"
 
-        if message.tool_calls:
-            # Adiciona a resposta do assistente com as tool_calls
+    def run(self, messages):
+        # Laço iterativo: no máximo max_tool_rounds rodadas de ferramentas por resposta
+        deadline = time.monotonic() + self.tool_budget
+        round_number = 0
+        while True:
+            tool_choice = self._tool_choice(round_number, deadline)
+            # As ferramentas vão sempre no pedido (mesmo com "none") para não mudar o prefixo em cache
+            response = self.client.chat.completions.create(
+                model=deployment_name,
+                messages=messages,
+                tools=self.tools_config,
+                tool_choice=tool_choice
+            )
+            self._record_usage("chat", response.usage)
+
+            message = response.choices[0].message
+
+            if not message.tool_calls or tool_choice == "none":
+                return message.content
+
+            tool_calls = [
+                {
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments}
+                }
+                for tool_call in message.tool_calls
+            ]
+            # Adiciona a resposta do assistente com as tool_calls e os resultados
             messages.append({
                 "role": "assistant",
                 "content": message.content,
-                "tool_calls": message.tool_calls
+                "tool_calls": tool_calls
             })
-            
-            # Executa cada tool_call
-            for tool_call in message.tool_calls:
-                func_name = tool_call.function.name
-                if func_name in self.tools_functions:
-                    try:
-                        args = json.loads(tool_call.function.arguments)
-                        result = self.tools_functions[func_name](**args)
-                        
-                        # Adiciona o resultado da ferramenta
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": json.dumps(result, ensure_ascii=False)
-                        })
-                    except Exception as e:
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": json.dumps({"erro": f"Erro ao executar {func_name}: {str(e)}"}, ensure_ascii=False)
-                        })
-                else:
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps({"erro": f"Ferramenta desconhecida: {func_name}"}, ensure_ascii=False)
+            messages.extend(self._execute_tool_calls(tool_calls, deadline))
+            round_number += 1
+
+    def run_stream(self, messages) -> Iterator[Union[str, ToolCallsStarted]]:
+        """
+        Versão em streaming de run(): produz os fragmentos de texto da resposta
+        à medida que chegam da Azure OpenAI (stream=True).
+        
+        Quando o modelo pede tool_calls, os fragmentos dos argumentos são
+        acumulados, um evento ToolCallsStarted é produzido, as ferramentas são
+        executadas em paralelo e a conversa continua em streaming com uma nova
+        chamada, com os mesmos limites de rodadas e de tempo de run().
+        """
+        deadline = time.monotonic() + self.tool_budget
+        round_number = 0
+        while True:
+            tool_choice = self._tool_choice(round_number, deadline)
+            stream = self.client.chat.completions.create(
+                model=deployment_name,
+                messages=messages,
+                tools=self.tools_config,
+                tool_choice=tool_choice,
+                stream=True,
+                # O último chunk traz o usage (com os cached_tokens) e nenhuma choice
+                stream_options={"include_usage": True}
+            )
+
+            content_parts = []
+            tool_calls: Dict[int, Dict] = {}
+
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self._record_usage("stream", chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+
+                if delta.content:
+                    content_parts.append(delta.content)
+                    yield delta.content
+
+                # Os argumentos das tool_calls chegam fragmentados, indexados por posição
+                for tool_call_delta in delta.tool_calls or []:
+                    entry = tool_calls.setdefault(tool_call_delta.index, {
+                        "id": None,
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""}
                     })
-            
-            # Chama novamente para obter a resposta final
-            return self.run(messages)
-        else:
-            return message.content
+                    if tool_call_delta.id:
+                        entry["id"] = tool_call_delta.id
+                    if tool_call_delta.function:
+                        if tool_call_delta.function.name:
+                            entry["function"]["name"] += tool_call_delta.function.name
+                        if tool_call_delta.function.arguments:
+                            entry["function"]["arguments"] += tool_call_delta.function.arguments
+
+            if not tool_calls or tool_choice == "none":
+                return
+
+            ordered_calls = [tool_calls[index] for index in sorted(tool_calls)]
+            messages.append({
+                "role": "assistant",
+                "content": "".join(content_parts) or None,
+                "tool_calls": ordered_calls
+            })
+
+            yield ToolCallsStarted([tool_call["function"]["name"] for tool_call in ordered_calls])
+
+            messages.extend(self._execute_tool_calls(ordered_calls, deadline))
+            round_number += 1
+
+    def tool_stats(self) -> Dict:
+        """Execução das ferramentas, para o /health."""
+        with self._tool_stats_lock:
+            return {
+                "tool_timeout_seconds": self.tool_timeout,
+                "tool_budget_seconds": self.tool_budget,
+                "max_tool_rounds": self.max_tool_rounds,
+                **self._tool_stats
+            }
 
 def get_unified_system_prompt() -> str:
+    # Sem dados variáveis (data, sessão): o texto precisa ser o mesmo em todas as requisições
     system = system_prompt()
-    return dedent(system).strip()
+    return normalize_prompt(dedent(system))
 
 def main():
     llm = LLM(client, tools_config, tools_functions)
@@ -0,0 +1,315 @@
+# =============================================================================
+# LEITURA DE PÁGINAS PARA EMBASAR AS RESPOSTAS
+# =============================================================================
+#
+# extrair_conteudo_pagina baixava a página inteira e montava o DOM completo
+# com BeautifulSoup antes de extrair o texto, sem limite de tamanho. Aqui:
+# - as páginas dos primeiros resultados são baixadas em paralelo;
+# - o corpo chega em streaming e a leitura para num limite rígido de bytes;
+# - o texto legível é extraído incrementalmente (html.parser da biblioteca
+#   padrão, sem montar árvore), pulando script/style/nav/etc., e a leitura
+#   também para assim que já há texto suficiente;
+# - o texto de cada página é cortado num orçamento de tokens antes de voltar
+#   para as mensagens da LLM;
+# - as URLs vêm do modelo (e, indiretamente, de páginas de terceiros): só
+#   http/https para endereços públicos são lidas, conferindo cada redirecionamento,
+#   para que um resultado malicioso não faça o servidor ler a rede interna
+#   (loopback, RFC1918, link-local/metadados, rede privada do Fly). A conexão
+#   é aberta no próprio IP conferido (sem segunda resolução de DNS), então um
+#   host com DNS rebinding não passa na checagem e conecta noutro endereço.
+# =============================================================================
+
+import codecs
+import ipaddress
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection as urllib3_connection
+
+from llm.context import CHARS_PER_TOKEN, TokenCounter
+
+# Conteúdo que não é texto legível da página
+SKIPPED_TAGS = {"script", "style", "noscript", "header", "footer", "form", "nav", "svg", "iframe", "template", "aside"}
+# Tags que quebram linha no texto extraído
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "table",
+    "section", "article", "blockquote", "pre", "dd", "dt", "main"
+}
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+ALLOWED_SCHEMES = ("http", "https")
+MAX_REDIRECTS = 5
+# Folga entre o fim das leituras e o prazo de quem chamou (o timeout da ferramenta na LLM)
+DEADLINE_MARGIN_SECONDS = 0.5
+
+
+class BlockedURLError(ValueError):
+    """URL fora do que o leitor de páginas aceita buscar (esquema ou endereço não público)."""
+
+
+def public_addresses(host: str, port: int) -> List[str]:
+    """IPs do host, levantando BlockedURLError se algum deles não for público."""
+    try:
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError, ValueError) as e:
+        raise BlockedURLError(f"host inválido ({host}): {e}")
+    resolved = []
+    for address in addresses:
+        ip = ipaddress.ip_address(address[4][0].split("%")[0])
+        checked = ip.ipv4_mapped if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None else ip
+        # is_global exclui loopback, privados (RFC1918, fc00::/7), link-local (169.254/16) e CGNAT
+        if not checked.is_global or checked.is_multicast:
+            raise BlockedURLError(f"endereço não público ({host} -> {checked})")
+        if str(ip) not in resolved:
+            resolved.append(str(ip))
+    return resolved
+
+
+def check_public_url(url: str) -> None:
+    """Levanta BlockedURLError se a URL não for http/https ou se o host resolver para um endereço não público."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ALLOWED_SCHEMES:
+        raise BlockedURLError(f"esquema não permitido ({parsed.scheme or 'nenhum'})")
+    if not parsed.hostname:
+        raise BlockedURLError("URL sem host")
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    except ValueError as e:
+        raise BlockedURLError(f"porta inválida: {e}")
+    public_addresses(parsed.hostname, port)
+
+
+class _PublicAddressConnectionMixin:
+    """Resolve o host uma única vez, confere os IPs e conecta num deles (o TLS continua usando o nome do host)."""
+
+    def _new_conn(self) -> socket.socket:
+        last_error: Optional[OSError] = None
+        for ip in public_addresses(self._dns_host, self.port):
+            try:
+                return urllib3_connection.create_connection(
+                    (ip, self.port), self.timeout, source_address=self.source_address, socket_options=self.socket_options
+                )
+            except OSError as e:
+                last_error = e
+        if isinstance(last_error, socket.timeout):
+            raise ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})")
+        raise NewConnectionError(self, f"Failed to establish a new connection: {last_error}")
+
+
+class _PublicHTTPConnection(_PublicAddressConnectionMixin, HTTPConnection):
+    pass
+
+
+class _PublicHTTPSConnection(_PublicAddressConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PublicHTTPConnection
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class PublicAddressAdapter(HTTPAdapter):
+    """HTTPAdapter cujas conexões só abrem para endereços públicos, conferidos no momento da conexão."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _PublicHTTPConnectionPool, "https": _PublicHTTPSConnectionPool}
+
+
+class ReadableTextExtractor(HTMLParser):
+    """Extrai o texto legível de HTML recebido em pedaços, até max_chars caracteres."""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = ""
+        self._parts: List[str] = []
+        self._chars = 0
+        self._skip_depth = 0
+        self._in_title = False
+
+    @property
+    def full(self) -> bool:
+        return self._chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth or self.full or not data.strip():
+            return
+        self._parts.append(data)
+        self._chars += len(data)
+
+    def text(self) -> str:
+        lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(self._parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+class PageReader:
+    """Baixa páginas em paralelo com limite de bytes e devolve o texto dentro de um orçamento de tokens."""
+
+    def __init__(self, max_bytes: int = 512 * 1024, page_token_budget: int = 800, timeout: float = 6.0,
+                 max_workers: int = 8, token_counter: Optional[TokenCounter] = None, allow_private: bool = False):
+        self.max_bytes = max_bytes
+        self.page_token_budget = page_token_budget
+        self.timeout = timeout
+        # Só para servidores locais de teste/benchmark: desliga a checagem de endereço público
+        self.allow_private = allow_private
+        self.token_counter = token_counter or TokenCounter()
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        # Proxies do ambiente abririam a conexão fora do PublicAddressAdapter
+        self.session.trust_env = allow_private
+        adapter_class = HTTPAdapter if allow_private else PublicAddressAdapter
+        adapter = adapter_class(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-reader")
+
+        self._lock = threading.Lock()
+        self._pages = 0
+        self._errors = 0
+        self._blocked = 0
+        self._byte_capped = 0
+        self._bytes_read = 0
+        self._seconds = 0.0
+
+    def read(self, url: str, deadline: Optional[float] = None) -> Dict:
+        """
+        Texto legível de uma página: {'link', 'titulo', 'conteudo', 'truncado'} ou {'link', 'erro'}.
+        Com deadline (time.monotonic()), a leitura para ali e fica com o texto que já chegou.
+        """
+        started_at = time.perf_counter()
+        bytes_read = 0
+        byte_capped = False
+        try:
+            # Folga de caracteres sobre o orçamento: o corte exato em tokens é feito no fim
+            extractor = ReadableTextExtractor(max_chars=int(self.page_token_budget * CHARS_PER_TOKEN * 1.5))
+            with self._open(url, deadline) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "text/html").split(";")[0].strip().lower()
+                if content_type not in TEXT_CONTENT_TYPES:
+                    raise ValueError(f"conteúdo não textual ({content_type})")
+
+                # Sem charset no cabeçalho o requests assume ISO-8859-1; para HTML, UTF-8 acerta mais
+                charset = response.encoding if "charset" in response.headers.get("Content-Type", "").lower() else "utf-8"
+                decoder = codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+                for chunk in response.iter_content(chunk_size=16 * 1024):
+                    bytes_read += len(chunk)
+                    text = decoder.decode(chunk)
+                    if content_type == "text/plain":
+                        extractor.handle_data(text)
+                    else:
+                        extractor.feed(text)
+                    if extractor.full:
+                        break
+                    if bytes_read >= self.max_bytes or (deadline is not None and time.monotonic() >= deadline):
+                        byte_capped = True
+                        break
+
+            text = extractor.text()
+            limited = self.token_counter.truncate(text, self.page_token_budget)
+            with self._lock:
+                self._pages += 1
+                self._byte_capped += int(byte_capped)
+            return {
+                'link': url,
+                'titulo': extractor.title.strip(),
+                'conteudo': limited,
+                'truncado': byte_capped or extractor.full or len(limited) < len(text)
+            }
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+                self._blocked += int(isinstance(e, BlockedURLError))
+            return {'link': url, 'erro': f"Não foi possível ler a página: {str(e)}"}
+        finally:
+            with self._lock:
+                self._bytes_read += bytes_read
+                self._seconds += time.perf_counter() - started_at
+
+    def _open(self, url: str, deadline: Optional[float] = None) -> requests.Response:
+        """GET em streaming seguindo os redirecionamentos manualmente, conferindo o destino de cada um."""
+        for _ in range(MAX_REDIRECTS + 1):
+            if not self.allow_private:
+                check_public_url(url)
+            timeout = self.timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    raise TimeoutError("prazo esgotado antes de conectar")
+            response = self.session.get(url, stream=True, timeout=timeout, allow_redirects=False)
+            if not response.is_redirect:
+                return response
+            response.close()
+            url = urljoin(url, response.headers["Location"])
+        raise ValueError(f"mais de {MAX_REDIRECTS} redirecionamentos")
+
+    def read_many(self, urls: List[str], deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Lê as páginas em paralelo, na ordem recebida; as que não terminam no prazo viram erro.
+        deadline (time.monotonic()) é o prazo de quem chamou: as leituras terminam
+        DEADLINE_MARGIN_SECONDS antes dele, sem deixar threads do pool ocupadas depois.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout * 2
+        read_deadline = deadline - DEADLINE_MARGIN_SECONDS
+        futures = [self._pool.submit(self.read, url, read_deadline) for url in urls]
+        # Cada leitura já para em read_deadline; a folga restante cobre o processamento do texto
+        done, _ = wait(futures, timeout=max(0.0, deadline - DEADLINE_MARGIN_SECONDS / 2 - time.monotonic()))
+        results = []
+        for url, future in zip(urls, futures):
+            if future in done:
+                results.append(future.result())
+            else:
+                future.cancel()
+                with self._lock:
+                    self._errors += 1
+                results.append({'link': url, 'erro': "Tempo esgotado ao ler a página"})
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            attempts = self._pages + self._errors
+            return {
+                "max_bytes": self.max_bytes,
+                "page_token_budget": self.page_token_budget,
+                "pages": self._pages,
+                "errors": self._errors,
+                "blocked_urls": self._blocked,
+                "byte_capped": self._byte_capped,
+                "avg_kb_read": round(self._bytes_read / attempts / 1024, 1) if attempts else None,
+                "avg_ms": round(self._seconds / attempts * 1000, 1) if attempts else None
+            }
@@ -0,0 +1,94 @@
+# =============================================================================
+# PREFIXO ESTÁVEL PARA O CACHE DE PROMPT DA AZURE OPENAI
+# =============================================================================
+#
+# A Azure reaproveita automaticamente o processamento de um prefixo de prompt
+# já visto (a partir de 1024 tokens), o que reduz o tempo até o primeiro token
+# e o custo dos tokens em cache. O prefixo só é reaproveitado se for idêntico
+# byte a byte, então:
+# - o schema das ferramentas é serializado sempre na mesma ordem (ferramentas
+#   por nome, chaves ordenadas);
+# - o prompt do sistema é normalizado (quebras de linha e espaços finais);
+# - dados que mudam por requisição (resumo da sessão, data, fala atual) entram
+#   depois do prompt do sistema, nunca dentro dele.
+#
+# PromptCacheStats registra usage.prompt_tokens_details.cached_tokens de cada
+# chamada para acompanhar a taxa de acerto no /health.
+# =============================================================================
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def _sorted_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _sorted_keys(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted_keys(item) for item in value]
+    return value
+
+
+def canonical_tools(tools_config: List[Dict]) -> List[Dict]:
+    """Schema das ferramentas em ordem determinística: por nome da função e com as chaves ordenadas."""
+    return [
+        _sorted_keys(tool)
+        for tool in sorted(tools_config, key=lambda tool: tool.get("function", {}).get("name", ""))
+    ]
+
+
+def normalize_prompt(text: str) -> str:
+    """Prompt do sistema com quebras de linha \\n e sem espaços no fim das linhas."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def prefix_fingerprint(system_prompt: str, tools_config: List[Dict]) -> str:
+    """Hash curto do prefixo cacheável; muda só quando o prompt ou as ferramentas mudam."""
+    payload = json.dumps({"system": system_prompt, "tools": tools_config}, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptCacheStats:
+    """Tokens de prompt e tokens servidos do cache, por tipo de chamada."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, Dict[str, int]] = {}
+        self.fingerprint: Optional[str] = None
+
+    def record(self, kind: str, usage) -> Optional[int]:
+        """Registra o usage de uma resposta; retorna os cached_tokens (None se a resposta não trouxe usage)."""
+        if usage is None:
+            return None
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        with self._lock:
+            entry = self._kinds.setdefault(kind, {"calls": 0, "calls_with_cache_hit": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["cached_tokens"] += cached_tokens
+            if cached_tokens:
+                entry["calls_with_cache_hit"] += 1
+        return cached_tokens
+
+    def stats(self) -> Dict:
+        with self._lock:
+            kinds = {
+                kind: {
+                    **entry,
+                    "cached_ratio": round(entry["cached_tokens"] / entry["prompt_tokens"], 3) if entry["prompt_tokens"] else None
+                }
+                for kind, entry in self._kinds.items()
+            }
+        prompt_tokens = sum(entry["prompt_tokens"] for entry in kinds.values())
+        cached_tokens = sum(entry["cached_tokens"] for entry in kinds.values())
+        return {
+            "prefix_fingerprint": self.fingerprint,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else None,
+            "by_kind": kinds
+        }
@@ -0,0 +1,231 @@
+# =============================================================================
+# SERVIÇO DE BUSCA NA WEB (DUCKDUCKGO HTML)
+# =============================================================================
+#
+# Antes, cada busca abria uma conexão nova (TCP + TLS) com requests.post e
+# montava o DOM inteiro com html.parser; a mesma pergunta repetida no mesmo
+# ciclo de notícias ia ao DuckDuckGo de novo. Aqui:
+# - uma requests.Session com pool de conexões persistentes (keep-alive);
+# - cache com TTL pela consulta normalizada, e requisições idênticas em
+#   andamento são agrupadas (só uma vai à rede, as outras esperam o resultado);
+# - parser mais rápido quando instalado: selectolax, depois lxml, e por fim
+#   BeautifulSoup com html.parser;
+# - latência por chamada e acertos de cache em stats(), para o /health.
+#
+# SEARCH_BASE_URL permite apontar para outro endpoint com o mesmo HTML (ex.:
+# um servidor local em benchmarks/search_benchmark.py).
+# =============================================================================
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SEARCH_BASE_URL = os.getenv("SEARCH_BASE_URL", "https://html.duckduckgo.com/html/")
+# Resultados guardados por consulta; max_results só corta a lista na saída
+MAX_SEARCH_RESULTS = 10
+SEARCH_PARSERS = ("selectolax", "lxml", "html.parser")
+
+_RESULT_CLASS_XPATH = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+
+def normalize_query(query: str) -> str:
+    """Chave do cache: minúsculas, NFC e espaços simples."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", query).strip().lower())
+
+
+def resolve_result_link(link: str) -> str:
+    """URL de destino de um link de resultado (o DuckDuckGo HTML usa //duckduckgo.com/l/?uddg=<url>)."""
+    if link.startswith("//"):
+        link = "https:" + link
+    parsed = urlparse(link)
+    if parsed.netloc.endswith("duckduckgo.com") and parsed.path.startswith("/l/"):
+        target = parse_qs(parsed.query).get("uddg")
+        if target:
+            return target[0]
+    return link
+
+
+def available_parser(preferred: Optional[str] = None) -> str:
+    """O parser pedido (se instalado) ou o mais rápido disponível."""
+    candidates = [preferred] if preferred else list(SEARCH_PARSERS)
+    for name in candidates:
+        try:
+            if name == "selectolax":
+                import selectolax.parser  # noqa: F401
+            elif name == "lxml":
+                import lxml.html  # noqa: F401
+            elif name == "html.parser":
+                import bs4  # noqa: F401
+            else:
+                raise ValueError(f"Parser desconhecido: {name} (opções: {', '.join(SEARCH_PARSERS)})")
+            return name
+        except ImportError:
+            continue
+    if preferred:
+        raise ValueError(f"Parser {preferred} não está instalado")
+    raise ImportError("Nenhum parser de HTML disponível (instale selectolax, lxml ou bs4)")
+
+
+def parse_results(html: str, max_results: int = MAX_SEARCH_RESULTS, parser: str = "html.parser") -> List[Dict[str, str]]:
+    """Extrai título e link dos blocos div.result da página HTML do DuckDuckGo."""
+    resultados = []
+
+    if parser == "selectolax":
+        from selectolax.parser import HTMLParser
+        for bloco in HTMLParser(html).css("div.result"):
+            link_tag = bloco.css_first("a.result__a")
+            if link_tag is None or not link_tag.attributes.get("href"):
+                continue
+            resultados.append({'titulo': link_tag.text(strip=True), 'link': link_tag.attributes["href"]})
+            if len(resultados) >= max_results:
+                break
+
+    elif parser == "lxml":
+        import lxml.html
+        documento = lxml.html.fromstring(html)
+        for bloco in documento.xpath(f"//div[{_RESULT_CLASS_XPATH.format('result')}]"):
+            links = bloco.xpath(f".//a[{_RESULT_CLASS_XPATH.format('result__a')}]")
+            if not links or not links[0].get("href"):
+                continue
+            resultados.append({'titulo': links[0].text_content().strip(), 'link': links[0].get("href")})
+            if len(resultados) >= max_results:
+                break
+
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        for bloco in soup.find_all('div', class_='result'):
+            link_tag = bloco.find('a', class_='result__a')
+            if not link_tag or not link_tag.get('href'):
+                continue
+            resultados.append({'titulo': link_tag.get_text(strip=True), 'link': link_tag['href']})
+            if len(resultados) >= max_results:
+                break
+
+    return resultados
+
+
+class SearchService:
+    """Buscas no DuckDuckGo com conexões persistentes, cache com TTL e agrupamento de requisições iguais."""
+
+    def __init__(self, base_url: str = SEARCH_BASE_URL, timeout: float = 10.0, cache_ttl: float = 900.0,
+                 cache_max_entries: int = 512, pool_size: int = 8, parser: Optional[str] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.parser = available_parser(parser)
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # consulta normalizada -> (instante, resultados)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # consulta normalizada -> Future da busca em andamento
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._cache_hits = 0
+        self._coalesced = 0
+        self._fetches = 0
+        self._errors = 0
+        self._fetch_latencies = deque(maxlen=500)
+        self._call_seconds = 0.0
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        """Resultados (título e link) da busca, do cache quando possível."""
+        started_at = time.perf_counter()
+        max_results = max(1, min(int(max_results), MAX_SEARCH_RESULTS))
+        key = normalize_query(query)
+        try:
+            return list(self._results(key, query)[:max_results])
+        finally:
+            with self._lock:
+                self._calls += 1
+                self._call_seconds += time.perf_counter() - started_at
+
+    def _results(self, key: str, query: str) -> List[Dict[str, str]]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached[1]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                # Mesma consulta já indo à rede: espera por ela em vez de repetir
+                self._coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result(timeout=self.timeout * 2)
+
+        try:
+            results = self._fetch(query)
+        except BaseException as e:
+            with self._lock:
+                self._errors += 1
+                self._in_flight.pop(key, None)
+            # Erros não vão para o cache: a próxima chamada tenta de novo
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(results)
+        return results
+
+    def _fetch(self, query: str) -> List[Dict[str, str]]:
+        started_at = time.perf_counter()
+        response = self.session.post(self.base_url, data={'q': query}, timeout=self.timeout)
+        response.raise_for_status()  # Levanta erro em caso de status != 200
+        results = parse_results(response.text, MAX_SEARCH_RESULTS, self.parser)
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            self._fetches += 1
+            self._fetch_latencies.append(elapsed)
+        print(f"[BUSCA] 🔎 '{query}': {len(results)} resultados em {elapsed:.2f}s ({self.parser})")
+        return results
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self._fetch_latencies)
+            return {
+                "base_url": self.base_url,
+                "parser": self.parser,
+                "calls": self._calls,
+                "cache_hits": self._cache_hits,
+                "coalesced": self._coalesced,
+                "fetches": self._fetches,
+                "errors": self._errors,
+                "cache_hit_rate": round((self._cache_hits + self._coalesced) / self._calls, 3) if self._calls else None,
+                "cached_queries": len(self._cache),
+                "avg_call_ms": round(self._call_seconds / self._calls * 1000, 1) if self._calls else None,
+                "fetch_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "fetch_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1) if latencies else None
+            }
@@ -0,0 +1,212 @@
+# =============================================================================
+# CACHE DE SESSÕES DE CONVERSA (LRU + TTL)
+# =============================================================================
+#
+# O ConversationManager não carrega mais todo o histórico na inicialização:
+# cada sessão é lida do armazenamento no primeiro acesso e fica residente
+# neste cache, limitado em número de sessões (LRU) e em tempo ocioso (TTL).
+# As gravações continuam indo direto para o armazenamento a cada turno, então
+# remover uma sessão do cache nunca perde dados; ao expirar por inatividade, a
+# sessão é "descarregada" (on_evict, ex.: compactar o log do modo jsonl).
+# =============================================================================
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from llm.storage import StoredSession
+
+
+def _message_size(message: Dict) -> int:
+    """Tamanho aproximado de uma mensagem em memória (conteúdo + campos fixos)."""
+    return len(message.get('content') or "") + 200
+
+
+class SessionCache:
+    """Sessões residentes em memória, carregadas sob demanda por loader(session_id)."""
+
+    def __init__(self, loader: Callable[[str], Optional[StoredSession]], max_sessions: int = 1000,
+                 ttl_seconds: float = 1800.0, sweep_interval: float = 60.0,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.loader = loader
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+
+        # session_id -> {"messages", "metadata", "last_access", "bytes"}
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._resident_bytes = 0
+        self._stop_sweeper = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Inicia a thread que expira as sessões ociosas."""
+        if self._sweeper is None and self.ttl_seconds > 0:
+            self._sweeper = threading.Thread(target=self._run_sweeper, name="session-cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def get(self, session_id: str) -> Optional[StoredSession]:
+        """Retorna a sessão do cache, carregando do armazenamento se necessário (None se não existir)."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._hits += 1
+                entry["last_access"] = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return entry["messages"], entry["metadata"]
+            self._misses += 1
+
+        # Leitura fora do lock: uma sessão lenta no disco não bloqueia as outras
+        stored = self.loader(session_id)
+        if stored is None:
+            return None
+
+        with self._lock:
+            # Outra thread pode ter carregado (ou criado) a sessão enquanto isso
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                return entry["messages"], entry["metadata"]
+            self._insert(session_id, stored[0], stored[1])
+        self._enforce_capacity()
+        return stored
+
+    def put(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        """Insere ou substitui uma sessão (ex.: sessão nova criada no primeiro turno)."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._resident_bytes -= entry["bytes"]
+            self._insert(session_id, messages, metadata)
+        self._enforce_capacity()
+
+    def setdefault(self, session_id: str, messages: List[Dict], metadata: Dict) -> StoredSession:
+        """
+        Insere a sessão só se ela ainda não estiver no cache e retorna a que ficou
+        residente. Dois primeiros turnos simultâneos da mesma sessão recebem a mesma
+        lista de mensagens, em vez de um substituir a do outro.
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry["last_access"] = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return entry["messages"], entry["metadata"]
+            self._insert(session_id, messages, metadata)
+        self._enforce_capacity()
+        return messages, metadata
+
+    def touch(self, session_id: str) -> None:
+        """Recalcula o tamanho de uma sessão alterada no lugar e renova o acesso."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            size = sum(_message_size(message) for message in entry["messages"])
+            self._resident_bytes += size - entry["bytes"]
+            entry["bytes"] = size
+            entry["last_access"] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+    def discard(self, session_id: str) -> None:
+        """Remove uma sessão do cache sem chamar on_evict (ex.: conversa apagada)."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._resident_bytes -= entry["bytes"]
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def _insert(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        size = sum(_message_size(message) for message in messages)
+        self._sessions[session_id] = {
+            "messages": messages,
+            "metadata": metadata,
+            "last_access": time.monotonic(),
+            "bytes": size
+        }
+        self._resident_bytes += size
+
+    def _enforce_capacity(self) -> List[str]:
+        """
+        Remove as sessões menos usadas além de max_sessions; retorna os ids removidos.
+        Roda no caminho da requisição, então não chama on_evict (os dados já estão
+        gravados; só a expiração por TTL, em segundo plano, descarrega a sessão).
+        """
+        evicted = []
+        with self._lock:
+            while len(self._sessions) > self.max_sessions:
+                session_id, entry = self._sessions.popitem(last=False)
+                self._resident_bytes -= entry["bytes"]
+                self._evictions += 1
+                evicted.append(session_id)
+        return evicted
+
+    def sweep(self) -> int:
+        """Expira as sessões ociosas há mais de ttl_seconds; retorna quantas saíram."""
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = []
+        with self._lock:
+            # Em ordem LRU: as mais antigas ficam no começo
+            for session_id, entry in list(self._sessions.items()):
+                if entry["last_access"] > cutoff:
+                    break
+                del self._sessions[session_id]
+                self._resident_bytes -= entry["bytes"]
+                self._expirations += 1
+                expired.append(session_id)
+        self._notify_evicted(expired)
+        return len(expired)
+
+    def _notify_evicted(self, session_ids: List[str]) -> None:
+        if self.on_evict is None:
+            return
+        for session_id in session_ids:
+            try:
+                self.on_evict(session_id)
+            except Exception as e:
+                print(f"[DEBUG] ⚠️  Erro ao descarregar sessão {session_id}: {str(e)}")
+
+    def _run_sweeper(self) -> None:
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            try:
+                expired = self.sweep()
+                if expired:
+                    print(f"[DEBUG] 🧹 {expired} sessão(ões) ociosa(s) removida(s) da memória")
+            except Exception as e:
+                print(f"[DEBUG] ⚠️  Erro ao expirar sessões: {str(e)}")
+
+    def close(self) -> None:
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "resident_sessions": len(self._sessions),
+                "resident_messages": sum(len(entry["messages"]) for entry in self._sessions.values()),
+                "resident_mb": round(self._resident_bytes / 1024 / 1024, 2),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
@@ -0,0 +1,588 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+# Uma sessão carregada do armazenamento: (mensagens, metadados)
+StoredSession = Tuple[List[Dict], Dict]
+
+
+class ConversationStorage:
+    """
+    Interface dos backends de persistência do ConversationManager.
+
+    O ConversationManager mantém o histórico em memória e chama save_turn() a
+    cada turno; o backend decide como gravar (arquivo inteiro, log append-only
+    ou SQLite).
+    """
+
+    name = "base"
+
+    def load_all(self) -> Iterator[Tuple[str, List[Dict], Dict]]:
+        """Todas as sessões salvas, como (session_id, mensagens, metadados)."""
+        raise NotImplementedError
+
+    def load_session(self, session_id: str) -> Optional[StoredSession]:
+        """Uma sessão específica, ou None se não existir."""
+        raise NotImplementedError
+
+    def save_turn(self, session_id: str, new_messages: List[Dict], messages: List[Dict], metadata: Dict) -> None:
+        """
+        Persiste um turno. new_messages são as mensagens acrescentadas agora;
+        messages é o histórico completo (já limitado por max_history).
+        """
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def list_sessions(self) -> List[str]:
+        raise NotImplementedError
+
+    def find_sessions(self, conversation_id: Optional[str] = None, active_since: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Dict]:
+        """Metadados das sessões filtradas por conversa e/ou última interação (ISO 8601), mais recentes primeiro."""
+        raise NotImplementedError
+
+    def compact(self, session_id: Optional[str] = None, force: bool = False) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        return {"backend": self.name}
+
+
+def _matches(metadata: Dict, conversation_id: Optional[str], active_since: Optional[str]) -> bool:
+    if conversation_id is not None and metadata.get('conversation_id') != conversation_id:
+        return False
+    if active_since is not None and (metadata.get('last_interaction') or "") < active_since:
+        return False
+    return True
+
+
+# =============================================================================
+# JSON: um arquivo por sessão
+# =============================================================================
+#
+# Modos:
+# - json: reescreve o arquivo JSON inteiro da sessão a cada turno
+# - jsonl: cada turno é uma linha acrescentada ao log da sessão (<sessão>.jsonl);
+#   um compactador em segundo plano incorpora o log ao snapshot JSON
+#   (<sessão>.json, mesmo formato do modo json) e esvazia o log
+# =============================================================================
+
+JSON_STORAGE_MODES = ("json", "jsonl")
+
+
+class JSONFileStorage(ConversationStorage):
+    """Arquivos JSON por sessão em storage_dir, com log append-only opcional (modo jsonl)."""
+
+    name = "json"
+
+    def __init__(self, storage_dir: str = "conversations", mode: str = "json", compact_interval: float = 60.0,
+                 compact_min_records: int = 20, fsync: bool = False, max_messages: Optional[int] = None):
+        if mode not in JSON_STORAGE_MODES:
+            raise ValueError(f"Modo de armazenamento desconhecido: {mode} (opções: {', '.join(JSON_STORAGE_MODES)})")
+
+        self.storage_dir = storage_dir
+        self.mode = mode
+        self.compact_interval = compact_interval
+        self.compact_min_records = compact_min_records
+        self.fsync = fsync
+        # Mensagens mantidas no snapshot ao compactar (o mesmo limite do histórico em memória)
+        self.max_messages = max_messages
+
+        # Linhas no log de cada sessão desde o último snapshot (modo jsonl)
+        self._log_records: Dict[str, int] = defaultdict(int)
+        # _lock só protege a contabilidade (_log_records, _session_locks); a E/S de cada
+        # sessão acontece sob o lock da própria sessão, sem segurar as demais
+        self._lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._compactions = 0
+        self._stop_compactor = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+
+        # Criar diretório de armazenamento se não existir
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+        if self.mode == "jsonl":
+            self._compactor = threading.Thread(target=self._run_compactor, name="conversation-compactor", daemon=True)
+            self._compactor.start()
+
+    def _get_conversation_file_path(self, session_id: str) -> str:
+        """Retorna o caminho do arquivo JSON para uma sessão."""
+        # Sanitizar o session_id para usar como nome de arquivo
+        safe_session_id = "".join(c for c in session_id if c.isalnum() or c in ('-', '_'))
+        return os.path.join(self.storage_dir, f"{safe_session_id}.json")
+
+    def _get_log_file_path(self, session_id: str) -> str:
+        """Retorna o caminho do log append-only (modo jsonl) de uma sessão."""
+        return self._get_conversation_file_path(session_id) + "l"
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        """Lock dos arquivos de uma sessão (escrita, compactação e remoção)."""
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = self._session_locks[session_id] = threading.Lock()
+            return lock
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _read_files(self, snapshot_path: str, log_path: str) -> Optional[Tuple[str, List[Dict], Dict]]:
+        """Lê o snapshot e aplica o log por cima; retorna (session_id, mensagens, metadados)."""
+        session_id = None
+        messages: List[Dict] = []
+        metadata: Dict = {}
+
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                conversation_data = json.load(f)
+            session_id = conversation_data.get('session_id')
+            messages = conversation_data.get('messages', [])
+            metadata = conversation_data.get('metadata', {})
+
+        if os.path.exists(log_path):
+            log_session_id, applied = self._replay_log(log_path, messages, metadata)
+            session_id = session_id or log_session_id
+            if session_id and applied:
+                with self._lock:
+                    self._log_records[session_id] = applied
+
+        return (session_id, messages, metadata) if session_id else None
+
+    def _replay_log(self, log_path: str, messages: List[Dict], metadata: Dict) -> Tuple[Optional[str], int]:
+        """
+        Aplica as linhas do log sobre o snapshot já carregado. Mensagens que o
+        snapshot já contém (mesmo message_id) são ignoradas: é o caso de uma queda
+        entre gravar o snapshot e esvaziar o log. Entre as linhas do próprio log não
+        há deduplicação (ids gerados no mesmo segundo podem se repetir).
+        """
+        session_id = None
+        applied = 0
+        ends_with_newline = True
+        snapshot_ids = {message.get('message_id') for message in messages if message.get('message_id') is not None}
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                ends_with_newline = line.endswith("\n")
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Só a última linha pode estar incompleta (queda no meio da escrita)
+                    print(f"[DEBUG] ⚠️  Linha {line_number} inválida em {log_path}, ignorada")
+                    continue
+
+                session_id = record.get('session_id') or session_id
+                for message in record.get('messages', []):
+                    if message.get('message_id') not in snapshot_ids:
+                        messages.append(message)
+                if record.get('metadata'):
+                    metadata.clear()
+                    metadata.update(record['metadata'])
+                applied += 1
+
+        # Fecha uma linha incompleta para que o próximo turno não seja gravado colado nela
+        if not ends_with_newline:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write("\n")
+
+        return session_id, applied
+
+    def load_all(self) -> Iterator[Tuple[str, List[Dict], Dict]]:
+        if not os.path.exists(self.storage_dir):
+            print(f"[DEBUG] Diretório de conversas não encontrado: {self.storage_dir}")
+            return
+
+        stems = sorted({
+            filename.rsplit('.', 1)[0]
+            for filename in os.listdir(self.storage_dir)
+            if filename.endswith(('.json', '.jsonl'))
+        })
+        for stem in stems:
+            snapshot_path = os.path.join(self.storage_dir, f"{stem}.json")
+            try:
+                session = self._read_files(snapshot_path, snapshot_path + "l")
+            except Exception as e:
+                print(f"[DEBUG] ⚠️  Erro ao carregar arquivo {stem}: {str(e)}")
+                continue
+            if session is not None:
+                yield session
+
+    def load_session(self, session_id: str) -> Optional[StoredSession]:
+        with self._session_lock(session_id):
+            session = self._read_files(self._get_conversation_file_path(session_id), self._get_log_file_path(session_id))
+        return (session[1], session[2]) if session else None
+
+    def list_sessions(self) -> List[str]:
+        return [session_id for session_id, _, _ in self.load_all()]
+
+    def find_sessions(self, conversation_id: Optional[str] = None, active_since: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Dict]:
+        # Sem índice: lê todos os arquivos
+        found = [
+            {'session_id': session_id, **metadata}
+            for session_id, _, metadata in self.load_all()
+            if _matches(metadata, conversation_id, active_since)
+        ]
+        found.sort(key=lambda session: session.get('last_interaction') or "", reverse=True)
+        return found[:limit] if limit else found
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def save_turn(self, session_id: str, new_messages: List[Dict], messages: List[Dict], metadata: Dict) -> None:
+        with self._session_lock(session_id):
+            if self.mode == "jsonl":
+                self._append_to_log(session_id, new_messages, metadata)
+            else:
+                self._save_conversation(session_id, messages, metadata)
+
+    def _save_conversation(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        """Salva uma conversa em arquivo JSON."""
+        try:
+            file_path = self._get_conversation_file_path(session_id)
+            conversation_data = {
+                'session_id': session_id,
+                'messages': list(messages),
+                'metadata': metadata
+            }
+
+            # Grava num arquivo temporário e troca de uma vez: uma falha no meio
+            # da escrita não corrompe o arquivo anterior
+            temp_path = file_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(conversation_data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, file_path)
+
+            print(f"[DEBUG] ✅ Conversa salva em: {file_path}")
+
+        except Exception as e:
+            print(f"[DEBUG] ⚠️  Erro ao salvar conversa {session_id}: {str(e)}")
+
+    def _append_to_log(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        """Acrescenta um turno ao log da sessão: custo constante, independente do tamanho do histórico."""
+        record = {
+            'session_id': session_id,
+            'messages': messages,
+            'metadata': metadata
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with open(self._get_log_file_path(session_id), 'a', encoding='utf-8') as f:
+                f.write(line)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._lock:
+                self._log_records[session_id] += 1
+        except Exception as e:
+            print(f"[DEBUG] ⚠️  Erro ao gravar log da conversa {session_id}: {str(e)}")
+
+    def delete_session(self, session_id: str) -> None:
+        """Remove o arquivo JSON (e o log, no modo jsonl) de uma conversa."""
+        with self._session_lock(session_id):
+            with self._lock:
+                self._log_records.pop(session_id, None)
+            try:
+                for file_path in (self._get_conversation_file_path(session_id), self._get_log_file_path(session_id)):
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                        print(f"[DEBUG] ✅ Arquivo de conversa removido: {file_path}")
+            except Exception as e:
+                print(f"[DEBUG] ⚠️  Erro ao remover arquivo da conversa {session_id}: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Compactação (modo jsonl)
+    # ------------------------------------------------------------------
+
+    def compact(self, session_id: Optional[str] = None, force: bool = False) -> int:
+        """
+        Incorpora o log ao snapshot JSON das sessões com pelo menos
+        compact_min_records linhas pendentes (ou de todas com pendências, se force).
+        Retorna quantas sessões foram compactadas.
+        """
+        if self.mode != "jsonl":
+            return 0
+
+        with self._lock:
+            candidates = [session_id] if session_id else list(self._log_records)
+
+        compacted = 0
+        for candidate in candidates:
+            with self._lock:
+                pending = self._log_records.get(candidate, 0)
+            if not pending or (pending < self.compact_min_records and not force):
+                continue
+
+            # Só esta sessão espera pela E/S da compactação; as outras continuam gravando
+            with self._session_lock(candidate):
+                snapshot_path = self._get_conversation_file_path(candidate)
+                log_path = self._get_log_file_path(candidate)
+                messages: List[Dict] = []
+                metadata: Dict = {}
+                if os.path.exists(snapshot_path):
+                    with open(snapshot_path, 'r', encoding='utf-8') as f:
+                        conversation_data = json.load(f)
+                    messages = conversation_data.get('messages', [])
+                    metadata = conversation_data.get('metadata', {})
+                if os.path.exists(log_path):
+                    self._replay_log(log_path, messages, metadata)
+                if self.max_messages is not None:
+                    messages = messages[-self.max_messages:]
+
+                # O snapshot é trocado atomicamente antes de esvaziar o log; uma queda
+                # entre as duas etapas só faz o log ser reaplicado sobre um snapshot
+                # que já o contém, e as mensagens repetidas são ignoradas pelo message_id
+                self._save_conversation(candidate, messages, metadata)
+                open(log_path, 'w').close()
+                with self._lock:
+                    self._log_records.pop(candidate, None)
+                    self._compactions += 1
+            compacted += 1
+        return compacted
+
+    def _run_compactor(self) -> None:
+        while not self._stop_compactor.wait(self.compact_interval):
+            try:
+                started_at = time.perf_counter()
+                compacted = self.compact()
+                if compacted:
+                    print(f"[DEBUG] 🗜️  {compacted} conversa(s) compactada(s) em {time.perf_counter() - started_at:.3f}s")
+            except Exception as e:
+                print(f"[DEBUG] ⚠️  Erro na compactação das conversas: {str(e)}")
+
+    def close(self) -> None:
+        """Para o compactador e compacta tudo o que estiver pendente."""
+        self._stop_compactor.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+        self.compact(force=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "mode": self.mode,
+                "sessions_with_pending_log": len(self._log_records),
+                "pending_log_records": sum(self._log_records.values()),
+                "compactions": self._compactions
+            }
+
+
+# =============================================================================
+# SQLite (WAL)
+# =============================================================================
+#
+# Um único arquivo de banco com as tabelas sessions e messages, indexadas por
+# session_id, conversation_id e last_interaction. O modo WAL permite leituras
+# concorrentes com uma escrita; cada thread usa a própria conexão, e as
+# consultas são strings SQL fixas com parâmetros, preparadas uma vez e
+# reaproveitadas pelo cache de statements de cada conexão.
+# =============================================================================
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    conversation_id TEXT,
+    created_at TEXT,
+    last_interaction TEXT,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message_id TEXT,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_conversation ON sessions (conversation_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_interaction ON sessions (last_interaction);
+"""
+
+_UPSERT_SESSION = """
+INSERT INTO sessions (session_id, conversation_id, created_at, last_interaction, metadata)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(session_id) DO UPDATE SET
+    conversation_id = excluded.conversation_id,
+    last_interaction = excluded.last_interaction,
+    metadata = excluded.metadata
+"""
+_INSERT_MESSAGE = "INSERT INTO messages (session_id, message_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)"
+_TRIM_MESSAGES = """
+DELETE FROM messages WHERE session_id = ? AND id NOT IN (
+    SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?
+)
+"""
+_SELECT_SESSION = "SELECT metadata FROM sessions WHERE session_id = ?"
+_SELECT_MESSAGES = "SELECT role, content, message_id, timestamp FROM messages WHERE session_id = ? ORDER BY id"
+_SELECT_ALL_MESSAGES = "SELECT session_id, role, content, message_id, timestamp FROM messages ORDER BY session_id, id"
+
+
+def _row_to_message(role: str, content: str, message_id: Optional[str], timestamp: Optional[str]) -> Dict:
+    return {'role': role, 'content': content, 'message_id': message_id, 'timestamp': timestamp}
+
+
+class SQLiteStorage(ConversationStorage):
+    """Sessões e mensagens num banco SQLite em modo WAL."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = "conversations/conversations.db", busy_timeout_ms: int = 5000,
+                 max_messages: Optional[int] = None):
+        self.db_path = db_path
+        # Mensagens mantidas por sessão (o mesmo limite do histórico em memória)
+        self.max_messages = max_messages
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._connection().executescript(_SQLITE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (sqlite3.Connection não deve ser compartilhada entre threads)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False, cached_statements=64)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Em WAL, NORMAL só sincroniza nos checkpoints: um turno confirmado pode se
+            # perder numa queda de energia, mas o banco nunca fica corrompido
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def load_all(self) -> Iterator[Tuple[str, List[Dict], Dict]]:
+        connection = self._connection()
+        messages_by_session: Dict[str, List[Dict]] = defaultdict(list)
+        for session_id, role, content, message_id, timestamp in connection.execute(_SELECT_ALL_MESSAGES):
+            messages_by_session[session_id].append(_row_to_message(role, content, message_id, timestamp))
+        for session_id, metadata in connection.execute("SELECT session_id, metadata FROM sessions"):
+            yield session_id, messages_by_session.get(session_id, []), json.loads(metadata)
+
+    def load_session(self, session_id: str) -> Optional[StoredSession]:
+        connection = self._connection()
+        row = connection.execute(_SELECT_SESSION, (session_id,)).fetchone()
+        if row is None:
+            return None
+        messages = [_row_to_message(*message) for message in connection.execute(_SELECT_MESSAGES, (session_id,))]
+        return messages, json.loads(row[0])
+
+    def save_turn(self, session_id: str, new_messages: List[Dict], messages: List[Dict], metadata: Dict) -> None:
+        try:
+            self._write_session(session_id, new_messages, metadata)
+        except Exception as e:
+            print(f"[DEBUG] ⚠️  Erro ao salvar conversa {session_id} no SQLite: {str(e)}")
+
+    def _write_session(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(_UPSERT_SESSION, (
+                session_id,
+                metadata.get('conversation_id'),
+                metadata.get('created_at'),
+                metadata.get('last_interaction'),
+                json.dumps(metadata, ensure_ascii=False)
+            ))
+            connection.executemany(_INSERT_MESSAGE, [
+                (session_id, message.get('message_id'), message.get('role'), message.get('content') or "", message.get('timestamp'))
+                for message in messages
+            ])
+            if self.max_messages is not None:
+                connection.execute(_TRIM_MESSAGES, (session_id, session_id, self.max_messages))
+        with self._lock:
+            self._writes += 1
+
+    def import_session(self, session_id: str, messages: List[Dict], metadata: Dict) -> None:
+        """Importa uma sessão inteira, substituindo a existente (usado na migração)."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._write_session(session_id, messages, metadata)
+
+    def delete_session(self, session_id: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def list_sessions(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT session_id FROM sessions ORDER BY session_id")]
+
+    def find_sessions(self, conversation_id: Optional[str] = None, active_since: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Dict]:
+        conditions, parameters = [], []
+        if conversation_id is not None:
+            conditions.append("conversation_id = ?")
+            parameters.append(conversation_id)
+        if active_since is not None:
+            conditions.append("last_interaction >= ?")
+            parameters.append(active_since)
+        query = "SELECT session_id, metadata FROM sessions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY last_interaction DESC"
+        if limit:
+            query += " LIMIT ?"
+            parameters.append(int(limit))
+        return [
+            {'session_id': session_id, **json.loads(metadata)}
+            for session_id, metadata in self._connection().execute(query, parameters)
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def stats(self) -> Dict:
+        connection = self._connection()
+        sessions = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages = connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        with self._lock:
+            return {
+                "backend": self.name,
+                "db_path": self.db_path,
+                "sessions": sessions,
+                "messages": messages,
+                "writes": self._writes,
+                "connections": len(self._connections),
+                "db_size_mb": round(os.path.getsize(self.db_path) / 1024 / 1024, 2) if os.path.exists(self.db_path) else 0.0
+            }
+
+
+STORAGE_BACKENDS = ("json", "jsonl", "sqlite")
+
+
+def create_storage(backend: str = "json", storage_dir: str = "conversations", **options) -> ConversationStorage:
+    """
+    Cria o backend de armazenamento: "json" ou "jsonl" (arquivos em storage_dir)
+    ou "sqlite" (storage_dir/conversations.db, ou options["db_path"]).
+    """
+    if backend in JSON_STORAGE_MODES:
+        return JSONFileStorage(storage_dir, mode=backend, **options)
+    if backend == "sqlite":
+        db_path = options.get("db_path") or os.path.join(storage_dir, "conversations.db")
+        return SQLiteStorage(db_path, max_messages=options.get("max_messages"))
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend} (opções: {', '.join(STORAGE_BACKENDS)})")
@@ -0,0 +1,78 @@
+# =============================================================================
+# EXPORTAÇÃO DO KOKORO PARA ONNX
+# =============================================================================
+#
+# Gera o grafo usado pelo motor TTS_ENGINE=onnx (tts/engines.py) a partir do
+# KModel em PyTorch, com quantização dinâmica int8 opcional.
+#
+# Uso:
+#   python -m tools.export_kokoro_onnx --output models/kokoro.onnx --quantize
+# =============================================================================
+
+import argparse
+import os
+
+import torch
+from kokoro import KModel
+
+from tts.engines import KOKORO_REPO_ID
+
+
+class KokoroOnnxWrapper(torch.nn.Module):
+    """Expõe forward_with_tokens() com as entradas esperadas pelo KokoroOnnxEngine."""
+
+    def __init__(self, model: KModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.LongTensor, ref_s: torch.FloatTensor, speed: torch.FloatTensor) -> torch.FloatTensor:
+        audio, _ = self.model.forward_with_tokens(input_ids, ref_s, speed)
+        return audio
+
+
+def export(output_path: str, opset: int = 17) -> None:
+    # disable_complex troca o STFT complexo por uma implementação exportável
+    model = KModel(repo_id=KOKORO_REPO_ID, disable_complex=True).eval()
+    wrapper = KokoroOnnxWrapper(model)
+
+    input_ids = torch.randint(1, 100, (1, 48), dtype=torch.long)
+    input_ids[0, 0] = input_ids[0, -1] = 0
+    ref_s = torch.randn(1, 256)
+    speed = torch.tensor([1.0])
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            (input_ids, ref_s, speed),
+            output_path,
+            input_names=["input_ids", "ref_s", "speed"],
+            output_names=["audio"],
+            dynamic_axes={"input_ids": {1: "tokens"}, "audio": {0: "samples"}},
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    print(f"[EXPORT] ✅ Modelo exportado: {output_path} ({os.path.getsize(output_path) / 1024 / 1024:.1f} MB)")
+
+
+def quantize(input_path: str, output_path: str) -> None:
+    """Quantização dinâmica int8 dos pesos (ativações continuam em float)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(input_path, output_path, weight_type=QuantType.QInt8)
+    print(f"[EXPORT] ✅ Modelo int8: {output_path} ({os.path.getsize(output_path) / 1024 / 1024:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o Kokoro para ONNX")
+    parser.add_argument("--output", default="models/kokoro.onnx", help="Caminho do .onnx gerado")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--quantize", action="store_true", help="Gera também uma versão int8 (<output>.int8.onnx)")
+    args = parser.parse_args()
+
+    export(args.output, args.opset)
+    if args.quantize:
+        quantize(args.output, os.path.splitext(args.output)[0] + ".int8.onnx")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# =============================================================================
+# MIGRAÇÃO DAS CONVERSAS JSON/JSONL PARA O SQLITE
+# =============================================================================
+#
+# Lê os snapshots .json e os logs .jsonl de um diretório de conversas e grava
+# cada sessão no banco SQLite usado com CONVERSATION_STORAGE_MODE=sqlite. Pode
+# ser rodada mais de uma vez: sessões já existentes no banco são substituídas.
+# Os arquivos originais não são alterados.
+#
+# Uso:
+#   python -m tools.migrate_conversations
+#   python -m tools.migrate_conversations --source conversations --db conversations/conversations.db
+# =============================================================================
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.storage import JSONFileStorage, SQLiteStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa as conversas em JSON/JSONL para o banco SQLite")
+    parser.add_argument("--source", default="conversations", help="Diretório com os arquivos .json/.jsonl")
+    parser.add_argument("--db", default=None, help="Banco SQLite de destino (padrão: <source>/conversations.db)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        print(f"[MIGRAÇÃO] ❌ Diretório não encontrado: {args.source}")
+        sys.exit(1)
+
+    db_path = args.db or os.path.join(args.source, "conversations.db")
+    # mode=json: só lê os arquivos, sem iniciar o compactador
+    source = JSONFileStorage(args.source, mode="json")
+    target = SQLiteStorage(db_path)
+
+    started_at = time.perf_counter()
+    sessions = 0
+    messages = 0
+    for session_id, session_messages, metadata in source.load_all():
+        target.import_session(session_id, session_messages, metadata)
+        sessions += 1
+        messages += len(session_messages)
+
+    elapsed = time.perf_counter() - started_at
+    print(f"[MIGRAÇÃO] ✅ {sessions} sessões ({messages} mensagens) importadas para {db_path} em {elapsed:.2f}s")
+    print(f"[MIGRAÇÃO] Para usar: CONVERSATION_STORAGE_MODE=sqlite")
+    target.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# =============================================================================
+# PRÉ-DOWNLOAD DOS MODELOS PARA O REPOSITÓRIO LOCAL DE ARTEFATOS
+# =============================================================================
+#
+# Baixa os checkpoints do Whisper e do Kokoro, converte para safetensors e
+# grava o lock file com os hashes em ARTIFACTS_DIR/ARTIFACTS_VERSION (padrão
+# models/v1). Roda no build da imagem Docker para que o cold start não
+# dependa de rede.
+#
+# Uso:
+#   python -m tools.prefetch_models
+#   python -m tools.prefetch_models --whisper small,base --voices pm_santa,pf_dora
+#   python -m tools.prefetch_models --verify   (só confere os sha256 do lock file)
+# =============================================================================
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference.artifacts import ARTIFACTS_DIR, ARTIFACTS_VERSION, ArtifactStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baixa e converte os modelos para o repositório local de artefatos")
+    parser.add_argument("--dir", default=ARTIFACTS_DIR, help="Diretório raiz dos artefatos")
+    parser.add_argument("--version", default=ARTIFACTS_VERSION, help="Versão (subdiretório) dos artefatos")
+    parser.add_argument("--whisper", default=os.getenv("ASR_MODEL", "small"), help="Modelos Whisper separados por vírgula (vazio para nenhum)")
+    parser.add_argument("--voices", default="pm_santa", help="Vozes do Kokoro separadas por vírgula")
+    parser.add_argument("--skip-kokoro", action="store_true", help="Não baixa o modelo do Kokoro")
+    parser.add_argument("--verify", action="store_true", help="Apenas verifica os sha256 dos artefatos já baixados")
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.dir, args.version, verify="sha256")
+
+    if args.verify:
+        started_at = time.perf_counter()
+        names = store.verify_all()
+        print(f"[ARTEFATOS] ✅ {len(names)} artefato(s) verificados em {time.perf_counter() - started_at:.2f}s")
+        return
+
+    timings = store.prefetch(
+        whisper_models=[name.strip() for name in args.whisper.split(",") if name.strip()],
+        voices=[voice.strip() for voice in args.voices.split(",") if voice.strip()],
+        kokoro=not args.skip_kokoro
+    )
+    store.verify_all()
+    print(f"[ARTEFATOS] ✅ {len(timings)} artefato(s) em {store.directory} ({sum(timings.values()):.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
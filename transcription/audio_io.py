@@ -0,0 +1,84 @@
+# =============================================================================
+# CONVERSÃO DE ÁUDIO EM MEMÓRIA
+# =============================================================================
+#
+# Funções para transformar áudio recebido pela rede no formato esperado
+# pelo Whisper: array float32 mono a 16 kHz, sem passar por disco.
+# =============================================================================
+
+import io
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+# Taxa de amostragem esperada pelo Whisper
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Converte bytes PCM 16-bit little-endian mono em amostras float32 no intervalo [-1, 1]."""
+    usable = len(data) - (len(data) % 2)
+    return np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768.0
+
+
+def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Reamostra áudio mono por interpolação linear vetorizada."""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio.astype(np.float32, copy=False)
+    duration = len(audio) / orig_sr
+    target_length = int(round(duration * target_sr))
+    source_positions = np.arange(target_length, dtype=np.float64) * (orig_sr / target_sr)
+    return np.interp(source_positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def _lowpass(audio: np.ndarray, cutoff: float, taps: int = 63) -> np.ndarray:
+    """Filtro passa-baixa FIR (sinc com janela de Hamming) para evitar aliasing antes de reduzir a taxa."""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+    kernel /= kernel.sum()
+    return np.convolve(audio, kernel.astype(np.float32), mode='same')
+
+
+def decode_audio_bytes(data: bytes, target_sr: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodifica um arquivo de áudio (WAV, FLAC, OGG...) inteiramente em memória.
+
+    O arquivo é lido com soundfile, convertido para mono pela média dos canais e
+    reamostrado para target_sr, sem arquivo temporário nem subprocesso. Formatos
+    que o libsndfile não entende caem no ffmpeg, alimentado via stdin.
+
+    Returns:
+        np.ndarray: Amostras float32 mono a target_sr
+    """
+    try:
+        audio, sample_rate = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+    except Exception as e:
+        print(f"[AUDIO] ⚠️ soundfile não decodificou o áudio ({str(e)}), usando ffmpeg")
+        return _decode_with_ffmpeg(data, target_sr)
+
+    # Downmix para mono
+    audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+
+    if sample_rate > target_sr:
+        audio = _lowpass(audio, cutoff=0.5 * target_sr / sample_rate)
+    return resample_audio(audio, sample_rate, target_sr)
+
+
+def _decode_with_ffmpeg(data: bytes, target_sr: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Fallback para codificações incomuns: decodifica com ffmpeg lendo do stdin."""
+    cmd = [
+        "ffmpeg",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(target_sr),
+        "-"
+    ]
+    try:
+        output = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Falha ao decodificar o áudio: {e.stderr.decode(errors='ignore')}") from e
+    return pcm16_to_float32(output)
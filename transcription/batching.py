@@ -0,0 +1,116 @@
+# =============================================================================
+# MICRO-BATCHING DINÂMICO PARA O ASR
+# =============================================================================
+#
+# Requisições de transcrição que chegam dentro de uma janela curta são
+# agrupadas e processadas numa única passada do motor de ASR (no Whisper,
+# uma passada do encoder/decoder), em vez de rodar o modelo N vezes em
+# sequência.
+# =============================================================================
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .engines import ASREngine, MAX_WINDOW_SAMPLES
+from .options import DEFAULT_DECODING_PROFILE
+
+# Áudios até este tamanho cabem numa única janela de 30s do Whisper
+MAX_BATCH_AUDIO_SAMPLES = MAX_WINDOW_SAMPLES
+
+
+class ASRBatchScheduler:
+    """
+    Agrupa transcrições concorrentes num único batch do motor de ASR.
+
+    Uma thread dedicada espera a primeira requisição, continua coletando por
+    até window_ms (ou até max_batch_size itens) e chama engine.transcribe_batch()
+    uma vez para o batch todo (no Whisper: espectrogramas mel com padding para
+    30s e um único whisper.decode()). Cada resultado volta para o Future da
+    requisição original.
+    """
+
+    def __init__(self, engine: ASREngine, window_ms: int = 30, max_batch_size: int = 4):
+        self.engine = engine
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Tuple[np.ndarray, Optional[str], str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._worker = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Future:
+        """Agenda a transcrição de um áudio float32 a 16 kHz de até 30 segundos."""
+        if len(audio) > MAX_BATCH_AUDIO_SAMPLES:
+            raise ValueError("Áudio maior que 30s não pode ser transcrito em batch")
+        future: Future = Future()
+        self._queue.put((audio, language, profile, future))
+        return future
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        """Versão bloqueante de submit(): espera o batch terminar e retorna {"text", "language"}."""
+        return self.submit(audio, language, profile).result()
+
+    def stats(self) -> Dict[str, float]:
+        """Estatísticas de agrupamento para o /health."""
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "largest_batch": self._largest_batch,
+                "average_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "window_ms": int(self.window_seconds * 1000),
+                "max_batch_size": self.max_batch_size
+            }
+
+    def _collect_batch(self) -> List[Tuple[np.ndarray, Optional[str], str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+
+            # Opções de decodificação diferentes (idioma, perfil) não podem dividir o mesmo batch
+            by_options: Dict[Tuple[Optional[str], str], List[Tuple[np.ndarray, Optional[str], str, Future]]] = {}
+            for item in batch:
+                by_options.setdefault((item[1], item[2]), []).append(item)
+
+            for (language, profile), items in by_options.items():
+                self._run_batch(language, profile, items)
+
+    def _run_batch(self, language: Optional[str], profile: str, items: List[Tuple[np.ndarray, Optional[str], str, Future]]) -> None:
+        started_at = time.perf_counter()
+        try:
+            results = self.engine.transcribe_batch([audio for audio, _, _, _ in items], language, profile)
+
+            for (_, _, _, future), result in zip(items, results):
+                future.set_result(result)
+
+        except Exception as e:
+            for _, _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(items)
+            self._largest_batch = max(self._largest_batch, len(items))
+
+        print(f"[ASR BATCH] {len(items)} transcrição(ões) ({language or 'auto'}, {profile}) em {time.perf_counter() - started_at:.2f}s")
@@ -0,0 +1,189 @@
+# =============================================================================
+# MOTORES DE RECONHECIMENTO DE FALA (ASR)
+# =============================================================================
+#
+# Interface comum atrás de fast_transcript(), selecionada por configuração
+# (ASR_ENGINE):
+# - whisper: openai-whisper em PyTorch (comportamento original)
+# - faster-whisper: CTranslate2 com compute int8 na CPU
+# - stub: resposta fixa, sem modelo, para testes
+#
+# Todos recebem áudio float32 mono a 16 kHz, o idioma (None = detectar) e o
+# nome do perfil de decodificação (transcription/options.py), e retornam um
+# dicionário no mesmo formato do Whisper: {"text": ..., "language": ...}.
+# =============================================================================
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from inference.artifacts import ArtifactStore, get_artifact_store
+from .options import (
+    COMPRESSION_RATIO_THRESHOLD, DEFAULT_DECODING_PROFILE, FALLBACK_TEMPERATURES,
+    LOGPROB_THRESHOLD, NO_SPEECH_THRESHOLD, get_decoding_profile
+)
+
+# Áudios até 30s cabem numa única janela do Whisper (16 kHz)
+MAX_WINDOW_SAMPLES = 30 * 16000
+
+
+class ASREngine:
+    """Interface dos motores de transcrição."""
+
+    name = "base"
+    supports_batching = False
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> List[Dict]:
+        """Transcreve vários áudios; motores sem batch nativo processam um a um."""
+        return [self.transcribe(audio, language, profile) for audio in audios]
+
+
+class WhisperEngine(ASREngine):
+    """openai-whisper em PyTorch fp32 (CPU) ou fp16 (GPU)."""
+
+    name = "whisper"
+    supports_batching = True
+
+    def __init__(self, model_name: str = "small", artifacts: Optional[ArtifactStore] = None):
+        import whisper
+        self._whisper = whisper
+        self.model_name = model_name
+        if artifacts is not None and artifacts.has(f"whisper-{model_name}"):
+            self.model = artifacts.load_whisper(model_name)
+        else:
+            self.model = whisper.load_model(model_name)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        options = get_decoding_profile(profile)
+        temperatures = FALLBACK_TEMPERATURES if options["temperature_fallback"] else (0.0,)
+        return self._transcribe(audio, language, options, temperatures)
+
+    def _transcribe(self, audio: np.ndarray, language: Optional[str], options: Dict, temperatures) -> Dict:
+        """model.transcribe com os limiares explícitos, os mesmos aplicados ao caminho em batch."""
+        result = self.model.transcribe(
+            audio,
+            language=language,
+            fp16=self.model.device.type == "cuda",
+            beam_size=options["beam_size"] if options["beam_size"] > 1 else None,
+            best_of=options["best_of"],
+            temperature=temperatures,
+            compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD,
+            logprob_threshold=LOGPROB_THRESHOLD,
+            no_speech_threshold=NO_SPEECH_THRESHOLD
+        )
+        return {"text": result["text"], "language": result.get("language", language)}
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> List[Dict]:
+        """
+        Uma passada do encoder/decoder para todos os áudios (cada um com até 30s),
+        em temperatura 0, com as mesmas regras do model.transcribe: silêncio
+        (no_speech_prob alto e logprob baixo) vira texto vazio e, com fallback no
+        perfil, os itens com resultado ruim continuam individualmente a partir da
+        próxima temperatura, sem repetir a decodificação em temperatura 0.
+        """
+        import torch
+        whisper = self._whisper
+        profile_options = get_decoding_profile(profile)
+
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+
+        options = whisper.DecodingOptions(
+            language=language,
+            temperature=FALLBACK_TEMPERATURES[0],
+            without_timestamps=True,
+            beam_size=profile_options["beam_size"] if profile_options["beam_size"] > 1 else None,
+            fp16=self.model.device.type == "cuda"
+        )
+        results = whisper.decode(self.model, mels, options)
+
+        transcriptions = []
+        for audio, result in zip(audios, results):
+            # Mesma ordem do decode_with_fallback do Whisper: silêncio provável não dispara fallback
+            is_silence = result.no_speech_prob > NO_SPEECH_THRESHOLD
+            needs_fallback = profile_options["temperature_fallback"] and not is_silence and (
+                result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+            )
+            if needs_fallback:
+                transcriptions.append(self._transcribe(audio, result.language, profile_options, FALLBACK_TEMPERATURES[1:]))
+            elif is_silence and result.avg_logprob <= LOGPROB_THRESHOLD:
+                # model.transcribe descarta o segmento nesse caso
+                transcriptions.append({"text": "", "language": result.language})
+            else:
+                transcriptions.append({"text": result.text.strip(), "language": result.language})
+        return transcriptions
+
+
+class FasterWhisperEngine(ASREngine):
+    """faster-whisper (CTranslate2) com quantização int8 na CPU."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str = "small", compute_type: str = "int8", cpu_threads: int = 0, beam_size: int = 1):
+        from faster_whisper import WhisperModel
+        self.model_name = model_name
+        self.beam_size = beam_size
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        options = get_decoding_profile(profile)
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=max(options["beam_size"], self.beam_size),
+            best_of=options["best_of"],
+            temperature=list(FALLBACK_TEMPERATURES) if options["temperature_fallback"] else 0.0
+        )
+        # Os segmentos são gerados sob demanda: juntar o texto executa a decodificação
+        text = "".join(segment.text for segment in segments)
+        return {"text": text, "language": info.language}
+
+
+class StubASREngine(ASREngine):
+    """Motor sem modelo: retorna sempre o mesmo texto. Útil para testes e para subir o servidor sem pesos."""
+
+    name = "stub"
+    supports_batching = True
+
+    def __init__(self, text: str = "Olá, tudo bem?", language: str = "pt"):
+        self.text = text
+        self.language = language
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, profile: str = DEFAULT_DECODING_PROFILE) -> Dict:
+        return {"text": self.text if len(audio) else "", "language": language or self.language}
+
+
+ASR_ENGINES = {
+    "whisper": WhisperEngine,
+    "faster-whisper": FasterWhisperEngine,
+    "stub": StubASREngine,
+}
+
+
+def create_asr_engine(name: Optional[str] = None, model_name: Optional[str] = None) -> ASREngine:
+    """
+    Cria o motor de ASR a partir da configuração:
+    ASR_ENGINE (whisper | faster-whisper | stub), ASR_MODEL (padrão "small"),
+    ASR_COMPUTE_TYPE (faster-whisper, padrão "int8"), ASR_CPU_THREADS e ASR_STUB_TEXT.
+    """
+    name = (name or os.getenv("ASR_ENGINE", "whisper")).lower()
+    model_name = model_name or os.getenv("ASR_MODEL", "small")
+
+    if name == "whisper":
+        return WhisperEngine(model_name, artifacts=get_artifact_store())
+    if name == "faster-whisper":
+        return FasterWhisperEngine(
+            model_name,
+            compute_type=os.getenv("ASR_COMPUTE_TYPE", "int8"),
+            cpu_threads=int(os.getenv("ASR_CPU_THREADS", 0))
+        )
+    if name == "stub":
+        return StubASREngine(os.getenv("ASR_STUB_TEXT", "Olá, tudo bem?"))
+
+    raise ValueError(f"Motor de ASR desconhecido: {name} (opções: {', '.join(ASR_ENGINES)})")
@@ -0,0 +1,93 @@
+# =============================================================================
+# OPÇÕES DE TRANSCRIÇÃO: IDIOMA E PERFIS DE DECODIFICAÇÃO
+# =============================================================================
+#
+# Sem idioma, o Whisper roda uma passada de detecção de idioma a cada fala,
+# embora o assistente seja em português e a requisição traga o locale. Aqui:
+# - o idioma vem do locale da requisição ou dos metadados da sessão
+#   (ASR_LANGUAGE_MODE=pinned, padrão); com ASR_LANGUAGE_MODE=auto ele é
+#   detectado na primeira fala e reaproveitado nas seguintes da mesma sessão;
+#   ASR_LANGUAGE_MODE=detect mantém a detecção a cada fala;
+# - os perfis de decodificação (ASR_DECODING_PROFILE) deixam explícita a troca
+#   entre latência e precisão; benchmarks/asr_benchmark.py compara os perfis.
+# =============================================================================
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# beam_size=1 é decodificação gulosa; best_of só vale nas temperaturas > 0 do fallback
+DECODING_PROFILES = {
+    # Uma única passada gulosa em temperatura 0: menor latência
+    "fast": {"beam_size": 1, "best_of": 1, "temperature_fallback": False},
+    # Gulosa, mas refaz com temperaturas maiores quando o resultado parece ruim
+    # (taxa de compressão alta ou logprob médio baixo), como o padrão do Whisper
+    "balanced": {"beam_size": 1, "best_of": 5, "temperature_fallback": True},
+    # Beam search com fallback: mais preciso, várias vezes mais lento na CPU
+    "accurate": {"beam_size": 5, "best_of": 5, "temperature_fallback": True},
+}
+
+DEFAULT_DECODING_PROFILE = "balanced"
+
+# Temperaturas tentadas em sequência quando o fallback está ligado (padrão do Whisper)
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Limiares do Whisper para considerar uma decodificação ruim
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+LANGUAGE_MODES = ("pinned", "auto", "detect")
+
+
+def get_decoding_profile(name: Optional[str]) -> Dict:
+    """Retorna as opções do perfil, levantando ValueError para nomes desconhecidos."""
+    name = name or DEFAULT_DECODING_PROFILE
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Perfil de decodificação desconhecido: {name} (opções: {', '.join(DECODING_PROFILES)})")
+    return DECODING_PROFILES[name]
+
+
+def language_from_locale(locale: Optional[str]) -> Optional[str]:
+    """Converte um locale (ex.: "pt-BR", "en_US") no código de idioma do Whisper ("pt", "en")."""
+    if not locale:
+        return None
+    match = re.match(r"^([a-zA-Z]{2,3})(?:[-_].*)?$", locale.strip())
+    return match.group(1).lower() if match else None
+
+
+class SessionLanguageCache:
+    """Idioma detectado por sessão (LRU), usado com ASR_LANGUAGE_MODE=auto."""
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max_sessions
+        self._languages: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[str]:
+        if not session_id:
+            return None
+        with self._lock:
+            language = self._languages.get(session_id)
+            if language is None:
+                self._misses += 1
+                return None
+            self._languages.move_to_end(session_id)
+            self._hits += 1
+            return language
+
+    def put(self, session_id: Optional[str], language: Optional[str]) -> None:
+        if not session_id or not language:
+            return
+        with self._lock:
+            self._languages[session_id] = language
+            self._languages.move_to_end(session_id)
+            while len(self._languages) > self.max_sessions:
+                self._languages.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._languages), "hits": self._hits, "detections": self._misses}
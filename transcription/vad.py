@@ -0,0 +1,228 @@
+# =============================================================================
+# DETECÇÃO DE ATIVIDADE DE VOZ (VAD) POR ENERGIA
+# =============================================================================
+#
+# Detectores leves, só com NumPy, que não carregam nenhum modelo:
+# - EnergyEndpointer: encontra o fim da fala em áudio recebido em tempo real (WebSocket)
+# - SilenceTrimmer: remove o silêncio de uploads completos antes do ASR
+# =============================================================================
+
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+def frame_energy_db(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """
+    Calcula a energia RMS (em dBFS) de cada frame completo do áudio, de forma vetorizada.
+
+    Args:
+        audio: Amostras float mono no intervalo [-1, 1]
+        frame_size: Número de amostras por frame
+
+    Returns:
+        np.ndarray: Energia de cada frame em dBFS
+    """
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_size].reshape(n_frames, frame_size)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+class EnergyEndpointer:
+    """
+    Detector de início/fim de fala baseado em energia com piso de ruído adaptativo.
+
+    O áudio é alimentado em pedaços de qualquer tamanho via feed(). Quando a fala
+    termina (silêncio contínuo por end_silence_ms após fala válida), feed() retorna
+    o trecho completo da fala, incluindo um pequeno pre-roll antes do início.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        speech_margin_db: float = 10.0,
+        min_speech_db: float = -50.0,
+        min_speech_ms: int = 150,
+        end_silence_ms: int = 700,
+        pre_roll_ms: int = 300,
+        max_utterance_s: float = 30.0
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.speech_margin_db = speech_margin_db
+        self.min_speech_db = min_speech_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.end_silence_frames = max(1, end_silence_ms // frame_ms)
+        self.pre_roll_frames = max(0, pre_roll_ms // frame_ms)
+        self.max_utterance_frames = int(max_utterance_s * 1000 / frame_ms)
+        self.noise_floor_db = min_speech_db - speech_margin_db
+        self.reset()
+
+    def reset(self) -> None:
+        """Descarta o áudio acumulado e volta ao estado de espera por fala."""
+        self._pending = np.empty(0, dtype=np.float32)
+        self._frames = []
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+
+    @property
+    def in_speech(self) -> bool:
+        """Indica se o detector está atualmente dentro de um trecho de fala."""
+        return self._in_speech
+
+    def feed(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Alimenta o detector com mais amostras.
+
+        Returns:
+            O áudio da fala completa quando o fim da fala é detectado, senão None.
+        """
+        self._pending = np.concatenate([self._pending, np.asarray(audio, dtype=np.float32)])
+        energies = frame_energy_db(self._pending, self.frame_size)
+        if len(energies) == 0:
+            return None
+
+        frames = self._pending[:len(energies) * self.frame_size].reshape(len(energies), self.frame_size)
+        self._pending = self._pending[len(energies) * self.frame_size:]
+
+        for frame, energy in zip(frames, energies):
+            threshold = max(self.min_speech_db, self.noise_floor_db + self.speech_margin_db)
+            is_speech = energy > threshold
+            self._frames.append(frame)
+
+            if not self._in_speech:
+                # Atualiza o piso de ruído apenas fora da fala
+                if not is_speech:
+                    self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy
+                self._speech_frames = self._speech_frames + 1 if is_speech else 0
+                if self._speech_frames >= self.min_speech_frames:
+                    self._in_speech = True
+                    self._silence_frames = 0
+                else:
+                    # Mantém apenas o pre-roll mais os frames candidatos a fala
+                    keep = self.pre_roll_frames + self._speech_frames
+                    if len(self._frames) > keep:
+                        self._frames = self._frames[-keep:] if keep else []
+                continue
+
+            self._silence_frames = 0 if is_speech else self._silence_frames + 1
+            if self._silence_frames >= self.end_silence_frames or len(self._frames) >= self.max_utterance_frames:
+                return self.flush()
+
+        return None
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Encerra o trecho atual e retorna a fala acumulada (ou None se não houve fala)."""
+        had_speech = self._in_speech
+        utterance = np.concatenate(self._frames) if self._frames else None
+        self._frames = []
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        return utterance if had_speech else None
+
+
+class SilenceTrimmer:
+    """
+    Extrai os trechos de fala de um áudio completo antes da transcrição.
+
+    Tudo é vetorizado sobre os frames: o piso de ruído é o percentil 10 da
+    energia do próprio áudio, frames acima de piso + speech_margin_db (e de
+    min_speech_db) contam como fala, áudio sem nenhum frame acima de
+    min_speech_db é considerado silêncio, trechos de fala mais curtos que
+    min_speech_ms são descartados, pausas menores que merge_gap_ms são
+    mantidas e cada trecho ganha padding_ms de margem dos dois lados.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        speech_margin_db: float = 10.0,
+        min_speech_db: float = -50.0,
+        min_speech_ms: int = 150,
+        merge_gap_ms: int = 300,
+        padding_ms: int = 200
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.speech_margin_db = speech_margin_db
+        self.min_speech_db = min_speech_db
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.merge_gap_frames = merge_gap_ms // frame_ms
+        self.padding_frames = padding_ms // frame_ms
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._rejected = 0
+        self._original_seconds = 0.0
+        self._trimmed_seconds = 0.0
+
+    def segments(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """Retorna os trechos de fala como pares (início, fim) em amostras."""
+        energies = frame_energy_db(audio, self.frame_size)
+        if len(energies) == 0:
+            return []
+
+        # Sem silêncio de referência (fala do início ao fim), o percentil cai dentro
+        # da fala; o limiar nunca passa de speech_margin_db abaixo do pico
+        noise_floor = np.percentile(energies, 10)
+        threshold = max(self.min_speech_db, min(noise_floor + self.speech_margin_db, energies.max() - self.speech_margin_db))
+        is_speech = np.concatenate([[False], energies > threshold, [False]])
+
+        # Bordas de subida/descida da máscara de fala = início/fim de cada trecho (em frames)
+        edges = np.flatnonzero(np.diff(is_speech.astype(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]
+        keep = (ends - starts) >= self.min_speech_frames
+        starts, ends = starts[keep], ends[keep]
+        if len(starts) == 0:
+            return []
+
+        # Junta trechos separados por pausas curtas e os que se sobreporiam (ou encostariam)
+        # depois do padding: senão trim() concatenaria o mesmo áudio duas vezes
+        gaps = starts[1:] - ends[:-1]
+        split = np.flatnonzero(gaps > max(self.merge_gap_frames, 2 * self.padding_frames))
+        starts = np.concatenate([starts[:1], starts[1:][split]])
+        ends = np.concatenate([ends[:-1][split], ends[-1:]])
+
+        n_frames = len(energies)
+        starts = np.maximum(starts - self.padding_frames, 0) * self.frame_size
+        ends = np.minimum(ends + self.padding_frames, n_frames) * self.frame_size
+        # O último trecho inclui as amostras que não formaram um frame completo
+        if ends[-1] == n_frames * self.frame_size:
+            ends[-1] = len(audio)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    def trim(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Concatena só os trechos de fala do áudio.
+
+        Returns:
+            O áudio sem o silêncio, ou None se não houver fala nenhuma.
+        """
+        segments = self.segments(audio)
+        trimmed = np.concatenate([audio[start:end] for start, end in segments]) if segments else None
+
+        with self._lock:
+            self._requests += 1
+            self._original_seconds += len(audio) / self.sample_rate
+            if trimmed is None:
+                self._rejected += 1
+            else:
+                self._trimmed_seconds += len(trimmed) / self.sample_rate
+        return trimmed
+
+    def stats(self) -> Dict[str, float]:
+        """Quanto áudio deixou de ir para o ASR, para o /health."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "rejected_silent": self._rejected,
+                "original_seconds": round(self._original_seconds, 2),
+                "trimmed_seconds": round(self._trimmed_seconds, 2),
+                "removed_ratio": round(1 - self._trimmed_seconds / self._original_seconds, 3) if self._original_seconds else 0.0
+            }
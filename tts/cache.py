@@ -0,0 +1,177 @@
+# =============================================================================
+# CACHE DE ÁUDIO SINTETIZADO (MEMÓRIA + DISCO)
+# =============================================================================
+#
+# Saudações, confirmações e mensagens de erro se repetem o tempo todo.
+# O cache guarda o áudio de cada frase, indexado por conteúdo (texto
+# normalizado, voz, velocidade, taxa de amostragem, formato e o motor/modelo
+# que gerou o áudio), em dois níveis:
+# - memória: LRU limitado em bytes
+# - disco: arquivos persistentes que sobrevivem a reinicializações
+# =============================================================================
+
+import hashlib
+import os
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_cache_text(text: str) -> str:
+    """Normaliza o texto da frase para que variações de espaço/Unicode caiam na mesma chave."""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split())
+
+
+def make_cache_key(text: str, voice: str, sample_rate: int, audio_format: str, engine: str = "",
+                   model_version: str = "", speed: float = 1.0) -> str:
+    """
+    Chave de conteúdo (SHA-256) para uma frase sintetizada. Motor, versão do modelo
+    e velocidade entram na chave: trocar qualquer um deles não reaproveita o áudio do disco.
+    """
+    raw = "\x1f".join([
+        normalize_cache_text(text), voice, str(sample_rate), audio_format, engine, model_version, f"{float(speed):g}"
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Cache de dois níveis para o áudio de frases sintetizadas."""
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = "tts_cache", max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(os.path.getsize(path) for path in self._disk_files())
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Busca o áudio na memória e depois no disco (promovendo para a memória)."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._store_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Guarda o áudio nos dois níveis."""
+        with self._lock:
+            self._store_memory(key, data)
+        self._write_disk(key, data)
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de acerto/erro/despejo para o /health."""
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes if self.disk_dir else 0
+            }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        # Itens maiores que o limite inteiro não entram na memória (ficam só no disco)
+        if len(data) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pcm")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for filename in files:
+                if filename.endswith(".pcm"):
+                    yield os.path.join(root, filename)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Atualiza o mtime para que o despejo do disco remova primeiro o que não é usado
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[TTS CACHE] ⚠️ Erro ao ler do disco: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Escrita atômica: arquivo temporário no mesmo diretório + rename
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            with self._lock:
+                self._disk_bytes += len(data)
+                over_limit = self._disk_bytes > self.max_disk_bytes
+            if over_limit:
+                self._trim_disk()
+        except Exception as e:
+            print(f"[TTS CACHE] ⚠️ Erro ao gravar no disco: {str(e)}")
+
+    def _trim_disk(self) -> None:
+        """Remove os arquivos menos recentes até o disco ficar abaixo de 90% do limite."""
+        files = sorted(self._disk_files(), key=lambda path: os.stat(path).st_mtime)
+        target = int(self.max_disk_bytes * 0.9)
+        for path in files:
+            with self._lock:
+                if self._disk_bytes <= target:
+                    return
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            with self._lock:
+                self._disk_bytes -= size
+                self._counters["disk_evictions"] += 1
@@ -0,0 +1,171 @@
+# =============================================================================
+# CODIFICAÇÃO DE ÁUDIO PARA RESPOSTAS
+# =============================================================================
+#
+# Utilitários para converter o áudio float gerado pelo Kokoro em bytes
+# prontos para enviar ao cliente, sem passar por arquivos temporários.
+# =============================================================================
+
+import io
+import os
+import struct
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+# Taxa de amostragem nativa do Kokoro
+TTS_SAMPLE_RATE = 24000
+
+
+def audio_to_pcm16(audio) -> bytes:
+    """
+    Converte um chunk de áudio float (numpy ou tensor torch) em PCM 16-bit little-endian.
+
+    Args:
+        audio: Amostras float no intervalo [-1, 1]
+
+    Returns:
+        bytes: Amostras PCM 16-bit mono
+    """
+    samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+    samples = np.clip(samples, -1.0, 1.0)
+    return (samples * 32767.0).astype('<i2').tobytes()
+
+
+def wav_stream_header(sample_rate: int = TTS_SAMPLE_RATE, channels: int = 1) -> bytes:
+    """
+    Gera um cabeçalho WAV para streaming, quando o tamanho total ainda é desconhecido.
+
+    Os campos de tamanho usam o valor máximo (0xFFFFFFFF), o que faz os players
+    lerem os dados PCM até o fim da conexão.
+    """
+    bits_per_sample = 16
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    unknown_size = 0xFFFFFFFF
+
+    return (
+        b"RIFF" + struct.pack('<I', unknown_size) + b"WAVE"
+        + b"fmt " + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample)
+        + b"data" + struct.pack('<I', unknown_size)
+    )
+
+
+# =============================================================================
+# CODIFICAÇÃO COMPRIMIDA E NEGOCIAÇÃO DE FORMATO
+# =============================================================================
+
+# Formatos de resposta suportados (libsndfile faz a codificação em memória)
+AUDIO_FORMATS = {
+    "opus": {"media_type": "audio/ogg", "sf_format": "OGG", "sf_subtype": "OPUS"},
+    "mp3": {"media_type": "audio/mpeg", "sf_format": "MP3", "sf_subtype": "MPEG_LAYER_III"},
+    "wav": {"media_type": "audio/wav", "sf_format": "WAV", "sf_subtype": "PCM_16"},
+    "pcm": {"media_type": f"audio/L16;rate={TTS_SAMPLE_RATE};channels=1", "sf_format": None, "sf_subtype": None},
+}
+
+# Media types aceitos no header Accept e nomes alternativos para o campo do formulário
+FORMAT_ALIASES = {
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "ogg": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "mpeg": "mp3",
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/l16": "pcm",
+    "audio/pcm": "pcm",
+    "pcm16": "pcm",
+}
+
+# Formato usado quando o cliente aceita qualquer áudio (compatível com o comportamento anterior)
+DEFAULT_AUDIO_FORMAT = "mp3"
+
+# Nível de compressão do libsndfile (0 = maior qualidade/bitrate, 1 = menor bitrate)
+COMPRESSION_LEVEL = float(os.getenv("TTS_COMPRESSION_LEVEL", 0.5))
+MOBILE_COMPRESSION_LEVEL = float(os.getenv("TTS_MOBILE_COMPRESSION_LEVEL", 0.8))
+
+
+def is_format_supported(audio_format: str) -> bool:
+    """Verifica se o libsndfile instalado consegue codificar o formato."""
+    spec = AUDIO_FORMATS.get(audio_format)
+    if spec is None:
+        return False
+    if spec["sf_format"] is None:
+        return True
+    return (
+        spec["sf_format"] in sf.available_formats()
+        and spec["sf_subtype"] in sf.available_subtypes(spec["sf_format"])
+    )
+
+
+def _normalize_format(value: str) -> Optional[str]:
+    value = value.strip().lower()
+    if value in AUDIO_FORMATS:
+        return value
+    return FORMAT_ALIASES.get(value.split(';')[0].strip())
+
+
+def negotiate_audio_format(accept: Optional[str] = None, requested: Optional[str] = None) -> str:
+    """
+    Escolhe o formato da resposta.
+
+    Prioridade: campo explícito do formulário, depois o header Accept (respeitando
+    os pesos q=), e por fim DEFAULT_AUDIO_FORMAT (ou WAV se o libsndfile não tiver MP3).
+
+    Raises:
+        ValueError: Se o formato pedido explicitamente não existe ou não é suportado
+    """
+    if requested:
+        audio_format = _normalize_format(requested)
+        if audio_format is None or not is_format_supported(audio_format):
+            raise ValueError(f"Formato de áudio não suportado: {requested}")
+        return audio_format
+
+    candidates = []
+    for position, item in enumerate((accept or "").split(',')):
+        parts = [part.strip() for part in item.split(';')]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, position, parts[0].lower()))
+
+    for negative_quality, _, media_type in sorted(candidates):
+        if negative_quality == 0:
+            continue
+        if media_type in ("*/*", "audio/*"):
+            break
+        audio_format = _normalize_format(media_type)
+        if audio_format and is_format_supported(audio_format):
+            return audio_format
+
+    return DEFAULT_AUDIO_FORMAT if is_format_supported(DEFAULT_AUDIO_FORMAT) else "wav"
+
+
+def encode_audio(audio, audio_format: str, sample_rate: int = TTS_SAMPLE_RATE, is_mobile: bool = False) -> bytes:
+    """
+    Codifica o áudio float em memória no formato pedido (opus, mp3, wav ou pcm).
+
+    Para sessões mobile os formatos comprimidos usam um nível de compressão
+    maior, ou seja, bitrate menor.
+    """
+    samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if audio_format == "pcm":
+        return audio_to_pcm16(samples)
+
+    spec = AUDIO_FORMATS[audio_format]
+    buffer = io.BytesIO()
+    extra = {}
+    if audio_format in ("opus", "mp3"):
+        extra["compression_level"] = MOBILE_COMPRESSION_LEVEL if is_mobile else COMPRESSION_LEVEL
+
+    sf.write(buffer, samples, sample_rate, format=spec["sf_format"], subtype=spec["sf_subtype"], **extra)
+    return buffer.getvalue()
@@ -0,0 +1,211 @@
+# =============================================================================
+# MOTORES DE SÍNTESE DE VOZ (TTS)
+# =============================================================================
+#
+# Interface comum usada por fast_tts_generate() e pelo agendador do Kokoro,
+# selecionada por configuração (TTS_ENGINE):
+# - torch: KPipeline do Kokoro em PyTorch (comportamento original)
+# - onnx: grafo Kokoro exportado rodando no onnxruntime (CPU), opcionalmente
+#   quantizado em int8 (ver tools/export_kokoro_onnx.py)
+#
+# A fonetização (G2P) e os voice packs são os mesmos nos dois motores; só o
+# forward do modelo muda. Com o repositório local de artefatos populado
+# (inference/artifacts.py), pesos, config e vozes vêm dele, sem download.
+# =============================================================================
+
+import json
+import os
+import re
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from inference.artifacts import KOKORO_REPO_ID, ArtifactStore, get_artifact_store
+
+# Limite de fonemas aceito pelo Kokoro por segmento
+MAX_PHONEMES = 510
+# Tamanho alvo de cada segmento em caracteres (o KPipeline agrupa frases em ~400)
+MAX_SEGMENT_CHARS = 400
+
+# Fronteiras usadas para quebrar um trecho que passa do limite de fonemas, da maior para a menor
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?:;…])\s+')
+_CLAUSE_SPLIT = re.compile(r'(?<=[,—–])\s+')
+_WORD_SPLIT = re.compile(r'\s+')
+
+
+class TTSEngine:
+    """Interface dos motores de síntese."""
+
+    name = "base"
+    sample_rate = 24000
+    # Identifica os pesos em uso (entra na chave do cache de áudio)
+    model_version = ""
+
+    def __init__(self, lang_code: str = "p"):
+        self.lang_code = lang_code
+
+    def g2p(self, text: str) -> str:
+        raise NotImplementedError
+
+    def load_voice(self, voice: str):
+        raise NotImplementedError
+
+    def infer(self, phonemes: str, voice_pack, speed: float = 1) -> np.ndarray:
+        raise NotImplementedError
+
+    def phonemize(self, text: str) -> List[str]:
+        """
+        Converte o texto em segmentos de fonemas: cada linha é dividida em frases,
+        agrupadas em trechos de até MAX_SEGMENT_CHARS caracteres, como no KPipeline.
+        """
+        segments = []
+        for line in re.split(r'\n+', text):
+            line = line.strip()
+            if not line:
+                continue
+            chunk = ""
+            for sentence in _SENTENCE_SPLIT.split(line):
+                if chunk and len(chunk) + 1 + len(sentence) > MAX_SEGMENT_CHARS:
+                    segments.extend(self._fit_phonemes(chunk))
+                    chunk = sentence
+                else:
+                    chunk = f"{chunk} {sentence}" if chunk else sentence
+            if chunk:
+                segments.extend(self._fit_phonemes(chunk))
+        return segments
+
+    def _fit_phonemes(self, text: str) -> List[str]:
+        """Fonemas do trecho; acima de MAX_PHONEMES, divide ao meio em frases, orações ou palavras."""
+        phonemes = self.g2p(text)
+        if not phonemes:
+            return []
+        if len(phonemes) <= MAX_PHONEMES:
+            return [phonemes]
+        for pattern in (_SENTENCE_SPLIT, _CLAUSE_SPLIT, _WORD_SPLIT):
+            parts = [part for part in pattern.split(text) if part.strip()]
+            if len(parts) > 1:
+                middle = len(parts) // 2
+                return self._fit_phonemes(" ".join(parts[:middle])) + self._fit_phonemes(" ".join(parts[middle:]))
+        # Último recurso: uma única "palavra" que sozinha passa do limite
+        print(f"[TTS] ⚠️ Segmento truncado para {MAX_PHONEMES} fonemas")
+        return [phonemes[:MAX_PHONEMES]]
+
+    def synthesize(self, text: str, voice: str = "pm_santa", speed: float = 1) -> Iterator[np.ndarray]:
+        """Produz o áudio (float32, 24 kHz) de cada segmento do texto, em ordem."""
+        voice_pack = self.load_voice(voice)
+        for phonemes in self.phonemize(text):
+            yield self.infer(phonemes, voice_pack, speed)
+
+
+class KokoroTorchEngine(TTSEngine):
+    """Kokoro em PyTorch (modo eager), via KPipeline."""
+
+    name = "torch"
+
+    def __init__(self, lang_code: str = "p", pipeline=None, artifacts: Optional[ArtifactStore] = None):
+        super().__init__(lang_code)
+        from kokoro import KPipeline
+        self._infer = KPipeline.infer
+
+        if pipeline is None and artifacts is not None and artifacts.has("kokoro"):
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = artifacts.load_kokoro_model(KOKORO_REPO_ID).to(device)
+            pipeline = KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=model)
+            artifacts.preload_voices(pipeline)
+        self.pipeline = pipeline or KPipeline(lang_code=lang_code)
+        self.model_version = KOKORO_REPO_ID
+
+    def g2p(self, text: str) -> str:
+        phonemes, _ = self.pipeline.g2p(text)
+        return phonemes
+
+    def load_voice(self, voice: str):
+        return self.pipeline.load_voice(voice).to(self.pipeline.model.device)
+
+    def infer(self, phonemes: str, voice_pack, speed: float = 1) -> np.ndarray:
+        import torch
+        with torch.inference_mode():
+            output = self._infer(self.pipeline.model, phonemes, voice_pack, speed)
+        return output.audio.cpu().numpy()
+
+
+class KokoroOnnxEngine(TTSEngine):
+    """
+    Grafo Kokoro exportado para ONNX rodando no onnxruntime (CPU).
+
+    Entradas do grafo: input_ids [1, T] (int64), ref_s [1, 256] (float32) e
+    speed [1] (float32). Saída: audio [N] (float32, 24 kHz).
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, lang_code: str = "p", config_path: Optional[str] = None, intra_op_threads: int = 0,
+                 artifacts: Optional[ArtifactStore] = None):
+        super().__init__(lang_code)
+        import onnxruntime as ort
+        from kokoro import KPipeline
+
+        # Pipeline sem modelo: só G2P e voice packs
+        self.pipeline = KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=False)
+
+        if artifacts is not None and artifacts.has("kokoro"):
+            artifacts.preload_voices(self.pipeline)
+            config_path = config_path or artifacts.kokoro_config_path()
+        if config_path is None:
+            from huggingface_hub import hf_hub_download
+            config_path = hf_hub_download(repo_id=KOKORO_REPO_ID, filename="config.json")
+        with open(config_path, "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)["vocab"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.model_path = model_path
+        # O tamanho distingue exportações diferentes com o mesmo nome (ex.: fp32 e int8)
+        self.model_version = f"{KOKORO_REPO_ID}:{os.path.basename(model_path)}:{os.path.getsize(model_path)}"
+
+    def g2p(self, text: str) -> str:
+        phonemes, _ = self.pipeline.g2p(text)
+        return phonemes
+
+    def load_voice(self, voice: str):
+        return self.pipeline.load_voice(voice).cpu().numpy()
+
+    def infer(self, phonemes: str, voice_pack, speed: float = 1) -> np.ndarray:
+        # Mesma tokenização do KModel: ids do vocabulário entre dois tokens de borda (0)
+        token_ids = [self.vocab[p] for p in phonemes if p in self.vocab]
+        input_ids = np.array([[0, *token_ids, 0]], dtype=np.int64)
+        ref_s = voice_pack[len(phonemes) - 1].reshape(1, -1).astype(np.float32)
+        audio = self.session.run(None, {
+            "input_ids": input_ids,
+            "ref_s": ref_s,
+            "speed": np.array([speed], dtype=np.float32)
+        })[0]
+        return audio.reshape(-1)
+
+
+def create_tts_engine(name: Optional[str] = None, lang_code: str = "p") -> TTSEngine:
+    """
+    Cria o motor de TTS a partir da configuração:
+    TTS_ENGINE (torch | onnx), TTS_ONNX_MODEL (caminho do .onnx),
+    TTS_ONNX_CONFIG (config.json do Kokoro, opcional) e TTS_ONNX_THREADS.
+    """
+    name = (name or os.getenv("TTS_ENGINE", "torch")).lower()
+    artifacts = get_artifact_store()
+
+    if name == "torch":
+        return KokoroTorchEngine(lang_code, artifacts=artifacts)
+    if name == "onnx":
+        model_path = os.getenv("TTS_ONNX_MODEL", "models/kokoro.onnx")
+        return KokoroOnnxEngine(
+            model_path,
+            lang_code=lang_code,
+            config_path=os.getenv("TTS_ONNX_CONFIG") or None,
+            intra_op_threads=int(os.getenv("TTS_ONNX_THREADS", 0)),
+            artifacts=artifacts
+        )
+
+    raise ValueError(f"Motor de TTS desconhecido: {name} (opções: torch, onnx)")
@@ -0,0 +1,76 @@
+# =============================================================================
+# ÁUDIOS DE ESPERA PRÉ-SINTETIZADOS
+# =============================================================================
+#
+# Enquanto a LLM executa ferramentas (ex.: pesquisa na web), o usuário ficaria
+# em silêncio durante a busca e a segunda chamada à Azure. Estas frases curtas
+# são sintetizadas uma vez na inicialização e enviadas imediatamente no canal
+# de streaming, sem custo extra de síntese por requisição.
+# =============================================================================
+
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .encoding import audio_to_pcm16
+
+DEFAULT_FILLER_PHRASES = [
+    "Um momento, vou pesquisar...",
+    "Só um instante, já te digo...",
+    "Deixa eu dar uma olhada nisso...",
+    "Hum, deixa eu ver aqui...",
+]
+
+
+class FillerBank:
+    """Conjunto de frases de espera já renderizadas em PCM 16-bit."""
+
+    def __init__(self, synthesize: Callable[[str], Iterable[np.ndarray]], phrases: Optional[List[str]] = None):
+        self.synthesize = synthesize
+        self.phrases = phrases or DEFAULT_FILLER_PHRASES
+        self._clips: List[bytes] = []
+        self._rotation = None
+        self._lock = threading.Lock()
+        self._served = 0
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._clips)
+
+    def warm(self) -> None:
+        """Sintetiza todas as frases. Deve rodar depois que o pipeline TTS estiver carregado."""
+        started_at = time.perf_counter()
+        clips = []
+        for phrase in self.phrases:
+            try:
+                pcm = b"".join(audio_to_pcm16(audio) for audio in self.synthesize(phrase))
+                if pcm:
+                    clips.append(pcm)
+            except Exception as e:
+                print(f"[FILLERS] ⚠️ Erro ao sintetizar '{phrase}': {str(e)}")
+
+        with self._lock:
+            self._clips = clips
+            self._rotation = itertools.cycle(range(len(clips))) if clips else None
+        print(f"[FILLERS] ✅ {len(clips)} áudio(s) de espera prontos em {time.perf_counter() - started_at:.2f}s")
+
+    def warm_in_background(self) -> threading.Thread:
+        """Executa warm() numa thread para não atrasar a inicialização."""
+        thread = threading.Thread(target=self.warm, name="filler-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def pick(self) -> Optional[bytes]:
+        """Retorna o próximo áudio de espera (em rodízio) ou None se ainda não estiverem prontos."""
+        with self._lock:
+            if self._rotation is None:
+                return None
+            self._served += 1
+            return self._clips[next(self._rotation)]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"clips": len(self._clips), "served": self._served}
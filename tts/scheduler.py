@@ -0,0 +1,174 @@
+# =============================================================================
+# AGENDADOR DE SÍNTESE KOKORO PARA REQUISIÇÕES CONCORRENTES
+# =============================================================================
+#
+# Várias respostas sendo sintetizadas ao mesmo tempo passam por uma única
+# thread dona do motor de TTS (Kokoro em torch ou ONNX). A cada rodada ela
+# pega o próximo segmento de fonemas de cada requisição ativa, agrupa por
+# voz (o voice pack é carregado uma vez por grupo) e roda os segmentos em
+# sequência. O áudio volta para cada requisição na ordem original dos
+# seus segmentos.
+#
+# Observação: o forward do Kokoro (KModel.forward_with_tokens) só aceita uma
+# sequência por vez (as durações previstas são "squeezed" antes do
+# repeat_interleave), então não há padding de várias frases num único
+# tensor; o ganho vem do agrupamento por voz, da fonetização feita fora
+# da thread do modelo e da intercalação justa entre as requisições.
+# =============================================================================
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List
+
+import numpy as np
+
+from .engines import TTSEngine
+
+_END_OF_AUDIO = object()
+
+
+class _SynthesisRequest:
+    """Segmentos de fonemas pendentes de uma requisição e a fila com o áudio gerado."""
+
+    def __init__(self, segments: List[str], voice: str, speed: float):
+        self.segments: Deque[str] = deque(segments)
+        self.voice = voice
+        self.speed = speed
+        self.output: "queue.Queue" = queue.Queue()
+        # Marcado quando quem pediu para de consumir o áudio (cliente desconectado, gerador fechado)
+        self.cancelled = False
+
+
+class KokoroSynthesisScheduler:
+    """
+    Agenda a síntese de várias requisições sobre um único motor de TTS.
+
+    synthesize() é bloqueante e deve ser chamada a partir de um worker (ex.: o
+    tts_executor); ela fonetiza o texto na thread chamadora e depois consome o
+    áudio produzido pela thread do modelo.
+    """
+
+    def __init__(self, engine: TTSEngine, max_batch_size: int = 8, window_ms: int = 10):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_ms / 1000
+        self._incoming: "queue.Queue[_SynthesisRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._rounds = 0
+        self._segments = 0
+        self._cancelled = 0
+        self._skipped_segments = 0
+        self._largest_round = 0
+        self._worker = threading.Thread(target=self._run, name="kokoro-scheduler", daemon=True)
+        self._worker.start()
+
+    def synthesize(self, text: str, voice: str = "pm_santa", speed: float = 1) -> Iterator[np.ndarray]:
+        """Produz o áudio (float32, 24 kHz) de cada segmento do texto, em ordem."""
+        segments = self.engine.phonemize(text)
+        if not segments:
+            return
+
+        request = _SynthesisRequest(segments, voice, speed)
+        self._incoming.put(request)
+
+        try:
+            while True:
+                item = request.output.get()
+                if item is _END_OF_AUDIO:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Se o consumidor parou antes do fim, a thread do modelo descarta os segmentos restantes
+            request.cancelled = True
+
+    def stats(self) -> Dict[str, float]:
+        """Estatísticas de agrupamento para o /health."""
+        with self._lock:
+            return {
+                "rounds": self._rounds,
+                "segments": self._segments,
+                "largest_round": self._largest_round,
+                "average_round_size": round(self._segments / self._rounds, 2) if self._rounds else 0.0,
+                "cancelled_requests": self._cancelled,
+                "skipped_segments": self._skipped_segments,
+                "max_batch_size": self.max_batch_size
+            }
+
+    def _admit(self, active: List[_SynthesisRequest], block: bool) -> None:
+        """Move requisições novas para a lista de ativas, esperando a janela se necessário."""
+        if block:
+            active.append(self._incoming.get())
+            deadline = time.monotonic() + self.window_seconds
+        else:
+            deadline = time.monotonic()
+        while len(active) < self.max_batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                active.append(self._incoming.get(timeout=remaining) if remaining > 0 else self._incoming.get_nowait())
+            except queue.Empty:
+                return
+
+    def _run(self) -> None:
+        active: List[_SynthesisRequest] = []
+        while True:
+            self._admit(active, block=not active)
+            active = self._drop_cancelled(active)
+            if not active:
+                continue
+
+            # Uma rodada = o próximo segmento de cada requisição ativa, agrupado por voz
+            by_voice: Dict[str, List[_SynthesisRequest]] = {}
+            for request in active[:self.max_batch_size]:
+                by_voice.setdefault(request.voice, []).append(request)
+
+            round_size = 0
+            for voice, requests in by_voice.items():
+                try:
+                    pack = self.engine.load_voice(voice)
+                except Exception as e:
+                    for request in requests:
+                        request.segments.clear()
+                        request.output.put(e)
+                    continue
+
+                for request in requests:
+                    if request.cancelled:
+                        continue
+                    phonemes = request.segments.popleft()
+                    round_size += 1
+                    try:
+                        request.output.put(self.engine.infer(phonemes, pack, request.speed))
+                    except Exception as e:
+                        request.segments.clear()
+                        request.output.put(e)
+
+            # Requisições sem segmentos restantes são finalizadas; as demais vão para o fim da fila
+            still_active = []
+            for request in active[:self.max_batch_size]:
+                if request.segments:
+                    still_active.append(request)
+                else:
+                    request.output.put(_END_OF_AUDIO)
+            active = active[self.max_batch_size:] + still_active
+
+            with self._lock:
+                self._rounds += 1
+                self._segments += round_size
+                self._largest_round = max(self._largest_round, round_size)
+
+    def _drop_cancelled(self, active: List[_SynthesisRequest]) -> List[_SynthesisRequest]:
+        """Remove as requisições abandonadas antes da rodada, sem sintetizar o que faltava delas."""
+        kept = []
+        for request in active:
+            if not request.cancelled:
+                kept.append(request)
+                continue
+            with self._lock:
+                self._cancelled += 1
+                self._skipped_segments += len(request.segments)
+            request.segments.clear()
+        return kept